@@ -0,0 +1,266 @@
+"""Set-based writes of many calculations at once.
+
+Used by map mode, sweeps and bulk import: a batch of one type shares a
+single version bump and stats update, takes its payload references with
+set-based statements, and inserts its rows in one statement. On
+PostgreSQL the rows are streamed with ``COPY ... FROM STDIN``; other
+databases get an executemany INSERT.
+
+Bulk delete and update work the same way on the live rows matching a
+set of criteria: one set-based UPDATE (a soft delete, or an executemany
+re-type/re-input), one version bump, and the stats moved by the rows the
+UPDATE touched, one batch per type.
+"""
+import csv
+import io
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import bindparam, insert, select
+
+from app.core.cost import cost_guard
+from app.core.vectorized import evaluate_rows
+from app.models.calculation import Calculation
+from app.models.calculation_dependency import CalculationDependency
+from app.models.calculation_payload import CalculationPayload
+from app.models.calculation_stats import CalculationStats
+from app.models.calculation_tombstone import CalculationTombstone
+from app.models.calculation_version import CalculationVersion
+
+# Ids per IN (...) statement; stays under SQLite's bound-parameter limit.
+_IN_CHUNK = 500
+
+def _copy_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, float):
+        return repr(value)
+    return value  # csv writes None as an empty (NULL) field
+
+def copy_rows(db, table, rows: List[Dict]) -> None:
+    """``COPY table FROM STDIN`` of ``rows``, inside the session's transaction."""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+def insert_rows(db, table, rows: List[Dict]) -> None:
+    """Insert ``rows`` with COPY on PostgreSQL, executemany elsewhere."""
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        copy_rows(db, table, rows)
+    else:
+        db.execute(insert(table), rows)
+
+def persist_new_calculations(
+    db,
+    user_id: UUID,
+    calculation_type: str,
+    rows: Sequence[List[float]],
+    results: Sequence[float],
+    expression: Optional[str] = None
+) -> Tuple[List[UUID], int]:
+    """Insert computed calculations of one type in bulk; the caller commits.
+
+    Returns the new ids, in row order, and the batch's change sequence.
+    """
+    change_seq = CalculationVersion.bump(db, user_id)
+    digests = CalculationPayload.acquire_many(db, calculation_type, rows, results, expression)
+    now = datetime.utcnow()
+    ids = [uuid4() for _ in rows]
+    insert_rows(db, Calculation.__table__, [
+        {
+            "id": calculation_id,
+            "user_id": user_id,
+            "type": calculation_type,
+            "payload_digest": digest,
+            "result": result,
+            "created_at": now,
+            "updated_at": now,
+            "version": 1,
+            "change_seq": change_seq,
+        }
+        for calculation_id, digest, result in zip(ids, digests, results)
+    ])
+    CalculationStats.record_added_many(db, user_id, calculation_type, list(results), at=now)
+    return ids, change_seq
+
+def criteria(
+    user_id: UUID,
+    ids: Optional[Sequence[UUID]] = None,
+    calculation_type: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None
+) -> list:
+    """WHERE clauses on the user's live calculations; ``user_id`` always leads."""
+    table = Calculation.__table__
+    clauses = [table.c.user_id == user_id, table.c.deleted_at.is_(None)]
+    if ids is not None:
+        clauses.append(table.c.id.in_(list(ids)))
+    if calculation_type is not None:
+        clauses.append(table.c.type == calculation_type)
+    if created_after is not None:
+        clauses.append(table.c.created_at >= created_after)
+    if created_before is not None:
+        clauses.append(table.c.created_at <= created_before)
+    return clauses
+
+def matching_ids(clauses: list):
+    """SELECT of the ids matching ``clauses``, for use as a subquery."""
+    return select(Calculation.__table__.c.id).where(*clauses)
+
+def delete_calculations(db, user_id: UUID, clauses: list) -> Tuple[List[UUID], int]:
+    """Soft-delete the user's calculations matching ``clauses``; the caller commits.
+
+    The rows are marked with one ``UPDATE ... RETURNING`` and tombstones
+    written under a single change sequence; the purge task removes them
+    and releases their payloads later. The caller makes sure no other
+    calculation takes an input from them. Returns the deleted ids and the
+    change sequence; when nothing matched, the ids are empty and the
+    caller should roll back the version bump.
+    """
+    dependencies = CalculationDependency.__table__
+    db.execute(dependencies.delete().where(dependencies.c.calculation_id.in_(matching_ids(clauses))))
+    change_seq = CalculationVersion.bump(db, user_id)
+    now = datetime.utcnow()
+    table = Calculation.__table__
+    deleted = db.execute(
+        table.update()
+        .where(*clauses)
+        .values(deleted_at=now, updated_at=now, change_seq=change_seq)
+        .returning(table.c.id, table.c.type, table.c.result)
+    ).all()
+    if not deleted:
+        return [], change_seq
+    insert_rows(db, CalculationTombstone.__table__, [
+        {"calculation_id": row.id, "user_id": user_id, "change_seq": change_seq, "deleted_at": now}
+        for row in deleted
+    ])
+    removed = defaultdict(list)
+    for row in deleted:
+        removed[row.type].append(row.result)
+    for calculation_type, results in removed.items():
+        CalculationStats.record_removed_many(db, user_id, calculation_type, results, at=now)
+    db.expire_all()
+    return [row.id for row in deleted], change_seq
+
+@dataclass
+class BulkUpdate:
+    """Outcome of ``update_calculations``."""
+    ids: List[UUID] = field(default_factory=list)
+    change_seq: int = 0
+    recomputed: List[UUID] = field(default_factory=list)  # dependents brought up to date
+
+def update_calculations(
+    db,
+    user_id: UUID,
+    clauses: list,
+    calculation_type: Optional[str] = None,
+    inputs: Optional[List[float]] = None,
+    expression: Optional[str] = None,
+    compute: Optional[Callable[..., float]] = None
+) -> BulkUpdate:
+    """Re-type and/or re-input the user's calculations matching ``clauses``.
+
+    New results are evaluated once per (type, expression) group within
+    the compute budget, then every row is written by one executemany
+    UPDATE sharing a change sequence. Replacing the inputs drops any
+    references to other calculations. Calculations taking a changed
+    result as an input are recomputed with ``compute``. Raises
+    ``ValueError`` if any row or dependent cannot be evaluated; the
+    caller rolls back. The caller commits.
+    """
+    table = Calculation.__table__
+    payloads = CalculationPayload.__table__
+    matched = db.execute(
+        select(
+            table.c.id, table.c.type, table.c.payload_digest, table.c.result,
+            payloads.c.inputs, payloads.c.expression
+        )
+        .join(payloads, payloads.c.digest == table.c.payload_digest)
+        .where(*clauses)
+    ).all()
+    if not matched:
+        return BulkUpdate()
+
+    groups = defaultdict(list)
+    for row in matched:
+        new_type = calculation_type or row.type
+        new_expression = None
+        if new_type == "expression":
+            new_expression = expression if expression is not None else row.expression
+        elif expression is not None:
+            raise ValueError(f"Calculation {row.id} is not an expression; expression is only allowed for that type.")
+        groups[(new_type, new_expression)].append((row, list(inputs) if inputs is not None else row.inputs))
+
+    updates, changed, added = [], [], defaultdict(list)
+    for (new_type, new_expression), entries in groups.items():
+        if new_type == "expression" and new_expression is None:
+            raise ValueError(f"Calculation {entries[0][0].id} needs an expression to become the expression type.")
+        rows = [row_inputs for _, row_inputs in entries]
+        cost_guard.check_batch(sum(len(row_inputs) for row_inputs in rows))
+        evaluated = evaluate_rows(new_type, rows, new_expression)
+        if evaluated.errors:
+            index, error = min(evaluated.errors.items())
+            raise ValueError(f"Calculation {entries[index][0].id} cannot be updated: {error}")
+        digests = CalculationPayload.acquire_many(db, new_type, rows, evaluated.results, new_expression)
+        for (row, _), digest, result in zip(entries, digests, evaluated.results):
+            updates.append({"b_id": row.id, "b_type": new_type, "b_digest": digest, "b_result": result})
+            added[new_type].append(result)
+            if result != row.result:
+                changed.append(row.id)
+
+    ids = [row.id for row in matched]
+    if inputs is not None:
+        dependencies = CalculationDependency.__table__
+        for start in range(0, len(ids), _IN_CHUNK):
+            db.execute(dependencies.delete().where(dependencies.c.calculation_id.in_(ids[start:start + _IN_CHUNK])))
+    change_seq = CalculationVersion.bump(db, user_id)
+    now = datetime.utcnow()
+    db.execute(
+        table.update()
+        .where(table.c.id == bindparam("b_id"))
+        .values(
+            type=bindparam("b_type"),
+            payload_digest=bindparam("b_digest"),
+            result=bindparam("b_result"),
+            updated_at=now,
+            version=table.c.version + 1,
+            change_seq=change_seq
+        ),
+        updates
+    )
+    CalculationPayload.release_many(db, [row.payload_digest for row in matched])
+    # The rows are already updated, so removing an old extreme re-reads the new ones.
+    removed = defaultdict(list)
+    for row in matched:
+        removed[row.type].append(row.result)
+    for old_type, results in removed.items():
+        CalculationStats.record_removed_many(db, user_id, old_type, results, at=now)
+    for new_type, results in added.items():
+        CalculationStats.record_added_many(db, user_id, new_type, results, at=now)
+    db.expire_all()
+
+    recomputed = []
+    for start in range(0, len(changed), _IN_CHUNK):
+        sources = db.query(Calculation).filter(
+            Calculation.id.in_(changed[start:start + _IN_CHUNK]),
+            Calculation.id.in_(db.query(CalculationDependency.source_id))
+        ).all()
+        for source in sources:
+            recomputed.extend(CalculationDependency.recompute_downstream(db, source, compute))
+    return BulkUpdate(ids, change_seq, recomputed)
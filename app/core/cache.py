@@ -0,0 +1,189 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+try:
+    import aioredis
+    REDIS_AVAILABLE = True
+except (ImportError, TypeError):
+    # aioredis has compatibility issues with Python 3.12; the cache then
+    # runs with the in-process tier only.
+    REDIS_AVAILABLE = False
+
+from app.core import redis_loop
+from app.core.config import get_settings
+from app.core.metrics import metrics
+
+settings = get_settings()
+
+metrics.describe("response_cache_hits_total", "Calculation reads served from the response cache")
+metrics.describe("response_cache_misses_total", "Calculation reads that had to query the database")
+metrics.describe("response_cache_hit_ratio", "Hits divided by lookups since start")
+metrics.describe("response_cache_hit_seconds", "Time to serve a cache hit")
+metrics.describe("response_cache_miss_seconds", "Time to build a response on a miss")
+metrics.describe(
+    "response_cache_saved_seconds_total",
+    "Estimated time saved by hits, from the average miss latency"
+)
+metrics.describe("response_cache_redis_errors_total", "Redis tier calls that failed or timed out")
+
+@dataclass
+class CachedResponse:
+    etag: str
+    body: Optional[bytes] = None
+
+class ResponseCache:
+    """Serialized calculation responses keyed by user, collection version and query.
+
+    Every write bumps the user's ``CalculationVersion`` in the database, in
+    the same transaction, whichever process makes it (API workers, the
+    group-commit writer, job runners, CLI jobs). Callers read that version
+    (one primary-key lookup) and pass it in as part of the key, so a write
+    makes all of that user's older entries unreachable at once and they age
+    out of the LRU. Entries can therefore never be served stale.
+
+    The in-process tier is bounded by ``max_entries``. The optional Redis
+    tier is shared between workers.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 300.0,
+        redis_url: Optional[str] = None,
+        enabled: bool = True
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis_url = redis_url
+        self.enabled = enabled
+        self._entries: "OrderedDict[Tuple[uuid.UUID, int, str], Tuple[float, CachedResponse]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+
+    # -- entries ---------------------------------------------------------
+
+    def get(self, user_id: uuid.UUID, version: int, key: str) -> Optional[CachedResponse]:
+        cache_key = (user_id, version, key)
+        now = time.monotonic()
+        with self._lock:
+            found = self._entries.get(cache_key)
+            if found is not None:
+                expires, entry = found
+                if expires > now:
+                    self._entries.move_to_end(cache_key)
+                    return entry
+                del self._entries[cache_key]
+
+        entry = self._redis_call(self._redis_get, user_id, version, key)
+        if entry is not None:
+            self._store_local(cache_key, entry, now)
+        return entry
+
+    def set(self, user_id: uuid.UUID, version: int, key: str, entry: CachedResponse) -> None:
+        self._store_local((user_id, version, key), entry, time.monotonic())
+        self._redis_call(self._redis_set, user_id, version, key, entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_or_build(
+        self,
+        user_id: uuid.UUID,
+        version: int,
+        key: str,
+        build: Callable[[], CachedResponse]
+    ) -> CachedResponse:
+        """Return the cached response for ``key`` at ``version`` or build and store it.
+
+        ``version`` must be read before ``build`` queries anything, so a
+        concurrent write can only make the stored entry unreachable, never
+        stale. ``build`` may return an entry without a body (e.g. a 304
+        decided from the version alone); such entries are passed through
+        uncached.
+        """
+        if not self.enabled:
+            return build()
+
+        started = time.perf_counter()
+        entry = self.get(user_id, version, key)
+        if entry is not None:
+            self._record_hit(time.perf_counter() - started)
+            return entry
+
+        entry = build()
+        if entry.body is not None:
+            self.set(user_id, version, key, entry)
+        self._record_miss(time.perf_counter() - started)
+        return entry
+
+    def _store_local(self, cache_key, entry: CachedResponse, now: float) -> None:
+        with self._lock:
+            self._entries[cache_key] = (now + self.ttl_seconds, entry)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # -- metrics ---------------------------------------------------------
+
+    def _record_hit(self, seconds: float) -> None:
+        metrics.inc("response_cache_hits_total")
+        metrics.observe("response_cache_hit_seconds", seconds)
+        misses, miss_seconds = metrics.summary("response_cache_miss_seconds")
+        if misses:
+            metrics.inc("response_cache_saved_seconds_total", max(0.0, miss_seconds / misses - seconds))
+        self._update_ratio()
+
+    def _record_miss(self, seconds: float) -> None:
+        metrics.inc("response_cache_misses_total")
+        metrics.observe("response_cache_miss_seconds", seconds)
+        self._update_ratio()
+
+    def _update_ratio(self) -> None:
+        hits = metrics.counter("response_cache_hits_total")
+        misses = metrics.counter("response_cache_misses_total")
+        metrics.set("response_cache_hit_ratio", hits / (hits + misses))
+
+    # -- redis tier ------------------------------------------------------
+
+    def _redis_call(self, func, *args):
+        """Run a Redis coroutine from any thread; None on any failure."""
+        if not (REDIS_AVAILABLE and self.redis_url):
+            return None
+        try:
+            return redis_loop.run(func, *args, timeout=settings.REDIS_TIMEOUT_SECONDS)
+        except Exception:
+            metrics.inc("response_cache_redis_errors_total")
+            return None
+
+    async def _client(self):
+        if self._redis is None:
+            self._redis = await aioredis.from_url(self.redis_url)
+        return self._redis
+
+    async def _redis_get(self, user_id: uuid.UUID, version: int, key: str) -> Optional[CachedResponse]:
+        redis = await self._client()
+        value = await redis.get(f"rc:{user_id}:{version}:{key}")
+        if value is None:
+            return None
+        etag, _, body = value.partition(b"\n")
+        return CachedResponse(etag=etag.decode(), body=body)
+
+    async def _redis_set(self, user_id: uuid.UUID, version: int, key: str, entry: CachedResponse) -> None:
+        redis = await self._client()
+        await redis.set(
+            f"rc:{user_id}:{version}:{key}",
+            entry.etag.encode() + b"\n" + entry.body,
+            ex=int(self.ttl_seconds)
+        )
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    redis_url=settings.REDIS_URL if settings.RESPONSE_CACHE_REDIS else None,
+    enabled=settings.RESPONSE_CACHE_ENABLED
+)
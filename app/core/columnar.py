@@ -0,0 +1,140 @@
+"""Columnar export of calculation history as Arrow IPC streams or Parquet.
+
+Rows are read straight from the database with ``yield_per`` (a
+server-side cursor on PostgreSQL), ``chunk_size`` at a time, and each
+chunk becomes one Arrow record batch, or one Parquet row group. Memory
+therefore stays bounded by the chunk size, not by the history. ``inputs``
+is a ``list<float64>`` column, so pandas and Polars read it without
+parsing JSON.
+
+pyarrow is optional. Without it ``PYARROW_AVAILABLE`` is False and only
+``column_chunks`` (plain Python lists) is usable.
+"""
+import io
+from itertools import islice
+from typing import BinaryIO, Dict, Iterable, Iterator, List
+from uuid import UUID
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from app.models.calculation import Calculation
+from app.models.calculation_payload import CalculationPayload
+
+FORMATS = ("arrow", "parquet")
+
+MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+EXTENSIONS = {"arrow": "arrows", "parquet": "parquet"}
+
+COLUMNS = ("id", "type", "inputs", "expression", "result", "created_at", "updated_at", "version")
+
+def schema():
+    return pa.schema([
+        ("id", pa.string()),
+        ("type", pa.string()),
+        ("inputs", pa.list_(pa.float64())),
+        ("expression", pa.string()),
+        ("result", pa.float64()),
+        ("created_at", pa.timestamp("us")),
+        ("updated_at", pa.timestamp("us")),
+        ("version", pa.int32()),
+    ])
+
+def export_query(db, user_id: UUID, **filters):
+    """``Calculation.filter_for_user`` reduced to the exported columns."""
+    return Calculation.filter_for_user(db, user_id, **filters).join(
+        CalculationPayload, CalculationPayload.digest == Calculation.payload_digest
+    ).with_entities(
+        Calculation.id,
+        Calculation.type,
+        CalculationPayload.inputs,
+        CalculationPayload.expression,
+        Calculation.result,
+        Calculation.created_at,
+        Calculation.updated_at,
+        Calculation.version,
+    )
+
+def column_chunks(query, chunk_size: int) -> Iterator[Dict[str, List]]:
+    """The query's rows as ``{column: values}``, ``chunk_size`` rows at a time."""
+    rows = iter(query.yield_per(chunk_size))
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        ids, types, inputs, expressions, results, created, updated, versions = zip(*chunk)
+        yield {
+            "id": [str(value) for value in ids],
+            "type": list(types),
+            "inputs": [[float(value) for value in row] for row in inputs],
+            "expression": list(expressions),
+            "result": list(results),
+            "created_at": list(created),
+            "updated_at": list(updated),
+            "version": list(versions),
+        }
+
+def record_batches(chunks: Iterable[Dict[str, List]]) -> Iterator["pa.RecordBatch"]:
+    arrow_schema = schema()
+    for columns in chunks:
+        yield pa.RecordBatch.from_pydict(columns, schema=arrow_schema)
+
+def _writer(sink, format: str):
+    if format == "parquet":
+        return pq.ParquetWriter(sink, schema())
+    return pa.ipc.new_stream(sink, schema())
+
+def write_batches(batches: Iterable["pa.RecordBatch"], sink, format: str) -> int:
+    """Write ``batches`` to ``sink`` (a path or binary file); returns the row count."""
+    rows = 0
+    with _writer(sink, format) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose bytes are taken out after every batch."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+def stream(batches: Iterable["pa.RecordBatch"], format: str) -> Iterator[bytes]:
+    """Encode ``batches`` as they come, yielding the bytes of each one."""
+    sink = _Drain()
+    with _writer(sink, format) as writer:
+        data = sink.drain()
+        if data:
+            yield data
+        for batch in batches:
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()  # end-of-stream marker or Parquet footer
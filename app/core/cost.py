@@ -0,0 +1,241 @@
+import math
+from dataclasses import dataclass
+from functools import partial
+from itertools import chain
+from typing import List, Optional
+
+from app.core import reduction, statistics
+from app.core.config import get_settings
+from app.core.executor import CalculationExecutor, Evaluate, ExecutorTimeout, ThreadExecutor, create_executor
+from app.core.metrics import metrics
+from app.core.vectorized import RowResults, evaluate_flat, evaluate_rows
+
+settings = get_settings()
+
+metrics.describe("cost_guard_rejected_total", "Calculations rejected by the compute budget before running")
+metrics.describe("cost_guard_offloaded_total", "Calculations run on the offload executor")
+
+# log10 of the largest finite float; results beyond it cannot be stored.
+MAX_FLOAT_LOG10 = math.log10(1.7976931348623157e308)
+
+class CostExceeded(ValueError):
+    """The calculation is estimated to exceed the compute budget."""
+
+@dataclass(frozen=True)
+class CostEstimate:
+    work: int
+    magnitude: float
+
+def _log10(value: float) -> float:
+    value = abs(value)
+    return math.log10(value) if value else -math.inf
+
+def _log10_product(values: List[float]) -> float:
+    """log10 of ``|prod(values)|``; -inf when any value is zero."""
+    if 0 in values:
+        return -math.inf
+    return math.fsum(map(math.log10, map(abs, values)))
+
+def estimate_work(calculation_type: str, inputs: List[float]) -> int:
+    """Element operations the calculation needs; O(1) to estimate."""
+    work = len(inputs)
+    if calculation_type.lower() == "power" and len(inputs) >= 2 and math.isfinite(inputs[1]):
+        # Integer powers square-and-multiply: ~log2(exponent) multiplications.
+        work += int(math.log2(abs(inputs[1]) + 1))
+    return work
+
+def estimate_magnitude(calculation_type: str, inputs: List[float]) -> float:
+    """log10 of the largest ``|result|`` the inputs can produce.
+
+    ``-inf`` when the result is known to be zero, ``nan`` when non-finite
+    inputs make it meaningless. Only builtins run per element, but this is
+    still O(n).
+    """
+    calculation_type = calculation_type.lower()
+    if not inputs:
+        return -math.inf
+
+    if calculation_type in ("addition", "subtraction"):
+        return _log10(max(max(inputs), -min(inputs))) + math.log10(len(inputs))
+    if calculation_type == "multiplication":
+        return _log10_product(inputs)
+    if calculation_type == "division":
+        divisors = inputs[1:]
+        if 0 in divisors:
+            return _log10(inputs[0])
+        return _log10(inputs[0]) - _log10_product(divisors)
+    if calculation_type == "modulus":
+        return _log10(inputs[0])
+    if calculation_type == "tan":
+        # Bounded away from the poles, which get_result rejects.
+        return 10.0
+    if calculation_type == "exponential":
+        return math.fsum(inputs) * math.log10(math.e)
+    if calculation_type == "power" and len(inputs) >= 2:
+        base, exponent = inputs[0], inputs[1]
+        if not (math.isfinite(base) and math.isfinite(exponent)):
+            return math.nan
+        return exponent * _log10(base) if base else -math.inf
+    if calculation_type in statistics.STATISTICS:
+        values = inputs[1:] if calculation_type == "percentile" else inputs
+        if not values:
+            return -math.inf
+        largest = _log10(max(max(values), -min(values)))
+        # The sample variance is at most n / (n - 1) <= 2 times max(x^2).
+        if calculation_type == "variance":
+            return 2 * largest + math.log10(2)
+        if calculation_type == "stddev":
+            return largest + math.log10(2) / 2
+        return largest
+    return 0.0
+
+def estimate(calculation_type: str, inputs: List[float]) -> CostEstimate:
+    """Upper bounds on the work and the result magnitude, without computing."""
+    return CostEstimate(
+        estimate_work(calculation_type, inputs),
+        estimate_magnitude(calculation_type, inputs)
+    )
+
+def _check_magnitude(calculation_type: str, inputs: List[float], max_magnitude: float) -> float:
+    magnitude = estimate_magnitude(calculation_type, inputs)
+    if math.isnan(magnitude):
+        raise ValueError("Inputs must be finite numbers.")
+    if magnitude > max_magnitude:
+        raise CostExceeded(
+            f"Result is too large to represent (about 10^{magnitude:.0f}, "
+            f"limit 10^{max_magnitude:.0f})."
+        )
+    return magnitude
+
+def _evaluate_within(evaluate: Evaluate, max_magnitude: float, calculation_type: str, inputs: List[float]) -> float:
+    """Check the result magnitude, then evaluate; runs wherever the work runs."""
+    _check_magnitude(calculation_type, inputs, max_magnitude)
+    result = evaluate(calculation_type, inputs)
+    if not math.isfinite(result):
+        raise ValueError("Result is out of range.")
+    return result
+
+class CostGuard:
+    """Reject calculations that would blow the budget before they run.
+
+    Calculations over ``max_work`` operations, or whose result would be
+    beyond ``max_magnitude`` (log10), are refused without computing.
+    Everything else runs inline, except work of at least ``offload_work``,
+    which goes to the ``offload`` executor (a small thread or process pool)
+    so a burst of it cannot occupy every request thread. The work check is
+    O(1); the O(n) magnitude check runs next to the calculation, so for
+    offloaded work it costs the request thread nothing.
+    """
+
+    def __init__(
+        self,
+        max_work: int = 5_000_000,
+        offload_work: int = 100_000,
+        max_magnitude: float = MAX_FLOAT_LOG10,
+        offload: Optional[CalculationExecutor] = None,
+        offload_timeout: float = 10.0
+    ):
+        self.max_work = max_work
+        self.offload_work = offload_work
+        self.max_magnitude = max_magnitude
+        self.offload = offload or ThreadExecutor(max_workers=2)
+        self.offload_timeout = offload_timeout
+
+    def check_work(self, calculation_type: str, inputs: List[float]) -> int:
+        return self.check_batch(estimate_work(calculation_type, inputs))
+
+    def check_batch(self, work: int) -> int:
+        """Refuse ``work`` element operations if they are over the budget."""
+        if work > self.max_work:
+            metrics.inc("cost_guard_rejected_total")
+            raise CostExceeded(
+                f"Calculation exceeds the compute budget ({work} operations, "
+                f"limit {self.max_work}); split it into smaller parts."
+            )
+        return work
+
+    def check(self, calculation_type: str, inputs: List[float]) -> CostEstimate:
+        """Both budget checks up front, for callers that decide before running."""
+        work = self.check_work(calculation_type, inputs)
+        try:
+            magnitude = _check_magnitude(calculation_type, inputs, self.max_magnitude)
+        except CostExceeded:
+            metrics.inc("cost_guard_rejected_total")
+            raise
+        return CostEstimate(work, magnitude)
+
+    def should_offload(self, cost: CostEstimate) -> bool:
+        return cost.work >= self.offload_work
+
+    def run(
+        self,
+        calculation_type: str,
+        inputs: List[float],
+        evaluate: Evaluate,
+        offload: bool = True,
+        standard: bool = False
+    ) -> float:
+        """Check the budget, then ``evaluate(type, inputs)`` inline or offloaded.
+
+        ``standard`` declares that ``evaluate`` is the built-in arithmetic
+        for the type, which lets offloaded ``reduction.REDUCIBLE`` types be
+        reduced in parallel chunks instead; any other evaluator always runs.
+        """
+        work = self.check_work(calculation_type, inputs)
+        try:
+            if offload and work >= self.offload_work:
+                metrics.inc("cost_guard_offloaded_total")
+                if standard and calculation_type.lower() in reduction.REDUCIBLE:
+                    # Float reductions cannot blow up, so check the result
+                    # rather than spend an O(n) estimate in this thread.
+                    result = self.offload.reduce(calculation_type, inputs, timeout=self.offload_timeout)
+                    if not math.isfinite(result):
+                        raise ValueError("Result is out of range.")
+                    return result
+                return self.offload.run(
+                    partial(_evaluate_within, evaluate, self.max_magnitude),
+                    calculation_type,
+                    inputs,
+                    timeout=self.offload_timeout
+                )
+            return _evaluate_within(evaluate, self.max_magnitude, calculation_type, inputs)
+        except CostExceeded:
+            metrics.inc("cost_guard_rejected_total")
+            raise
+        except ExecutorTimeout:
+            raise CostExceeded("Calculation did not finish within the compute budget.")
+
+    def run_rows(
+        self,
+        calculation_type: str,
+        rows: List[List[float]],
+        offload: bool = True,
+        expression: Optional[str] = None
+    ) -> RowResults:
+        """Check the budget for a whole matrix, then evaluate every row.
+
+        Per-row failures come back in ``RowResults.errors``; only the budget
+        (or the offload timeout) fails the batch as a whole.
+        """
+        columns = len(rows[0]) if rows else 0
+        work = self.check_batch(len(rows) * columns)
+        if offload and work >= self.offload_work:
+            metrics.inc("cost_guard_offloaded_total")
+            try:
+                return self.offload.run(
+                    partial(evaluate_flat, columns, expression=expression),
+                    calculation_type,
+                    list(chain.from_iterable(rows)),
+                    timeout=self.offload_timeout
+                )
+            except ExecutorTimeout:
+                raise CostExceeded("Calculation did not finish within the compute budget.")
+        return evaluate_rows(calculation_type, rows, expression)
+
+cost_guard = CostGuard(
+    max_work=settings.COST_MAX_WORK,
+    offload_work=settings.COST_OFFLOAD_WORK,
+    max_magnitude=settings.COST_MAX_RESULT_LOG10,
+    offload=create_executor(settings.COST_OFFLOAD_MODE, settings.COST_OFFLOAD_WORKERS),
+    offload_timeout=settings.COST_OFFLOAD_TIMEOUT_SECONDS
+)
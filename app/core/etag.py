@@ -0,0 +1,30 @@
+import hashlib
+import uuid
+from datetime import datetime
+from typing import Optional
+
+def item_etag(version: int, updated_at: datetime) -> str:
+    """Weak ETag for a single calculation"""
+    return f'W/"{version}.{updated_at:%Y%m%d%H%M%S%f}"'
+
+def collection_etag(user_id: uuid.UUID, version: int, query: str = "") -> str:
+    """Weak ETag for a user's calculation list.
+
+    The query string is folded in because different filters over the same
+    collection version produce different bodies, and the user because
+    version counters are per user, so two users' lists can share one.
+    """
+    digest = hashlib.sha1(f"{user_id}:{query}".encode()).hexdigest()[:12]
+    return f'W/"c{version}.{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag``"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == wanted
+        for candidate in if_none_match.split(",")
+    )
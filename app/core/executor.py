@@ -0,0 +1,181 @@
+import multiprocessing
+import threading
+import time
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from multiprocessing import shared_memory
+from typing import Callable, List, Optional
+
+from app.core import reduction
+
+Evaluate = Callable[[str, List[float]], float]
+
+_PACK_CHUNK = 16384
+
+class ExecutorTimeout(Exception):
+    """The calculation did not finish within the executor's timeout."""
+
+def _evaluate_shared(evaluate: Evaluate, calculation_type: str, name: str, length: int) -> float:
+    """Process-pool entry point: read the inputs from shared memory."""
+    # Spawned workers share the parent's resource tracker, so attaching
+    # here does not hand ownership over; the parent unlinks the block.
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        view = block.buf[:length * 8].cast("d")
+        try:
+            inputs = view.tolist()
+        finally:
+            view.release()
+        return evaluate(calculation_type, inputs)
+    finally:
+        block.close()
+
+def _reduce_shared(op: str, name: str, start: int, stop: int) -> reduction.Partial:
+    """Process-pool entry point: reduce one slice of a shared input block."""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        view = block.buf[start * 8:stop * 8].cast("d")
+        try:
+            return reduction.reduce_chunk(op, view)
+        finally:
+            view.release()
+    finally:
+        block.close()
+
+def _pack(inputs: List[float]) -> shared_memory.SharedMemory:
+    """Copy ``inputs`` into a new shared block of float64."""
+    length = len(inputs)
+    block = shared_memory.SharedMemory(create=True, size=max(length, 1) * 8)
+    view = block.buf[:length * 8].cast("d")
+    try:
+        # Pack in slices: each is one C call holding the GIL, so short
+        # ones let other request threads in between.
+        for start in range(0, length, _PACK_CHUNK):
+            view[start:start + _PACK_CHUNK] = array("d", inputs[start:start + _PACK_CHUNK])
+    finally:
+        view.release()
+    return block
+
+class CalculationExecutor:
+    """Where a calculation's ``evaluate(type, inputs)`` runs.
+
+    ``inline`` runs in the calling thread, ``thread`` on a thread pool and
+    ``process`` on a process pool, which takes CPU-bound work off this
+    worker's GIL. ``evaluate`` must be picklable (a module-level function
+    or classmethod) for the process mode.
+    """
+    mode = "inline"
+
+    def run(
+        self,
+        evaluate: Evaluate,
+        calculation_type: str,
+        inputs: List[float],
+        timeout: Optional[float] = None
+    ) -> float:
+        return evaluate(calculation_type, inputs)
+
+    def reduce(
+        self,
+        calculation_type: str,
+        inputs: List[float],
+        timeout: Optional[float] = None
+    ) -> float:
+        """Evaluate a type in ``reduction.REDUCIBLE`` as a chunked reduction."""
+        return self.run(reduction.evaluate, calculation_type, inputs, timeout)
+
+    def shutdown(self) -> None:
+        pass
+
+class _PoolExecutor(CalculationExecutor):
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._create_pool()
+            return self._pool
+
+    def _create_pool(self) -> Executor:
+        raise NotImplementedError
+
+    def _wait(self, future, timeout: Optional[float]) -> float:
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise ExecutorTimeout()
+
+class ThreadExecutor(_PoolExecutor):
+    mode = "thread"
+
+    def run(self, evaluate, calculation_type, inputs, timeout=None):
+        return self._wait(self._get_pool().submit(evaluate, calculation_type, inputs), timeout)
+
+    def _create_pool(self) -> Executor:
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="calc-thread")
+
+class ProcessExecutor(_PoolExecutor):
+    """Evaluate on a process pool, passing inputs through shared memory.
+
+    The inputs are packed once as float64 into a shared block; the worker
+    reads them in place instead of unpickling a list sent over a pipe.
+    Workers are spawned, not forked, so they never inherit this process's
+    threads or open database connections.
+    """
+    mode = "process"
+
+    def run(self, evaluate, calculation_type, inputs, timeout=None):
+        block = _pack(inputs)
+        try:
+            future = self._get_pool().submit(
+                _evaluate_shared, evaluate, calculation_type, block.name, len(inputs)
+            )
+            return self._wait(future, timeout)
+        finally:
+            block.close()
+            block.unlink()
+
+    def reduce(self, calculation_type, inputs, timeout=None):
+        """Reduce one slice per worker in parallel and combine the partials."""
+        op, head, body = reduction.split(calculation_type, inputs)
+        block = _pack(body)
+        try:
+            pool = self._get_pool()
+            futures = [
+                pool.submit(_reduce_shared, op, block.name, start, stop)
+                for start, stop in reduction.chunk_bounds(len(body), self.max_workers)
+            ]
+            deadline = None if timeout is None else time.monotonic() + timeout
+            partials = []
+            for future in futures:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                partials.append(self._wait(future, remaining))
+        finally:
+            block.close()
+            block.unlink()
+        return reduction.finish(calculation_type, head, partials)
+
+    def _create_pool(self) -> Executor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+def create_executor(mode: str, max_workers: int = 2) -> CalculationExecutor:
+    if mode == "inline":
+        return CalculationExecutor()
+    if mode == "thread":
+        return ThreadExecutor(max_workers)
+    if mode == "process":
+        return ProcessExecutor(max_workers)
+    raise ValueError(f"Unknown executor mode: {mode}")
@@ -0,0 +1,168 @@
+"""Safe arithmetic expressions, compiled once and cached.
+
+An expression such as ``(a + b) * sin(c)`` is parsed with :mod:`ast` and
+checked against a whitelist: float literals, variables, ``+ - * / % **``,
+unary signs and calls to the functions in ``FUNCTIONS``. Anything else
+(attributes, subscripts, keywords, lambdas, comprehensions, ...) is
+rejected before any code is generated. The checked tree is then compiled
+to an ordinary Python function of its variables, so evaluating a cached
+plan costs one function call.
+
+Variables bind to the inputs in alphabetical order of their names, and
+the trigonometric functions take degrees like the ``sin``/``cos``/``tan``
+calculation types.
+"""
+import ast
+import math
+from functools import lru_cache
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+MAX_LENGTH = 500
+MAX_NODES = 200
+
+def _sin(degrees: float) -> float:
+    return math.sin(math.radians(degrees))
+
+def _cos(degrees: float) -> float:
+    return math.cos(math.radians(degrees))
+
+def _tan(degrees: float) -> float:
+    radians = math.radians(degrees)
+    if abs(math.cos(radians)) < 1e-10:
+        raise ValueError("Tangent is undefined at this angle.")
+    return math.tan(radians)
+
+FUNCTIONS: Dict[str, Tuple[Callable[..., float], int, int]] = {
+    # name -> (function, fewest arguments, most arguments)
+    "sin": (_sin, 1, 1),
+    "cos": (_cos, 1, 1),
+    "tan": (_tan, 1, 1),
+    "sqrt": (math.sqrt, 1, 1),
+    "exp": (math.exp, 1, 1),
+    "log": (math.log, 1, 1),
+    "abs": (abs, 1, 1),
+    "min": (min, 2, MAX_NODES),
+    "max": (max, 2, MAX_NODES),
+}
+CONSTANTS = {"pi": math.pi, "e": math.e}
+
+_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod, ast.Pow, ast.UAdd, ast.USub)
+
+class CompiledExpression:
+    """A checked expression and the function it compiled to."""
+
+    def __init__(self, text: str, variables: Tuple[str, ...], function: Callable[..., float]):
+        self.text = text
+        self.variables = variables
+        self._function = function
+
+    def __call__(self, inputs: Sequence[float]) -> float:
+        if len(inputs) != len(self.variables):
+            raise ValueError(
+                f"Expression needs {len(self.variables)} inputs "
+                f"({', '.join(self.variables)}), got {len(inputs)}."
+            )
+        try:
+            return float(self._function(*inputs))
+        except ZeroDivisionError:
+            raise ValueError("Cannot divide by zero.")
+        except OverflowError:
+            raise ValueError("Result is too large to represent.")
+        except TypeError:  # e.g. a negative base to a fractional power is complex
+            raise ValueError("Result is not a real number.")
+        except ValueError as e:
+            raise ValueError(f"Expression cannot be evaluated: {e}")
+
+    def __repr__(self):
+        return f"<CompiledExpression({self.text!r}, variables={self.variables})>"
+
+def _check(tree: ast.Expression) -> List[str]:
+    """Reject anything outside the whitelist; returns the variable names."""
+    variables = set()
+    nodes = list(ast.walk(tree))
+    if len(nodes) > MAX_NODES:
+        raise ValueError(f"Expression is too complex (more than {MAX_NODES} nodes).")
+    for node in nodes:
+        if isinstance(node, (ast.Expression, ast.Load) + _OPERATORS):
+            continue
+        if isinstance(node, (ast.BinOp, ast.UnaryOp)):
+            continue
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise ValueError("Only numeric literals are allowed.")
+            # Float literals keep ** from building huge exact integers.
+            try:
+                node.value = float(node.value)
+            except OverflowError:
+                raise ValueError("Numeric literal is too large.")
+            continue
+        if isinstance(node, ast.Call):
+            name = node.func.id if isinstance(node.func, ast.Name) else None
+            if name not in FUNCTIONS or node.keywords:
+                raise ValueError(f"Unsupported function in expression: {ast.unparse(node.func)}")
+            _, fewest, most = FUNCTIONS[name]
+            if not fewest <= len(node.args) <= most:
+                raise ValueError(f"Wrong number of arguments to {name}().")
+            if any(isinstance(arg, ast.Starred) for arg in node.args):
+                raise ValueError("Unsupported syntax in expression: *")
+            continue
+        if isinstance(node, ast.Name):
+            if node.id.startswith("_"):
+                raise ValueError(f"Invalid variable name: {node.id}")
+            if node.id not in FUNCTIONS and node.id not in CONSTANTS:
+                variables.add(node.id)
+            continue
+        raise ValueError(f"Unsupported syntax in expression: {type(node).__name__}")
+    # A function name used as a value (``sin + 1``) is not a call.
+    callees = {id(node.func) for node in nodes if isinstance(node, ast.Call)}
+    for node in nodes:
+        if isinstance(node, ast.Name) and node.id in FUNCTIONS and id(node) not in callees:
+            raise ValueError(f"{node.id} must be called.")
+    return sorted(variables)
+
+def _compile(text: str) -> CompiledExpression:
+    if len(text) > MAX_LENGTH:
+        raise ValueError(f"Expression is longer than {MAX_LENGTH} characters.")
+    try:
+        tree = ast.parse(text.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {e.msg}")
+    variables = _check(tree)
+
+    # lambda <variables>: <expression>, evaluated once with no builtins.
+    function_tree = ast.Expression(body=ast.Lambda(
+        args=ast.arguments(
+            posonlyargs=[],
+            args=[ast.arg(arg=name) for name in variables],
+            kwonlyargs=[],
+            kw_defaults=[],
+            defaults=[]
+        ),
+        body=tree.body
+    ))
+    ast.fix_missing_locations(function_tree)
+    namespace = {"__builtins__": {}, **CONSTANTS}
+    namespace.update((name, entry[0]) for name, entry in FUNCTIONS.items())
+    function = eval(compile(function_tree, "<expression>", "eval"), namespace)
+    return CompiledExpression(text, tuple(variables), function)
+
+_compile_cached = lru_cache(maxsize=settings.EXPRESSION_CACHE_SIZE)(_compile)
+
+def compile_expression(text: str) -> CompiledExpression:
+    """The compiled plan for ``text``; raises ``ValueError`` if it is not allowed.
+
+    Plans are kept in a bounded LRU cache keyed by the expression text.
+    """
+    if not isinstance(text, str):
+        raise ValueError("Expression must be a string.")
+    return _compile_cached(text)
+
+def evaluate(text: str, inputs: Sequence[float]) -> float:
+    return compile_expression(text)(inputs)
+
+def cache_info():
+    return _compile_cached.cache_info()
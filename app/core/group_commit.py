@@ -0,0 +1,146 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.metrics import metrics
+
+metrics.describe("group_commit_batches_total", "Transactions committed by the group-commit writer")
+metrics.describe("group_commit_rows_total", "Rows committed by the group-commit writer")
+metrics.describe("group_commit_batch_seconds", "Time spent persisting and committing one batch")
+
+class _Pending:
+    def __init__(self, obj: Any, after_commit: Optional[Callable[[Any], None]]):
+        self.obj = obj
+        self.after_commit = after_commit
+        self.future: Future = Future()
+
+class GroupCommitWriter:
+    """Batch single-row inserts from concurrent requests into one commit.
+
+    Requests hand their new ORM object to ``submit``. A background thread
+    collects whatever arrives within ``window_seconds`` (up to
+    ``max_batch`` rows), runs ``persist(session, obj)`` for each and commits
+    them together, so N concurrent creates pay for one commit and one fsync.
+
+    With ``wait_for_commit`` (the default) ``submit`` returns only after the
+    row is durable. Without it ``submit`` returns as soon as the row is
+    queued: lower latency, but a crash can lose rows already acknowledged.
+
+    If a batch fails, its rows are retried one transaction each so a single
+    bad row only fails its own request. ``persist`` therefore runs again on
+    the same object after a rollback and must not rely on state its earlier
+    attempt set.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        persist: Callable[[Session, Any], None],
+        window_seconds: float = 0.005,
+        max_batch: int = 256,
+        wait_for_commit: bool = True,
+        commit_timeout: float = 30.0
+    ):
+        self.session_factory = session_factory
+        self.persist = persist
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.wait_for_commit = wait_for_commit
+        self.commit_timeout = commit_timeout
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, obj: Any, after_commit: Optional[Callable[[Any], None]] = None) -> Any:
+        """Queue ``obj`` for the next batch; ``after_commit`` runs once it is durable."""
+        self._ensure_started()
+        pending = _Pending(obj, after_commit)
+        self._queue.put(pending)
+        if self.wait_for_commit:
+            return pending.future.result(timeout=self.commit_timeout)
+        return obj
+
+    def close(self) -> None:
+        """Flush everything queued so far and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            stopping = False
+            deadline = time.monotonic() + self.window_seconds
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stopping:
+                return
+
+    def _flush(self, batch: List[_Pending]) -> None:
+        started = time.perf_counter()
+        try:
+            self._commit(batch)
+        except Exception:
+            # Isolate the failure: each row gets its own transaction.
+            for pending in batch:
+                try:
+                    self._commit([pending])
+                except Exception as e:
+                    pending.future.set_exception(e)
+                else:
+                    self._complete(pending)
+        else:
+            for pending in batch:
+                self._complete(pending)
+        metrics.observe("group_commit_batch_seconds", time.perf_counter() - started)
+
+    def _commit(self, batch: List[_Pending]) -> None:
+        db = self.session_factory()
+        try:
+            for pending in batch:
+                self.persist(db, pending.obj)
+            db.commit()
+            for pending in batch:
+                db.expunge(pending.obj)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        metrics.inc("group_commit_batches_total")
+        metrics.inc("group_commit_rows_total", len(batch))
+
+    def _complete(self, pending: _Pending) -> None:
+        if pending.after_commit is not None:
+            try:
+                pending.after_commit(pending.obj)
+            except Exception:
+                pass  # Notifications must not fail a committed write.
+        if not pending.future.done():
+            pending.future.set_result(pending.obj)
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+try:
+    import aioredis
+    REDIS_AVAILABLE = True
+except (ImportError, TypeError):
+    # aioredis has compatibility issues with Python 3.12; keys are then only
+    # honoured within the worker that saw them first.
+    REDIS_AVAILABLE = False
+
+from app.core import redis_loop
+from app.core.config import get_settings
+from app.core.metrics import metrics
+
+settings = get_settings()
+
+metrics.describe("idempotency_replays_total", "Requests answered from a stored idempotent response")
+
+MAX_KEY_LENGTH = 255
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a request with a different fingerprint."""
+
+class IdempotencyInProgress(Exception):
+    """Another worker is still processing the first request for this key."""
+
+class _RedisUnavailable(Exception):
+    pass
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    body: bytes
+
+def fingerprint(method: str, path: str, payload: str) -> str:
+    """Identify a request by what it asks for, not how it was formatted."""
+    return hashlib.sha256(f"{method} {path}\n{payload}".encode()).hexdigest()
+
+class _Record:
+    def __init__(self, request_fingerprint: str):
+        self.fingerprint = request_fingerprint
+        self.done = threading.Event()
+        self.response: Optional[StoredResponse] = None
+        self.expires = float("inf")
+
+class IdempotencyStore:
+    """Remember responses to requests sent with an ``Idempotency-Key``.
+
+    The first request for a (user, key) runs; its response is kept for
+    ``ttl_seconds``. Repeats with the same fingerprint get the stored
+    response without running again, and a duplicate that arrives while the
+    first is still running waits for it. If the first request fails with an
+    unexpected error nothing is stored and a waiting duplicate takes over.
+
+    Local records are kept in completion order, which is also expiry
+    order, so each new key first drops the expired ones from the front;
+    past ``max_entries`` the oldest completed ones go early.
+
+    With ``redis_url`` set the records live in Redis so every worker sees
+    them; duplicates on another worker poll until the first completes.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 86400.0,
+        wait_seconds: float = 30.0,
+        redis_url: Optional[str] = None,
+        max_entries: int = 100_000
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.redis_url = redis_url
+        self.max_entries = max_entries
+        self._records: "OrderedDict[Tuple[uuid.UUID, str], _Record]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+
+    def run(
+        self,
+        user_id: uuid.UUID,
+        key: str,
+        request_fingerprint: str,
+        handler: Callable[[], StoredResponse]
+    ) -> Tuple[StoredResponse, bool]:
+        """Return ``(response, replayed)`` for this keyed request."""
+        if self._use_redis():
+            try:
+                return self._run_redis(user_id, key, request_fingerprint, handler)
+            except (IdempotencyConflict, IdempotencyInProgress):
+                raise
+            except _RedisUnavailable:
+                pass
+        return self._run_local(user_id, key, request_fingerprint, handler)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+    def _run_local(self, user_id, key, request_fingerprint, handler):
+        record_key = (user_id, key)
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                record = self._records.get(record_key)
+                if record is not None and record.expires <= now:
+                    del self._records[record_key]
+                    record = None
+                leader = record is None
+                if leader:
+                    self._evict(now)
+                    record = self._records[record_key] = _Record(request_fingerprint)
+
+            if leader:
+                try:
+                    response = handler()
+                except BaseException:
+                    with self._lock:
+                        self._records.pop(record_key, None)
+                    record.done.set()
+                    raise
+                with self._lock:
+                    record.response = response
+                    record.expires = time.monotonic() + self.ttl_seconds
+                    if self._records.get(record_key) is record:
+                        self._records.move_to_end(record_key)
+                record.done.set()
+                return response, False
+
+            if record.fingerprint != request_fingerprint:
+                raise IdempotencyConflict()
+            if not record.done.wait(self.wait_seconds):
+                raise IdempotencyInProgress()
+            if record.response is not None:
+                metrics.inc("idempotency_replays_total")
+                return record.response, True
+            # The first request failed without a response; try again as leader.
+
+    def _evict(self, now: float) -> None:
+        """Drop expired records, then completed ones over the bound; caller holds the lock."""
+        while self._records:
+            record_key, record = next(iter(self._records.items()))
+            if not record.done.is_set():
+                break  # Still running; completed records queue up behind it.
+            if record.expires > now and len(self._records) < self.max_entries:
+                break
+            del self._records[record_key]
+
+    # -- redis -----------------------------------------------------------
+
+    def _use_redis(self) -> bool:
+        return REDIS_AVAILABLE and bool(self.redis_url)
+
+    def _call(self, func, *args):
+        try:
+            return redis_loop.run(func, *args, timeout=settings.REDIS_TIMEOUT_SECONDS)
+        except Exception as e:
+            raise _RedisUnavailable() from e
+
+    async def _client(self):
+        if self._redis is None:
+            self._redis = await aioredis.from_url(self.redis_url)
+        return self._redis
+
+    async def _claim(self, redis_key: str, request_fingerprint: str) -> bool:
+        redis = await self._client()
+        pending = json.dumps({"fingerprint": request_fingerprint})
+        return bool(await redis.set(redis_key, pending, nx=True, ex=int(self.ttl_seconds)))
+
+    async def _read(self, redis_key: str) -> Optional[dict]:
+        redis = await self._client()
+        value = await redis.get(redis_key)
+        return json.loads(value) if value else None
+
+    async def _complete(self, redis_key: str, request_fingerprint: str, response: StoredResponse) -> None:
+        redis = await self._client()
+        await redis.set(redis_key, json.dumps({
+            "fingerprint": request_fingerprint,
+            "status_code": response.status_code,
+            "body": response.body.decode(),
+        }), ex=int(self.ttl_seconds))
+
+    async def _release(self, redis_key: str) -> None:
+        redis = await self._client()
+        await redis.delete(redis_key)
+
+    def _run_redis(self, user_id, key, request_fingerprint, handler):
+        redis_key = f"idem:{user_id}:{key}"
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            if self._call(self._claim, redis_key, request_fingerprint):
+                try:
+                    response = handler()
+                except BaseException:
+                    try:
+                        self._call(self._release, redis_key)
+                    except _RedisUnavailable:
+                        pass  # The pending marker expires with the TTL.
+                    raise
+                try:
+                    self._call(self._complete, redis_key, request_fingerprint, response)
+                except _RedisUnavailable:
+                    pass  # The work is done; never fall back and redo it.
+                return response, False
+
+            record = self._call(self._read, redis_key)
+            if record is None:
+                continue  # Released or expired between the claim and the read.
+            if record["fingerprint"] != request_fingerprint:
+                raise IdempotencyConflict()
+            if "status_code" in record:
+                metrics.inc("idempotency_replays_total")
+                return StoredResponse(record["status_code"], record["body"].encode()), True
+            if time.monotonic() >= deadline:
+                raise IdempotencyInProgress()
+            time.sleep(0.05)
+
+idempotency_store = IdempotencyStore(
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    wait_seconds=settings.IDEMPOTENCY_WAIT_SECONDS,
+    max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+    redis_url=settings.REDIS_URL if settings.IDEMPOTENCY_REDIS else None
+)
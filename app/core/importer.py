@@ -0,0 +1,183 @@
+"""Streaming import of calculations from CSV or NDJSON.
+
+Input is read one line at a time and never held whole: one record per
+line, numbered from 1 as in the file. NDJSON lines are
+``CalculationBase`` objects (``{"type": ..., "inputs": [...]}``, plus
+``expression`` for that type). CSV needs a header naming ``type`` and
+``inputs`` columns, and may add ``expression``; ``inputs`` is a JSON
+array or numbers separated by ``;`` or spaces.
+
+Records are handled in batches: validated with the ``CalculationBase``
+rules, evaluated per (type, expression) with ``evaluate_rows`` and
+inserted with ``persist_new_calculations``. A bad record, including a
+line longer than ``MAX_LINE_BYTES``, only fails itself; its line number
+and the reason are reported. Each batch is
+committed by the caller, so an interrupted import is resumed by
+skipping the lines up to the last committed batch's ``line``.
+"""
+import csv
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+from uuid import UUID
+
+from pydantic import ValidationError
+
+from app.core.bulk import persist_new_calculations
+from app.core.cost import cost_guard
+from app.core.vectorized import evaluate_rows
+from app.schemas.calculation import CalculationBase, CalculationReference
+
+FORMATS = ("csv", "ndjson")
+
+# Longest line accepted; a bigger one is almost certainly not a record.
+MAX_LINE_BYTES = 1 << 20
+
+# A parsed record, or why its line could not be parsed
+Record = Union[dict, str]
+
+class LineBuffer:
+    """Split a byte stream into numbered text lines as chunks arrive.
+
+    A line longer than ``MAX_LINE_BYTES`` comes out as ``None``. Its bytes
+    are dropped as they arrive, so one never fills memory.
+    """
+
+    def __init__(self):
+        self._pending = b""
+        self._number = 0
+        self._overlong = False  # the unfinished line is already too long
+
+    def feed(self, chunk: bytes) -> List[Tuple[int, Optional[str]]]:
+        data = self._pending + chunk
+        *lines, self._pending = data.split(b"\n")
+        numbered = self._number_lines(lines)
+        if len(self._pending) > MAX_LINE_BYTES:
+            self._pending, self._overlong = b"", True
+        return numbered
+
+    def close(self) -> List[Tuple[int, Optional[str]]]:
+        lines = [self._pending] if self._pending or self._overlong else []
+        self._pending = b""
+        return self._number_lines(lines)
+
+    def _number_lines(self, lines: List[bytes]) -> List[Tuple[int, Optional[str]]]:
+        numbered = []
+        for line in lines:
+            self._number += 1
+            if self._overlong or len(line) > MAX_LINE_BYTES:
+                self._overlong = False
+                numbered.append((self._number, None))
+            else:
+                numbered.append((self._number, line.decode("utf-8", errors="replace").rstrip("\r")))
+        return numbered
+
+def _parse_inputs(text: str) -> List[float]:
+    text = text.strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [float(value) for value in text.replace(";", " ").split()]
+
+class RecordParser:
+    """Turn lines into records; ``None`` for blank, header and skipped lines.
+
+    Lines up to ``start_line`` are skipped (the CSV header is still read),
+    which is how an interrupted import resumes.
+    """
+
+    def __init__(self, format: str, start_line: int = 0):
+        if format not in FORMATS:
+            raise ValueError(f"Format must be one of: {', '.join(FORMATS)}")
+        self.format = format
+        self.start_line = start_line
+        self._columns: Optional[List[str]] = None
+
+    def parse(self, number: int, line: Optional[str]) -> Optional[Record]:
+        """``line`` is ``None`` (or over ``MAX_LINE_BYTES``) for a line too long to read."""
+        if line is None or len(line) > MAX_LINE_BYTES:
+            if self.format == "csv" and self._columns is None:
+                raise ValueError(f"CSV header is longer than {MAX_LINE_BYTES} bytes.")
+            return None if number <= self.start_line else f"Line is longer than {MAX_LINE_BYTES} bytes."
+        if not line.strip():
+            return None
+        if self.format == "csv" and self._columns is None:
+            self._columns = [column.strip().lower() for column in next(csv.reader([line]))]
+            missing = {"type", "inputs"} - set(self._columns)
+            if missing:
+                raise ValueError(f"CSV header is missing: {', '.join(sorted(missing))}")
+            return None
+        if number <= self.start_line:
+            return None
+        try:
+            if self.format == "ndjson":
+                record = json.loads(line)
+                return record if isinstance(record, dict) else "Each line must be a JSON object."
+            values = next(csv.reader([line]))
+            if len(values) != len(self._columns):
+                return f"Expected {len(self._columns)} fields, got {len(values)}."
+            row = dict(zip(self._columns, values))
+            return {
+                "type": row["type"].strip(),
+                "inputs": _parse_inputs(row["inputs"]),
+                "expression": row.get("expression") or None,
+            }
+        except ValueError as e:  # json.JSONDecodeError is a ValueError
+            return f"Cannot parse line: {e}"
+
+def _validation_message(error: ValidationError) -> str:
+    messages = []
+    for detail in error.errors():
+        location = ".".join(str(part) for part in detail["loc"])
+        messages.append(f"{location}: {detail['msg']}" if location else detail["msg"])
+    return "; ".join(messages)
+
+@dataclass
+class ImportBatch:
+    """Outcome of one committed batch."""
+    line: int  # last line the batch covered
+    imported: int = 0
+    errors: Dict[int, str] = field(default_factory=dict)
+    change_seq: int = 0
+
+def import_batch(db, user_id: UUID, records: List[Tuple[int, Record]]) -> ImportBatch:
+    """Validate, evaluate and insert one batch of ``(line, record)``; the caller commits."""
+    batch = ImportBatch(line=records[-1][0])
+    groups = defaultdict(list)
+    for number, record in records:
+        if isinstance(record, str):
+            batch.errors[number] = record
+            continue
+        try:
+            calculation = CalculationBase.model_validate(record)
+        except ValidationError as e:
+            batch.errors[number] = _validation_message(e)
+            continue
+        if any(isinstance(value, CalculationReference) for value in calculation.inputs):
+            batch.errors[number] = "Imports take numeric inputs only."
+            continue
+        try:
+            cost_guard.check_work(calculation.type.value, calculation.inputs)
+        except ValueError as e:
+            batch.errors[number] = str(e)
+            continue
+        groups[(calculation.type.value, calculation.expression)].append((number, calculation.inputs))
+
+    for (calculation_type, expression), entries in groups.items():
+        evaluated = evaluate_rows(calculation_type, [inputs for _, inputs in entries], expression)
+        succeeded = []
+        for index, (number, inputs) in enumerate(entries):
+            if index in evaluated.errors:
+                batch.errors[number] = evaluated.errors[index]
+            else:
+                succeeded.append((inputs, evaluated.results[index]))
+        if succeeded:
+            _, batch.change_seq = persist_new_calculations(
+                db, user_id, calculation_type,
+                [inputs for inputs, _ in succeeded],
+                [result for _, result in succeeded],
+                expression
+            )
+            batch.imported += len(succeeded)
+    batch.errors = dict(sorted(batch.errors.items()))
+    return batch
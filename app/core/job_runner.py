@@ -0,0 +1,251 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Set
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.core.metrics import metrics
+from app.models.calculation_job import CalculationJob
+
+metrics.describe("calculation_jobs_succeeded_total", "Background calculation jobs that succeeded")
+metrics.describe("calculation_jobs_failed_total", "Background calculation jobs that failed")
+metrics.describe("calculation_jobs_cancelled_total", "Background calculation jobs cancelled before finishing")
+metrics.describe("calculation_job_seconds", "Run time of background calculation jobs")
+metrics.describe("calculation_jobs_abandoned_total", "Running jobs failed because their process stopped heartbeating")
+
+class JobRunner:
+    """Run ``CalculationJob`` rows on local, per-class thread pools.
+
+    Each job class gets its own pool of ``concurrency[job_class]`` threads,
+    so a backlog of heavy jobs cannot hold up light ones. The job row is
+    the only shared state: a worker claims a job by moving it from
+    ``queued`` to ``running`` with a conditional UPDATE, and commits the
+    job's outcome in the same transaction as ``execute``'s writes. A job
+    cancelled while running therefore leaves nothing behind.
+
+    ``execute(session, job)`` does the work and returns the object passed
+    to ``after_commit`` once the outcome is durable.
+
+    Claimed jobs record this runner's ``owner_id``; while any are running
+    a background thread refreshes their ``heartbeat_at`` every
+    ``heartbeat_seconds``. Several processes can share the table: each
+    only gives up on running jobs that are its own or whose heartbeat is
+    older than ``stale_after_seconds``.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        execute: Callable[[Session, CalculationJob], Any],
+        concurrency: Dict[str, int],
+        after_commit: Optional[Callable[[Any], None]] = None,
+        heartbeat_seconds: float = 10.0,
+        stale_after_seconds: float = 60.0,
+        owner_id: Optional[str] = None
+    ):
+        self.session_factory = session_factory
+        self.execute = execute
+        self.concurrency = concurrency
+        self.after_commit = after_commit
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_after_seconds = stale_after_seconds
+        self.owner_id = owner_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._pending: Set[Future] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def submit(self, job_id: uuid.UUID, job_class: str) -> None:
+        """Schedule a committed ``queued`` job on its class's pool."""
+        self._ensure_heartbeat()
+        future = self._pool(job_class).submit(self._run, job_id)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._forget)
+
+    def cancel(self, db: Session, job: CalculationJob) -> bool:
+        """Cancel ``job`` unless it already finished; commits on success."""
+        cancelled = db.execute(
+            update(CalculationJob)
+            .where(
+                CalculationJob.id == job.id,
+                CalculationJob.status.in_((CalculationJob.QUEUED, CalculationJob.RUNNING))
+            )
+            .values(status=CalculationJob.CANCELLED, finished_at=datetime.utcnow())
+        ).rowcount
+        db.commit()
+        db.refresh(job)
+        if cancelled:
+            metrics.inc("calculation_jobs_cancelled_total")
+        return bool(cancelled)
+
+    def recover(self, now: Optional[datetime] = None) -> int:
+        """Re-schedule queued jobs and fail the ones a restart interrupted.
+
+        Meant for process start-up. A running job counts as interrupted when
+        it is this runner's own or its heartbeat is stale; jobs heartbeating
+        from other live processes are left alone. Returns the number of jobs
+        re-scheduled.
+        """
+        now = now or datetime.utcnow()
+        stale = now - timedelta(seconds=self.stale_after_seconds)
+        db = self.session_factory()
+        try:
+            abandoned = db.execute(
+                update(CalculationJob)
+                .where(
+                    CalculationJob.status == CalculationJob.RUNNING,
+                    or_(
+                        CalculationJob.owner == self.owner_id,
+                        CalculationJob.heartbeat_at.is_(None),
+                        CalculationJob.heartbeat_at < stale
+                    )
+                )
+                .values(
+                    status=CalculationJob.FAILED,
+                    error="Interrupted by a server restart.",
+                    finished_at=now
+                )
+            ).rowcount
+            db.commit()
+            metrics.inc("calculation_jobs_abandoned_total", abandoned)
+            queued = db.query(CalculationJob.id, CalculationJob.job_class).filter(
+                CalculationJob.status == CalculationJob.QUEUED
+            ).order_by(CalculationJob.created_at).all()
+        finally:
+            db.close()
+        for job_id, job_class in queued:
+            self.submit(job_id, job_class)
+        return len(queued)
+
+    def drain(self, timeout: Optional[float] = None) -> None:
+        """Wait for every job scheduled so far to finish."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                return
+            for future in pending:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                future.exception(timeout=remaining)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+            heartbeat, self._heartbeat = self._heartbeat, None
+        for pool in pools:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+        if heartbeat is not None:
+            self._stop.set()
+            heartbeat.join()
+
+    def beat(self, now: Optional[datetime] = None) -> int:
+        """Refresh the heartbeat of this runner's running jobs; returns how many."""
+        db = self.session_factory()
+        try:
+            touched = db.execute(
+                update(CalculationJob)
+                .where(CalculationJob.owner == self.owner_id, CalculationJob.status == CalculationJob.RUNNING)
+                .values(heartbeat_at=now or datetime.utcnow())
+            ).rowcount
+            db.commit()
+            return touched
+        finally:
+            db.close()
+
+    def _ensure_heartbeat(self) -> None:
+        with self._lock:
+            if self._heartbeat is None:
+                self._stop.clear()
+                self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="jobs-heartbeat", daemon=True)
+                self._heartbeat.start()
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(self.heartbeat_seconds):
+            with self._lock:
+                idle = not self._pending
+            if idle:
+                continue
+            try:
+                self.beat()
+            except Exception:
+                pass  # A missed beat is retried next interval.
+
+    def _pool(self, job_class: str) -> ThreadPoolExecutor:
+        with self._lock:
+            pool = self._pools.get(job_class)
+            if pool is None:
+                pool = self._pools[job_class] = ThreadPoolExecutor(
+                    max_workers=max(1, self.concurrency.get(job_class, 1)),
+                    thread_name_prefix=f"jobs-{job_class}"
+                )
+            return pool
+
+    def _forget(self, future: Future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+
+    def _transition(self, db: Session, job_id: uuid.UUID, from_status: str, **values) -> bool:
+        return bool(db.execute(
+            update(CalculationJob)
+            .where(CalculationJob.id == job_id, CalculationJob.status == from_status)
+            .values(**values)
+        ).rowcount)
+
+    def _run(self, job_id: uuid.UUID) -> None:
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            claimed = self._transition(
+                db, job_id, CalculationJob.QUEUED,
+                status=CalculationJob.RUNNING, started_at=now,
+                owner=self.owner_id, heartbeat_at=now
+            )
+            db.commit()
+            if not claimed:
+                return  # Cancelled, or another worker got there first.
+
+            started = time.perf_counter()
+            job = db.get(CalculationJob, job_id)
+            try:
+                outcome = self.execute(db, job)
+            except Exception as e:
+                db.rollback()
+                error = str(e) if isinstance(e, ValueError) else "Internal error while running the job."
+                if self._transition(
+                    db, job_id, CalculationJob.RUNNING,
+                    status=CalculationJob.FAILED, error=error, finished_at=datetime.utcnow()
+                ):
+                    metrics.inc("calculation_jobs_failed_total")
+                db.commit()
+                return
+
+            finished = self._transition(
+                db, job_id, CalculationJob.RUNNING,
+                status=CalculationJob.SUCCEEDED,
+                result=getattr(outcome, "result", None),
+                calculation_id=getattr(outcome, "id", None),
+                finished_at=datetime.utcnow()
+            )
+            if not finished:
+                db.rollback()  # Cancelled while running: discard the work.
+                return
+            db.commit()
+            metrics.inc("calculation_jobs_succeeded_total")
+            metrics.observe("calculation_job_seconds", time.perf_counter() - started)
+        finally:
+            db.close()
+
+        if self.after_commit is not None:
+            try:
+                self.after_commit(outcome)
+            except Exception:
+                pass  # Notifications must not fail a committed job.
@@ -0,0 +1,68 @@
+import threading
+from typing import Dict, Tuple
+
+class MetricsRegistry:
+    """Minimal process-local metrics, rendered in Prometheus text format.
+
+    Counters only go up; summaries track a running count and sum, which is
+    enough for rates and averages without a client library.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._summaries: Dict[str, Tuple[int, float]] = {}
+        self._gauges: Dict[str, float] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1.0) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0.0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            count, total = self._summaries.get(name, (0, 0.0))
+            self._summaries[name] = (count + 1, total + value)
+
+    def set(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0.0)
+
+    def summary(self, name: str) -> Tuple[int, float]:
+        with self._lock:
+            return self._summaries.get(name, (0, 0.0))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+            self._gauges.clear()
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, value in sorted(self._counters.items()):
+                lines.extend(self._header(name, "counter"))
+                lines.append(f"{name} {value}")
+            for name, value in sorted(self._gauges.items()):
+                lines.extend(self._header(name, "gauge"))
+                lines.append(f"{name} {value}")
+            for name, (count, total) in sorted(self._summaries.items()):
+                lines.extend(self._header(name, "summary"))
+                lines.append(f"{name}_count {count}")
+                lines.append(f"{name}_sum {total}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, name: str, kind: str):
+        if name in self._help:
+            yield f"# HELP {name} {self._help[name]}"
+        yield f"# TYPE {name} {kind}"
+
+metrics = MetricsRegistry()
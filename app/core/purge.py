@@ -0,0 +1,150 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import case, select
+from sqlalchemy.orm import Session
+
+from app.core.metrics import metrics
+from app.models.calculation import Calculation
+from app.models.calculation_payload import CalculationPayload
+from app.models.calculation_tombstone import CalculationTombstone
+from app.models.calculation_version import CalculationVersion
+
+metrics.describe("calculations_purged_total", "Soft-deleted calculations hard-deleted by the purge")
+metrics.describe("calculation_tombstones_pruned_total", "Delta-sync tombstones deleted by the purge")
+metrics.describe("calculation_purge_batches_total", "Purge transactions committed")
+metrics.describe("calculation_purge_batch_seconds", "Time spent deleting and committing one purge batch")
+metrics.describe("calculation_purge_errors_total", "Purge runs that failed")
+
+def purge_batch(db, before: datetime, limit: int) -> int:
+    """Hard-delete up to ``limit`` calculations soft-deleted before ``before``.
+
+    Oldest first, with one ``DELETE ... RETURNING``; their payload
+    references are released in bulk. The caller commits. Returns the
+    number of rows deleted.
+    """
+    table = Calculation.__table__
+    batch = (
+        select(table.c.id)
+        .where(table.c.deleted_at.is_not(None), table.c.deleted_at < before)
+        .order_by(table.c.deleted_at)
+        .limit(limit)
+    )
+    digests = db.execute(
+        table.delete().where(table.c.id.in_(batch)).returning(table.c.payload_digest)
+    ).scalars().all()
+    CalculationPayload.release_many(db, digests)
+    return len(digests)
+
+def prune_tombstones_batch(db, before: datetime, limit: int) -> int:
+    """Delete up to ``limit`` tombstones written before ``before``.
+
+    Each affected user's ``CalculationVersion.pruned_seq`` is raised to the
+    highest change sequence removed, so ``/calculations/changes`` can send
+    clients holding an older token a full snapshot instead of a delta
+    missing those deletes. The caller commits. Returns the number deleted.
+    """
+    table = CalculationTombstone.__table__
+    batch = (
+        select(table.c.calculation_id)
+        .where(table.c.deleted_at < before)
+        .order_by(table.c.deleted_at)
+        .limit(limit)
+    )
+    pruned = db.execute(
+        table.delete().where(table.c.calculation_id.in_(batch)).returning(table.c.user_id, table.c.change_seq)
+    ).all()
+    highest = {}
+    for user_id, change_seq in pruned:
+        highest[user_id] = max(change_seq, highest.get(user_id, 0))
+    versions = CalculationVersion.__table__
+    for user_id, change_seq in highest.items():
+        db.execute(
+            versions.update()
+            .where(versions.c.user_id == user_id)
+            .values(pruned_seq=case((versions.c.pruned_seq < change_seq, change_seq), else_=versions.c.pruned_seq))
+        )
+    return len(pruned)
+
+class PurgeTask:
+    """Hard-delete soft-deleted calculations on a schedule, in bounded batches.
+
+    Every ``interval_seconds`` a background thread deletes rows whose
+    ``deleted_at`` is older than ``retention``, ``batch_size`` at a time
+    with a commit per batch, stopping after ``max_batches`` so one run
+    cannot hold the database for long. Small transactions keep the index
+    and vacuum work of a delete burst spread out instead of landing with
+    the requests that caused it.
+
+    With ``tombstone_retention`` set, each batch also prunes up to
+    ``batch_size`` delta-sync tombstones older than that.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        retention: timedelta,
+        interval_seconds: float = 300.0,
+        batch_size: int = 1000,
+        max_batches: int = 100,
+        tombstone_retention: Optional[timedelta] = None
+    ):
+        self.session_factory = session_factory
+        self.retention = retention
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.tombstone_retention = tombstone_retention
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="calculation-purge", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        """One purge run; returns the number of calculations deleted."""
+        now = now or datetime.utcnow()
+        before = now - self.retention
+        tombstones_before = None if self.tombstone_retention is None else now - self.tombstone_retention
+        purged = 0
+        db = self.session_factory()
+        try:
+            for _ in range(self.max_batches):
+                started = time.perf_counter()
+                deleted = purge_batch(db, before, self.batch_size)
+                pruned = 0
+                if tombstones_before is not None:
+                    pruned = prune_tombstones_batch(db, tombstones_before, self.batch_size)
+                db.commit()
+                metrics.observe("calculation_purge_batch_seconds", time.perf_counter() - started)
+                metrics.inc("calculation_purge_batches_total")
+                metrics.inc("calculations_purged_total", deleted)
+                metrics.inc("calculation_tombstones_pruned_total", pruned)
+                purged += deleted
+                if max(deleted, pruned) < self.batch_size or self._stop.is_set():
+                    break
+            return purged
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception:
+                # Rows left behind are picked up by the next run.
+                metrics.inc("calculation_purge_errors_total")
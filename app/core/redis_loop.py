@@ -0,0 +1,36 @@
+"""Run async Redis calls from synchronous code on any thread.
+
+``anyio.from_thread.run`` only works on AnyIO's own worker threads, but
+the caches are also used from the group-commit writer and the job-runner
+pools. Coroutines submitted here run on one private event loop in a
+daemon thread, so any thread can wait on them and the clients they
+create stay bound to a single loop.
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+def _running_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="redis-loop", daemon=True).start()
+        return _loop
+
+def run(func: Callable[..., Awaitable[Any]], *args, timeout: float = 1.0) -> Any:
+    """Run ``func(*args)`` on the Redis loop and wait for its result.
+
+    Raises whatever the coroutine raised, or ``TimeoutError`` after
+    ``timeout`` seconds (the coroutine is then cancelled).
+    """
+    future = asyncio.run_coroutine_threadsafe(func(*args), _running_loop())
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise TimeoutError(f"Redis call did not finish within {timeout}s")
@@ -0,0 +1,99 @@
+"""Chunked reductions for the list-folding calculation types.
+
+Addition and multiplication are associative, so an input can be split
+into chunks, each chunk reduced on its own (possibly in another process)
+and the partial results combined. Subtraction and division are rewritten
+as prefix transforms onto those two::
+
+    x0 - x1 - ... - xn  ==  x0 - sum(x1..xn)
+    x0 / x1 / ... / xn  ==  x0 / prod(x1..xn)
+
+Sums use ``math.fsum`` (exactly rounded) per chunk and across partials,
+so the error is at most one rounding per chunk whatever the input's
+ordering or conditioning, tighter than Kahan summation. Products are carried as ``(mantissa, exponent)`` pairs,
+so intermediate products cannot overflow or underflow even where the
+final result is representable. Modulus has no associative form and is
+not handled here.
+"""
+import math
+from typing import List, Optional, Sequence, Tuple, Union
+
+SUM = "sum"
+PRODUCT = "product"
+
+# Calculation type -> (reduction, whether the first input is a prefix head)
+_REDUCTIONS = {
+    "addition": (SUM, False),
+    "subtraction": (SUM, True),
+    "multiplication": (PRODUCT, False),
+    "division": (PRODUCT, True),
+}
+REDUCIBLE = frozenset(_REDUCTIONS)
+
+# A float for SUM, a (mantissa, exponent) pair for PRODUCT
+Partial = Union[float, Tuple[float, int]]
+
+def chunk_bounds(length: int, chunks: int) -> List[Tuple[int, int]]:
+    """Split ``range(length)`` into at most ``chunks`` contiguous slices."""
+    chunks = max(1, min(chunks, length))
+    size, extra = divmod(length, chunks)
+    bounds, start = [], 0
+    for index in range(chunks):
+        stop = start + size + (1 if index < extra else 0)
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+def split(calculation_type: str, inputs: Sequence[float]) -> Tuple[str, Optional[float], Sequence[float]]:
+    """``(op, head, body)``: reduce ``body`` with ``op``, then ``finish`` with ``head``."""
+    try:
+        op, has_head = _REDUCTIONS[calculation_type.lower()]
+    except KeyError:
+        raise ValueError(f"{calculation_type} cannot be reduced in chunks")
+    if has_head:
+        return op, inputs[0], inputs[1:]
+    return op, None, inputs
+
+def _renormalised_product(pairs) -> Tuple[float, int]:
+    mantissa, exponent = 1.0, 0
+    for value_mantissa, value_exponent in pairs:
+        mantissa, shift = math.frexp(mantissa * value_mantissa)
+        exponent += value_exponent + shift
+    return mantissa, exponent
+
+def reduce_chunk(op: str, values: Sequence[float]) -> Partial:
+    if op == SUM:
+        return math.fsum(values)
+    if 0 in values:
+        return 0.0, 0
+    try:
+        product = float(math.prod(values))
+    except OverflowError:  # An exact integer product beyond the float range
+        product = math.inf
+    if math.isfinite(product) and product:
+        return math.frexp(product)
+    # The running product left the float range; redo it scaled.
+    return _renormalised_product(map(math.frexp, map(float, values)))
+
+def finish(calculation_type: str, head: Optional[float], partials: List[Partial]) -> float:
+    op, _ = _REDUCTIONS[calculation_type.lower()]
+    if op == SUM:
+        total = math.fsum(partials)
+        return total if head is None else head - total
+
+    mantissa, exponent = _renormalised_product(partials)
+    if head is not None:
+        if mantissa == 0:
+            raise ValueError("Cannot divide by zero.")
+        head_mantissa, head_exponent = math.frexp(head)
+        mantissa, exponent = head_mantissa / mantissa, head_exponent - exponent
+    try:
+        return math.ldexp(mantissa, exponent)
+    except OverflowError:
+        raise ValueError("Result is too large to represent.")
+
+def evaluate(calculation_type: str, inputs: Sequence[float], chunks: int = 1) -> float:
+    """Reduce ``inputs`` in this thread, ``chunks`` slices at a time."""
+    op, head, body = split(calculation_type, inputs)
+    partials = [reduce_chunk(op, body[start:stop]) for start, stop in chunk_bounds(len(body), chunks)]
+    return finish(calculation_type, head, partials)
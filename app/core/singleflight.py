@@ -0,0 +1,69 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from app.core.config import get_settings
+from app.core.metrics import metrics
+
+settings = get_settings()
+
+metrics.describe("singleflight_leaders_total", "Reads that ran their own query")
+metrics.describe("singleflight_coalesced_total", "Reads that shared an in-flight query")
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+
+class Singleflight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key runs ``fn``; callers arriving while it is in
+    flight block until it finishes and receive the same result (or the same
+    exception). Nothing is remembered afterwards, so this never serves
+    anything older than the request that is already running. Works across
+    the threadpool threads of one worker.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return fn()
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+
+        if not leader:
+            metrics.inc("singleflight_coalesced_total")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        metrics.inc("singleflight_leaders_total")
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+read_flights = Singleflight(enabled=settings.SINGLEFLIGHT_ENABLED)
@@ -0,0 +1,256 @@
+"""Single-pass statistics for the statistical calculation types.
+
+Each value is looked at once. ``Moments`` keeps a count, mean and sum of
+squared deviations (Welford's update, with Chan et al.'s pairwise merge
+for whole chunks), so mean, variance and standard deviation need O(1)
+state however long the input is. Quantiles of a list already in memory
+are exact, by quickselect in expected O(n); quantiles of a stream use a
+``TDigest``, whose size is bounded by its compression, not the input.
+
+Variance and standard deviation are the sample (n - 1) statistics, and
+percentiles interpolate linearly between the two nearest order
+statistics, the same definitions as :mod:`statistics` and numpy's
+defaults.
+"""
+import math
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from operator import mul
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+MOMENTS = frozenset({"mean", "variance", "stddev"})
+QUANTILES = frozenset({"median", "percentile"})
+STATISTICS = MOMENTS | QUANTILES
+
+# Below this many values quickselect just sorts; sorted() runs in C.
+_SORT_BELOW = 64
+
+class Moments:
+    """Running count, mean and sum of squared deviations (``m2``)."""
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count, self.mean, self.m2 = count, mean, m2
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def extend(self, values: Sequence[float]) -> None:
+        """Fold in a chunk: its exact moments, merged in one step."""
+        count = len(values)
+        if not count:
+            return
+        mean = math.fsum(values) / count
+        m2 = math.fsum((value - mean) ** 2 for value in values)
+        self.merge(Moments(count, mean, m2))
+
+    def merge(self, other: "Moments") -> None:
+        count = self.count + other.count
+        if not count:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    def result(self, calculation_type: str) -> float:
+        if calculation_type == "mean":
+            if not self.count:
+                raise ValueError("At least one value is required for the mean.")
+            return self.mean
+        if self.count < 2:
+            raise ValueError(f"At least two values are required for the {calculation_type}.")
+        variance = max(self.m2, 0.0) / (self.count - 1)
+        return math.sqrt(variance) if calculation_type == "stddev" else variance
+
+class TDigest:
+    """Approximate quantiles of a stream in bounded memory (merging t-digest).
+
+    Values are buffered and merged into sorted centroids whose weight is
+    capped by the k1 scale function, so centroids are small (exact) in the
+    tails and larger in the middle. About ``compression / 2`` centroids
+    and a buffer of ``5 * compression`` values are kept. While every centroid
+    still holds a single value, quantiles are exact.
+    """
+
+    def __init__(self, compression: int = 200):
+        self.compression = compression
+        self.count = 0
+        self.min, self.max = math.inf, -math.inf
+        self._means: List[float] = []
+        self._weights: List[int] = []
+        self._buffer: List[float] = []
+        self._buffer_size = 5 * compression
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self._buffer.append(value)
+        if len(self._buffer) >= self._buffer_size:
+            self._compress()
+
+    def extend(self, values: Iterable[float]) -> None:
+        values = list(values)
+        for start in range(0, len(values), self._buffer_size):
+            chunk = values[start:start + self._buffer_size]
+            self.count += len(chunk)
+            self._buffer.extend(chunk)
+            if len(self._buffer) >= self._buffer_size:
+                self._compress()
+
+    def _weight_limit(self, before: int) -> float:
+        """Cumulative weight the next centroid may reach: one unit of k1 scale."""
+        angle = math.asin(2 * before / self.count - 1) + 2 * math.pi / self.compression
+        if angle >= math.pi / 2:
+            return self.count
+        return (1 + math.sin(angle)) / 2 * self.count
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        self.min = min(self.min, min(self._buffer))
+        self.max = max(self.max, max(self._buffer))
+        points = sorted(
+            list(zip(self._means, self._weights)) + [(value, 1) for value in self._buffer]
+        )
+        self._buffer = []
+        point_means = [mean for mean, _ in points]
+        point_weights = [weight for _, weight in points]
+        cumulative = list(accumulate(point_weights))
+
+        # Each centroid takes the longest run of points that fits under the
+        # limit (at least one); only the centroids are visited in Python.
+        means, weights = [], []
+        start, before = 0, 0
+        while start < len(points):
+            stop = max(bisect_right(cumulative, self._weight_limit(before), start), start + 1)
+            weight = cumulative[stop - 1] - before
+            total = math.fsum(map(mul, point_means[start:stop], point_weights[start:stop]))
+            means.append(total / weight)
+            weights.append(weight)
+            start, before = stop, cumulative[stop - 1]
+        self._means, self._weights = means, weights
+
+    def quantile(self, q: float) -> float:
+        """Value at fraction ``q`` (0..1) of the way through the sorted input."""
+        self._compress()
+        if not self.count:
+            raise ValueError("At least one value is required for a quantile.")
+        # Each centroid stands at the middle index of the values it holds;
+        # the exact extremes pin both ends.
+        positions, values = [0.0], [self.min]
+        before = 0
+        for mean, weight in zip(self._means, self._weights):
+            positions.append(before + (weight - 1) / 2)
+            values.append(mean)
+            before += weight
+        positions.append(self.count - 1.0)
+        values.append(self.max)
+
+        target = q * (self.count - 1)
+        right = min(bisect_right(positions, target), len(positions) - 1)
+        left = right - 1
+        span = positions[right] - positions[left]
+        if span <= 0:
+            return values[right]
+        fraction = (target - positions[left]) / span
+        return values[left] + (values[right] - values[left]) * fraction
+
+def _order_statistics(values: Sequence[float], k: int) -> Tuple[float, float]:
+    """The ``k``-th and ``(k + 1)``-th smallest values (0-based), by quickselect."""
+    values = list(values)
+    while len(values) > _SORT_BELOW:
+        pivot = values[random.randrange(len(values))]
+        lows = [value for value in values if value < pivot]
+        if k < len(lows):
+            if k + 1 < len(lows):
+                values = lows
+                continue
+            return max(lows), pivot
+        equal = values.count(pivot)
+        highs = [value for value in values if value > pivot]
+        if k < len(lows) + equal:
+            if k + 1 < len(lows) + equal or not highs:
+                return pivot, pivot
+            return pivot, min(highs)
+        k -= len(lows) + equal
+        values = highs
+    ordered = sorted(values)
+    return ordered[k], ordered[min(k + 1, len(ordered) - 1)]
+
+def _check_percentile(percentile: float) -> float:
+    if not 0 <= percentile <= 100:
+        raise ValueError("Percentile must be between 0 and 100.")
+    return percentile / 100
+
+def quantile(values: Sequence[float], q: float) -> float:
+    """Exact linearly interpolated quantile of an in-memory list."""
+    if not values:
+        raise ValueError("At least one value is required for a quantile.")
+    position = q * (len(values) - 1)
+    index = min(int(position), len(values) - 1)
+    low, high = _order_statistics(values, index)
+    return low + (high - low) * (position - index)
+
+def mean(values: Sequence[float]) -> float:
+    moments = Moments()
+    moments.extend(values)
+    return moments.result("mean")
+
+def variance(values: Sequence[float]) -> float:
+    moments = Moments()
+    moments.extend(values)
+    return moments.result("variance")
+
+def stddev(values: Sequence[float]) -> float:
+    moments = Moments()
+    moments.extend(values)
+    return moments.result("stddev")
+
+def median(values: Sequence[float]) -> float:
+    return quantile(values, 0.5)
+
+def percentile(inputs: Sequence[float]) -> float:
+    """``inputs[0]`` is the percentile (0-100) of the remaining values."""
+    if len(inputs) < 2:
+        raise ValueError("A percentile and at least one value are required.")
+    return quantile(inputs[1:], _check_percentile(inputs[0]))
+
+class StreamingStatistic:
+    """One statistic over values that arrive in chunks, in O(1) memory.
+
+    The moment statistics are exact; the quantiles come from a
+    ``TDigest`` and are exact only for short inputs.
+    """
+
+    def __init__(self, calculation_type: str, percentile: Optional[float] = None):
+        calculation_type = calculation_type.lower()
+        if calculation_type not in STATISTICS:
+            raise ValueError(f"{calculation_type} is not a statistical calculation type.")
+        if (percentile is None) != (calculation_type != "percentile"):
+            raise ValueError("A percentile is required for (and only for) the percentile type.")
+        self.calculation_type = calculation_type
+        self._q = 0.5 if calculation_type == "median" else (
+            _check_percentile(percentile) if percentile is not None else None
+        )
+        self._moments = Moments() if calculation_type in MOMENTS else None
+        self._digest = TDigest() if calculation_type in QUANTILES else None
+
+    @property
+    def count(self) -> int:
+        if self._moments is not None:
+            return self._moments.count
+        return self._digest.count
+
+    def extend(self, values: Sequence[float]) -> None:
+        if self._moments is not None:
+            self._moments.extend(values)
+        else:
+            self._digest.extend(values)
+
+    def result(self) -> float:
+        if self._moments is not None:
+            return self._moments.result(self.calculation_type)
+        return self._digest.quantile(self._q)
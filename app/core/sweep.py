@@ -0,0 +1,53 @@
+"""Lazy expansion of parameter sweeps into input rows.
+
+A sweep gives each input position either a fixed value or an inclusive
+``start..stop`` range with a ``step``. The rows are the cartesian product
+of the positions, first position slowest, and are produced in batches:
+only one batch of the grid exists at a time however many points it has.
+"""
+import math
+from itertools import islice, product
+from typing import Iterator, List, Sequence, Tuple, Union
+
+# Slack for a stop that float steps land a hair short of (0.1 * 3 < 0.3).
+_STOP_TOLERANCE = 1e-9
+
+class Axis(Sequence[float]):
+    """The values ``start, start + step, ...`` up to ``stop`` inclusive."""
+
+    def __init__(self, start: float, stop: float, step: float):
+        self.start, self.step = start, step
+        self._length = int(math.floor((stop - start) / step + _STOP_TOLERANCE)) + 1
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("axis index out of range")
+        # Multiply rather than accumulate, so error does not build up.
+        return self.start + index * self.step
+
+Position = Union[float, Axis]
+
+def axes(positions: Sequence[Position]) -> List[Sequence[float]]:
+    return [position if isinstance(position, Axis) else (position,) for position in positions]
+
+def size(positions: Sequence[Position]) -> int:
+    """Number of rows the sweep expands to."""
+    return math.prod(len(axis) for axis in axes(positions))
+
+def batches(positions: Sequence[Position], batch_size: int) -> Iterator[Tuple[int, List[List[float]]]]:
+    """``(offset, rows)`` for consecutive batches of the expanded grid."""
+    grid = product(*axes(positions))
+    offset = 0
+    while True:
+        rows = [list(point) for point in islice(grid, batch_size)]
+        if not rows:
+            return
+        yield offset, rows
+        offset += len(rows)
@@ -0,0 +1,84 @@
+"""Evaluate one calculation type over many input rows.
+
+Map mode hands a whole matrix to the calculation's ``compute`` function
+in one pass: no ORM object, request or transaction per row. Rows are
+independent, so one bad row (a zero divisor, an overflow) only fails
+itself; it is reported by index and the rest still get their result.
+"""
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from app.models.calculation import Calculation
+
+@dataclass
+class RowResults:
+    """Column of per-row results; ``None`` where ``errors`` has the reason."""
+    results: List[Optional[float]]
+    errors: Dict[int, str] = field(default_factory=dict)
+
+def _evaluate_one(compute, row: List[float]) -> float:
+    try:
+        result = compute(row)
+        finite = math.isfinite(result)
+    except OverflowError:  # e.g. math.fsum's intermediate overflow
+        raise ValueError("Result is too large to represent.")
+    except ArithmeticError as e:
+        raise ValueError(str(e))
+    if not finite:
+        raise ValueError("Result is out of range.")
+    return result
+
+def evaluate_rows(
+    calculation_type: str,
+    rows: Sequence[List[float]],
+    expression: Optional[str] = None
+) -> RowResults:
+    """``compute(row)`` for every row, collecting per-row errors."""
+    compute = Calculation.compute_function(calculation_type, expression)
+    try:
+        # Fast path: a single map() with no per-row exception handling.
+        results = list(map(compute, rows))
+        if all(map(math.isfinite, results)):
+            return RowResults(results)
+    except (ArithmeticError, ValueError):
+        pass
+
+    results, errors = [], {}
+    for index, row in enumerate(rows):
+        try:
+            results.append(_evaluate_one(compute, row))
+        except ValueError as e:
+            results.append(None)
+            errors[index] = str(e)
+    return RowResults(results, errors)
+
+def to_rows(flat: Sequence[float], columns: int) -> List[List[float]]:
+    """Split a row-major sequence into rows of ``columns`` values."""
+    return [list(flat[start:start + columns]) for start in range(0, len(flat), columns)]
+
+def evaluate_flat(
+    columns: int,
+    calculation_type: str,
+    flat: Sequence[float],
+    expression: Optional[str] = None
+) -> RowResults:
+    """``evaluate_rows`` over a row-major matrix; picklable for process pools."""
+    return evaluate_rows(calculation_type, to_rows(flat, columns), expression)
+
+def evaluate_ragged(
+    lengths: Sequence[int],
+    calculation_type: str,
+    flat: Sequence[float],
+    expression: Optional[str] = None
+) -> RowResults:
+    """``evaluate_rows`` over rows of ``lengths`` values packed end to end.
+
+    For rows of differing lengths, such as stored calculations; picklable
+    for process pools like ``evaluate_flat``.
+    """
+    rows, start = [], 0
+    for length in lengths:
+        rows.append(list(flat[start:start + length]))
+        start += length
+    return evaluate_rows(calculation_type, rows, expression)
@@ -0,0 +1,8 @@
+from .broker import EventBroker, Subscription, broker, RESYNC_EVENT
+
+__all__ = [
+    'EventBroker',
+    'Subscription',
+    'broker',
+    'RESYNC_EVENT',
+]
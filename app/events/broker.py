@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Dict, Optional, Set
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Sent in place of the dropped backlog when a subscriber falls behind; the
+# client recovers with a delta sync instead of replaying every event.
+RESYNC_EVENT = {"type": "resync"}
+
+class Subscription:
+    """One connected client's bounded event queue.
+
+    The queue lives on the event loop that created it; publishers on other
+    threads hand events over with ``call_soon_threadsafe``.
+    """
+
+    def __init__(self, user_id: uuid.UUID, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def _offer(self, event: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: discard its backlog rather than growing memory.
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+
+    async def get(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+class EventBroker:
+    """In-process fan-out of per-user calculation events.
+
+    ``publish`` may be called from any thread (the sync endpoints run in the
+    threadpool). An optional ``forwarder`` receives every locally published
+    event so it can be relayed to other workers; relayed events come back in
+    through ``deliver`` and are not forwarded again.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[uuid.UUID, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self.forwarder: Optional[Callable[[uuid.UUID, Dict[str, Any]], None]] = None
+
+    def subscribe(self, user_id: uuid.UUID) -> Subscription:
+        subscription = Subscription(user_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def subscriber_count(self, user_id: Optional[uuid.UUID] = None) -> int:
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscribers.get(user_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def deliver(self, user_id: uuid.UUID, event: Dict[str, Any]) -> None:
+        """Hand ``event`` to this worker's subscribers for ``user_id`` only."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._offer, event)
+            except RuntimeError:
+                # The subscriber's loop has closed; its stream is gone.
+                self.unsubscribe(subscription)
+
+    def publish(self, user_id: uuid.UUID, event: Dict[str, Any]) -> None:
+        self.deliver(user_id, event)
+        if self.forwarder is not None:
+            self.forwarder(user_id, event)
+
+broker = EventBroker(queue_size=settings.EVENTS_QUEUE_SIZE)
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import uuid
+from typing import Any, Dict, Optional
+
+try:
+    import aioredis
+    REDIS_AVAILABLE = True
+except (ImportError, TypeError):
+    # aioredis has compatibility issues with Python 3.12; without it events
+    # stay within the worker that produced them.
+    REDIS_AVAILABLE = False
+
+from app.core.config import get_settings
+from app.events.broker import EventBroker
+
+settings = get_settings()
+
+CHANNEL_PREFIX = "calculations:events:"
+
+class RedisFanout:
+    """Relay broker events between uvicorn workers over Redis pub/sub.
+
+    Each worker publishes its own events to ``calculations:events:<user_id>``
+    and pattern-subscribes to all of them. Messages carry the origin worker's
+    id so a worker does not deliver its own events twice.
+    """
+
+    def __init__(self, broker: EventBroker, redis_url: Optional[str] = None):
+        self.broker = broker
+        self.redis_url = redis_url or settings.REDIS_URL or "redis://localhost"
+        self.origin = uuid.uuid4().hex
+        self._redis = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> bool:
+        if not REDIS_AVAILABLE:
+            return False
+        try:
+            self._redis = await aioredis.from_url(self.redis_url)
+            pubsub = self._redis.pubsub()
+            await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+        except Exception:
+            self._redis = None
+            return False
+        self._loop = asyncio.get_running_loop()
+        self._listener = asyncio.create_task(self._listen(pubsub))
+        self.broker.forwarder = self.forward
+        return True
+
+    async def stop(self) -> None:
+        self.broker.forwarder = None
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._redis is not None:
+            await self._redis.close()
+
+    def forward(self, user_id: uuid.UUID, event: Dict[str, Any]) -> None:
+        """Called from any thread by ``EventBroker.publish``."""
+        if self._loop is None or self._redis is None:
+            return
+        message = json.dumps({"origin": self.origin, "event": event})
+        channel = f"{CHANNEL_PREFIX}{user_id}"
+        asyncio.run_coroutine_threadsafe(self._publish(channel, message), self._loop)
+
+    async def _publish(self, channel: str, message: str) -> None:
+        try:
+            await self._redis.publish(channel, message)
+        except Exception:
+            # Other workers miss this event; their clients catch up on the
+            # next delta sync.
+            pass
+
+    async def _listen(self, pubsub) -> None:
+        async for message in pubsub.listen():
+            if message.get("type") != "pmessage":
+                continue
+            try:
+                payload = json.loads(message["data"])
+                if payload.get("origin") == self.origin:
+                    continue
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                user_id = uuid.UUID(channel[len(CHANNEL_PREFIX):])
+            except (ValueError, KeyError, TypeError):
+                continue
+            self.broker.deliver(user_id, payload["event"])
@@ -0,0 +1,64 @@
+"""Export one user's calculation history as an Arrow IPC stream or Parquet file.
+
+Rows are read ``--chunk-size`` at a time and written as one record batch
+(Parquet row group) each, so memory use does not grow with the history.
+See ``app.core.columnar`` for the schema. Needs pyarrow.
+
+Usage::
+
+    python -m app.jobs.export_calculations --user-id UUID history.parquet
+        [--format parquet] [--type addition] [--chunk-size 10000]
+"""
+import argparse
+import time
+import uuid
+from typing import Callable, Optional
+
+from app.core import columnar
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.user import User  # noqa: F401  (registers the users table)
+
+def export_calculations(
+    path: str,
+    user_id: uuid.UUID,
+    format: Optional[str] = None,
+    calculation_type: Optional[str] = None,
+    chunk_size: int = settings.EXPORT_CHUNK_ROWS,
+    report: Callable[[str], None] = print,
+    db=None
+) -> int:
+    """Write the export to ``path``; returns the number of rows."""
+    if not columnar.PYARROW_AVAILABLE:
+        raise RuntimeError("Columnar export needs pyarrow, which is not installed.")
+    format = format or ("parquet" if path.lower().endswith(".parquet") else "arrow")
+    owns_session = db is None
+    db = db or SessionLocal()
+    started = time.monotonic()
+    try:
+        query = columnar.export_query(
+            db, user_id, calculation_type=calculation_type.lower() if calculation_type else None,
+            sort_by="created_at", order="asc"
+        )
+        rows = columnar.write_batches(
+            columnar.record_batches(columnar.column_chunks(query, chunk_size)), path, format
+        )
+        elapsed = max(time.monotonic() - started, 1e-9)
+        report(f"{rows} rows written to {path} ({rows / elapsed:.0f} rows/s)")
+        return rows
+    finally:
+        if owns_session:
+            db.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export calculation history as Arrow or Parquet")
+    parser.add_argument("path", help="Output file")
+    parser.add_argument("--user-id", type=uuid.UUID, required=True, help="Whose calculations to export")
+    parser.add_argument("--format", choices=columnar.FORMATS, default=None, help="Default: from the file extension")
+    parser.add_argument("--type", default=None, help="Only export calculations of this type")
+    parser.add_argument("--chunk-size", type=int, default=settings.EXPORT_CHUNK_ROWS, help="Rows per batch")
+    args = parser.parse_args(argv)
+    export_calculations(args.path, args.user_id, args.format, args.type, args.chunk_size)
+
+if __name__ == "__main__":
+    main()
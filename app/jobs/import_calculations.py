@@ -0,0 +1,117 @@
+"""Import calculations for one user from a CSV or NDJSON file.
+
+The file is read line by line (see ``app.core.importer`` for the record
+format) and committed in batches of ``--batch-size``. Rejected records
+are written to ``--errors`` as NDJSON ``{"line": ..., "error": ...}``
+(stderr by default). With ``--checkpoint``, the last committed line is
+saved after every batch and ``--resume`` continues after it.
+
+Usage::
+
+    python -m app.jobs.import_calculations --user-id UUID history.csv
+        [--format csv] [--batch-size 1000] [--checkpoint import.json] [--resume]
+        [--errors rejected.ndjson]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Callable, List, Optional, TextIO, Tuple
+
+from app.core import importer
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.user import User  # noqa: F401  (registers the users table)
+
+def _save_checkpoint(path: str, state: dict) -> None:
+    partial_path = f"{path}.tmp"
+    with open(partial_path, "w") as f:
+        json.dump(state, f)
+    os.replace(partial_path, path)
+
+def import_calculations(
+    path: str,
+    user_id: uuid.UUID,
+    format: Optional[str] = None,
+    batch_size: int = settings.IMPORT_BATCH_ROWS,
+    checkpoint: Optional[str] = None,
+    resume: bool = False,
+    errors: TextIO = sys.stderr,
+    report: Callable[[str], None] = print,
+    db=None
+) -> dict:
+    """Import ``path``; returns the final checkpoint state."""
+    format = format or ("csv" if path.lower().endswith(".csv") else "ndjson")
+    state = {"path": os.path.abspath(path), "line": 0, "imported": 0, "failed": 0}
+    if resume and checkpoint and os.path.exists(checkpoint):
+        with open(checkpoint) as f:
+            state = json.load(f)
+        if state["path"] != os.path.abspath(path):
+            raise ValueError(f"Checkpoint {checkpoint} is for {state['path']}.")
+    parser = importer.RecordParser(format, state["line"])
+
+    owns_session = db is None
+    db = db or SessionLocal()
+    started, imported_before = time.monotonic(), state["imported"]
+
+    def flush(pending: List[Tuple[int, importer.Record]]) -> None:
+        batch = importer.import_batch(db, user_id, pending)
+        db.commit()
+        state["line"] = batch.line
+        state["imported"] += batch.imported
+        state["failed"] += len(batch.errors)
+        for number, error in batch.errors.items():
+            errors.write(json.dumps({"line": number, "error": error}) + "\n")
+        if checkpoint:
+            _save_checkpoint(checkpoint, state)
+        rate = (state["imported"] - imported_before) / max(time.monotonic() - started, 1e-9)
+        report(
+            f"line {state['line']}: {state['imported']} imported, "
+            f"{state['failed']} failed ({rate:.0f} rows/s)"
+        )
+
+    try:
+        pending = []
+        with open(path, encoding="utf-8", errors="replace", newline="") as f:
+            for number, line in enumerate(f, 1):
+                record = parser.parse(number, line.rstrip("\r\n"))
+                if record is not None:
+                    pending.append((number, record))
+                if len(pending) >= batch_size:
+                    flush(pending)
+                    pending = []
+        if pending:
+            flush(pending)
+        return state
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if owns_session:
+            db.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import calculations from a CSV or NDJSON file")
+    parser.add_argument("path", help="File to import")
+    parser.add_argument("--user-id", type=uuid.UUID, required=True, help="Owner of the imported calculations")
+    parser.add_argument("--format", choices=importer.FORMATS, default=None, help="Default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_ROWS, help="Rows per transaction")
+    parser.add_argument("--checkpoint", default=None, help="File recording the last committed line")
+    parser.add_argument("--resume", action="store_true", help="Continue from --checkpoint")
+    parser.add_argument("--errors", default=None, help="NDJSON file for rejected records (default: stderr)")
+    args = parser.parse_args(argv)
+    errors = open(args.errors, "a") if args.errors else sys.stderr
+    try:
+        state = import_calculations(
+            args.path, args.user_id, args.format, args.batch_size,
+            args.checkpoint, args.resume, errors
+        )
+    finally:
+        if args.errors:
+            errors.close()
+    print(f"Imported {state['imported']} calculations; {state['failed']} records rejected")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Bring a database created by an earlier release up to the current schema.
+
+``create_all`` only creates missing tables, so an existing database keeps
+its old ``calculations`` table (inputs inline, no ``payload_digest``,
+``version``, ``change_seq`` or ``deleted_at``) and any table created by a
+later release misses the columns added since. This job:
+
+- creates missing tables, adds missing columns and creates missing indexes;
+- moves legacy inline ``inputs`` into ``calculation_payloads`` and drops the
+  column, ``chunk_size`` rows per transaction;
+- gives rows without a ``change_seq`` one from their user's version
+  counter, and fills other new columns with their defaults;
+- rebuilds ``calculation_stats``.
+
+It is safe to re-run, including after an interruption. Run it with the
+application stopped.
+
+Usage::
+
+    python -m app.jobs.migrate_schema [--chunk-size N]
+"""
+import argparse
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, List
+
+from sqlalchemy import JSON, bindparam, column, inspect, select, text
+
+from app.database import Base, SessionLocal
+from app.models import Calculation, CalculationPayload, CalculationStats, CalculationVersion
+
+@dataclass
+class MigrationSummary:
+    columns: List[str] = field(default_factory=list)  # "table.column" added
+    payloads: int = 0  # rows whose inline inputs moved to calculation_payloads
+    sequenced: int = 0  # rows given a change_seq
+    stats_rows: int = 0
+
+def _add_missing_columns(db) -> list:
+    connection = db.connection()
+    inspector = inspect(connection)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        present = {existing["name"] for existing in inspector.get_columns(table.name)}
+        for new_column in table.columns:
+            if new_column.name in present:
+                continue
+            # Added nullable; filled in below, then tightened where the database allows.
+            definition = f"{new_column.name} {new_column.type.compile(dialect=connection.dialect)}"
+            if new_column.server_default is not None:
+                definition += f" DEFAULT {new_column.server_default.arg}"
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {definition}"))
+            added.append(new_column)
+    return added
+
+def _move_inline_inputs(db, chunk_size: int, report: Callable[[str], None]) -> int:
+    if "inputs" not in {existing["name"] for existing in inspect(db.connection()).get_columns("calculations")}:
+        return 0
+    table = Calculation.__table__
+    legacy_inputs = column("inputs", JSON)
+    moved = 0
+    while True:
+        rows = db.execute(
+            select(table.c.id, table.c.type, legacy_inputs, table.c.result)
+            .select_from(table)
+            .where(table.c.payload_digest.is_(None))
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        by_type = defaultdict(list)
+        for row in rows:
+            by_type[row.type].append(row)
+        updates = []
+        for calculation_type, typed in by_type.items():
+            digests = CalculationPayload.acquire_many(
+                db, calculation_type, [row.inputs for row in typed], [row.result for row in typed]
+            )
+            updates.extend({"b_id": row.id, "b_digest": digest} for row, digest in zip(typed, digests))
+        db.execute(
+            table.update().where(table.c.id == bindparam("b_id")).values(payload_digest=bindparam("b_digest")),
+            updates
+        )
+        db.commit()
+        moved += len(rows)
+        report(f"Moved the inputs of {moved} calculations to calculation_payloads")
+    db.execute(text("ALTER TABLE calculations DROP COLUMN inputs"))
+    db.commit()
+    return moved
+
+def _sequence_rows(db) -> int:
+    table = Calculation.__table__
+    users = db.execute(select(table.c.user_id).where(table.c.change_seq.is_(None)).distinct()).scalars().all()
+    sequenced = 0
+    for user_id in users:
+        # One bump per user: clients syncing from any older token see every row.
+        change_seq = CalculationVersion.bump(db, user_id)
+        sequenced += db.execute(
+            table.update()
+            .where(table.c.user_id == user_id, table.c.change_seq.is_(None))
+            .values(change_seq=change_seq)
+        ).rowcount
+    return sequenced
+
+def _fill_defaults(db) -> None:
+    for table in Base.metadata.sorted_tables:
+        for model_column in table.columns:
+            if not model_column.nullable and model_column.default is not None and model_column.default.is_scalar:
+                db.execute(
+                    table.update().where(model_column.is_(None)).values({model_column.name: model_column.default.arg})
+                )
+
+def _tighten(db) -> None:
+    """Add the NOT NULL and foreign key constraints columns were added without."""
+    connection = db.connection()
+    if connection.dialect.name == "sqlite":
+        return  # SQLite cannot alter a column; the application always writes them.
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        nullable = {existing["name"] for existing in inspector.get_columns(table.name) if existing["nullable"]}
+        constrained = {
+            name for foreign_key in inspector.get_foreign_keys(table.name)
+            for name in foreign_key["constrained_columns"]
+        }
+        for model_column in table.columns:
+            if not model_column.nullable and model_column.name in nullable:
+                connection.execute(text(f"ALTER TABLE {table.name} ALTER COLUMN {model_column.name} SET NOT NULL"))
+            for foreign_key in model_column.foreign_keys:
+                if model_column.name in constrained:
+                    continue
+                target = foreign_key.column
+                on_delete = f" ON DELETE {foreign_key.ondelete}" if foreign_key.ondelete else ""
+                connection.execute(text(
+                    f"ALTER TABLE {table.name} ADD FOREIGN KEY ({model_column.name}) "
+                    f"REFERENCES {target.table.name} ({target.name}){on_delete}"
+                ))
+
+def migrate_schema(chunk_size: int = 1000, report: Callable[[str], None] = print, db=None) -> MigrationSummary:
+    summary = MigrationSummary()
+    owns_session = db is None
+    db = db or SessionLocal()
+    try:
+        Base.metadata.create_all(db.connection())
+        added = _add_missing_columns(db)
+        summary.columns = [f"{new_column.table.name}.{new_column.name}" for new_column in added]
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(db.connection(), checkfirst=True)
+        db.commit()
+
+        summary.payloads = _move_inline_inputs(db, chunk_size, report)
+        summary.sequenced = _sequence_rows(db)
+        _fill_defaults(db)
+        _tighten(db)
+        summary.stats_rows = CalculationStats.rebuild(db)
+        db.commit()
+        return summary
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if owns_session:
+            db.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrate the database to the current schema")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Calculations per backfill transaction")
+    args = parser.parse_args(argv)
+    summary = migrate_schema(args.chunk_size)
+    print(
+        f"Added {len(summary.columns)} columns ({', '.join(summary.columns) or 'none'}), "
+        f"moved {summary.payloads} inputs, sequenced {summary.sequenced} calculations, "
+        f"rebuilt {summary.stats_rows} stats rows"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Hard-delete soft-deleted calculations past their retention period.
+
+The same purge the API workers run on a schedule (see
+``app.core.purge``), for running from cron with ``PURGE_ENABLED`` off or
+for catching up after a large delete. Runs until nothing is left unless
+``--max-batches`` is given.
+
+Usage::
+
+    python -m app.jobs.purge_calculations [--retention-hours 24]
+        [--batch-size 1000] [--max-batches N]
+"""
+import argparse
+import sys
+import time
+from datetime import timedelta
+
+from app.core.config import settings
+from app.core.purge import PurgeTask
+from app.database import SessionLocal
+from app.models.user import User  # noqa: F401  (registers the users table)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Purge soft-deleted calculations")
+    parser.add_argument("--retention-hours", type=float, default=settings.PURGE_RETENTION_HOURS,
+                        help="Keep rows deleted more recently than this")
+    parser.add_argument("--batch-size", type=int, default=settings.PURGE_BATCH_ROWS, help="Rows per transaction")
+    parser.add_argument("--max-batches", type=int, default=sys.maxsize, help="Stop after this many batches")
+    args = parser.parse_args(argv)
+    task = PurgeTask(
+        SessionLocal,
+        retention=timedelta(hours=args.retention_hours),
+        batch_size=args.batch_size,
+        max_batches=args.max_batches
+    )
+    started = time.monotonic()
+    purged = task.run_once()
+    elapsed = max(time.monotonic() - started, 1e-9)
+    print(f"Purged {purged} calculations ({purged / elapsed:.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
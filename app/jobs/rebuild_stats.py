@@ -0,0 +1,35 @@
+"""Recompute the ``calculation_stats`` table from scratch.
+
+Usage::
+
+    python -m app.jobs.rebuild_stats [--user-id UUID]
+"""
+import argparse
+import uuid
+from typing import Optional
+
+from app.database import SessionLocal
+from app.models.user import User  # noqa: F401  (registers the users table)
+from app.models.calculation_stats import CalculationStats
+
+def rebuild_stats(user_id: Optional[uuid.UUID] = None) -> int:
+    db = SessionLocal()
+    try:
+        written = CalculationStats.rebuild(db, user_id=user_id)
+        db.commit()
+        return written
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild per-user calculation statistics")
+    parser.add_argument("--user-id", type=uuid.UUID, default=None, help="Only rebuild this user's rows")
+    args = parser.parse_args(argv)
+    written = rebuild_stats(args.user_id)
+    print(f"Rebuilt {written} calculation stats rows")
+
+if __name__ == "__main__":
+    main()
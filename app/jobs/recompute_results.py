@@ -0,0 +1,276 @@
+"""Recompute the stored results of one calculation type.
+
+For use after an operation's semantics change in
+``app/models/calculation.py``. Results live on the shared payloads (one
+per distinct inputs), so those are what get recomputed. They are read in
+keyset order by digest, ``--chunk-size`` at a time. Each chunk is
+evaluated with ``evaluate_ragged`` on a process pool, with up to
+``--workers`` chunks in flight while the next ones are read.
+
+Changed results are written back in bulk: the payloads, then every
+calculation row using them, with a new version and change sequence so
+the changes feed and ETags pick them up. Calculations that take a
+changed row's result as an input are recomputed too. Inputs that no
+longer evaluate are counted and left as they were.
+
+Each chunk commits together with the checkpoint file and the stats
+moved by its rows, so ``--resume`` continues after the last committed
+chunk and an interrupted run leaves the stats consistent.
+
+Usage::
+
+    python -m app.jobs.recompute_results --type division [--chunk-size 1000]
+        [--workers 2] [--mode process] [--checkpoint recompute.json] [--resume]
+"""
+import argparse
+import json
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from functools import partial
+from itertools import chain
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import bindparam
+
+from app.core.executor import CalculationExecutor, create_executor
+from app.core.vectorized import RowResults, evaluate_ragged
+from app.database import SessionLocal
+from app.models.user import User  # noqa: F401  (registers the users table)
+from app.models.calculation import Calculation
+from app.models.calculation_dependency import CalculationDependency
+from app.models.calculation_payload import CalculationPayload
+from app.models.calculation_stats import CalculationStats
+from app.models.calculation_version import CalculationVersion
+
+# Digests per IN (...) lookup; stays under SQLite's bound-parameter limit.
+_IN_CHUNK = 500
+
+# (digest, inputs, expression, stored result)
+Payload = Tuple[str, List[float], Optional[str], Optional[float]]
+
+@dataclass
+class RecomputeProgress:
+    """Where a recompute run is, as saved in its checkpoint file."""
+    calculation_type: str
+    after: Optional[str] = None  # digest of the last committed payload
+    payloads: int = 0
+    changed: int = 0
+    rows: int = 0
+    dependents: int = 0
+    failed: int = 0
+
+    def save(self, path: str) -> None:
+        partial_path = f"{path}.tmp"
+        with open(partial_path, "w") as f:
+            json.dump(asdict(self), f)
+        os.replace(partial_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "RecomputeProgress":
+        with open(path) as f:
+            saved = json.load(f)
+        saved.pop("users", None)  # Written by runs that rebuilt stats at the end.
+        return cls(**saved)
+
+def _chunks(db, calculation_type: str, after: Optional[str], size: int) -> Iterator[List[Payload]]:
+    """Payloads of one type in digest order, ``size`` at a time."""
+    while True:
+        query = db.query(
+            CalculationPayload.digest,
+            CalculationPayload.inputs,
+            CalculationPayload.expression,
+            CalculationPayload.result
+        ).filter(CalculationPayload.type == calculation_type)
+        if after is not None:
+            query = query.filter(CalculationPayload.digest > after)
+        chunk = [tuple(row) for row in query.order_by(CalculationPayload.digest).limit(size)]
+        if not chunk:
+            return
+        yield chunk
+        after = chunk[-1][0]
+
+def _evaluate_chunk(
+    executor: CalculationExecutor,
+    calculation_type: str,
+    chunk: List[Payload]
+) -> RowResults:
+    """Results for a chunk, in order; one executor call per distinct expression."""
+    groups = {}
+    for index, (_, _, expression, _) in enumerate(chunk):
+        groups.setdefault(expression, []).append(index)
+    results, errors = [None] * len(chunk), {}
+    for expression, indexes in groups.items():
+        inputs = [chunk[index][1] for index in indexes]
+        evaluated = executor.run(
+            partial(evaluate_ragged, [len(row) for row in inputs], expression=expression),
+            calculation_type,
+            list(chain.from_iterable(inputs))
+        )
+        for position, index in enumerate(indexes):
+            results[index] = evaluated.results[position]
+            if position in evaluated.errors:
+                errors[index] = evaluated.errors[position]
+    return RowResults(results, errors)
+
+def _write_chunk(db, chunk: List[Payload], evaluated: RowResults, progress: RecomputeProgress) -> None:
+    changed = {
+        digest: result
+        for index, ((digest, _, _, stored), result) in enumerate(zip(chunk, evaluated.results))
+        if index not in evaluated.errors and result != stored
+    }
+    progress.failed += len(evaluated.errors)
+    if not changed:
+        return
+    progress.changed += len(changed)
+
+    payloads = CalculationPayload.__table__
+    db.execute(
+        payloads.update()
+        .where(payloads.c.digest == bindparam("b_digest"))
+        .values(result=bindparam("b_result")),
+        [{"b_digest": digest, "b_result": result} for digest, result in changed.items()]
+    )
+
+    digests = list(changed)
+    rows = []
+    for start in range(0, len(digests), _IN_CHUNK):
+        rows.extend(db.query(
+            Calculation.id, Calculation.user_id, Calculation.type, Calculation.payload_digest, Calculation.result
+        ).filter(
+            Calculation.payload_digest.in_(digests[start:start + _IN_CHUNK]),
+            Calculation.deleted_at.is_(None)
+        ))
+    if not rows:
+        return
+    users = {user_id: CalculationVersion.bump(db, user_id) for user_id in {row.user_id for row in rows}}
+    calculations = Calculation.__table__
+    db.execute(
+        calculations.update()
+        .where(calculations.c.id == bindparam("b_id"))
+        .values(
+            result=bindparam("b_result"),
+            change_seq=bindparam("b_seq"),
+            version=calculations.c.version + 1,
+            updated_at=datetime.utcnow()
+        ),
+        [
+            {"b_id": row.id, "b_result": changed[row.payload_digest], "b_seq": users[row.user_id]}
+            for row in rows
+        ]
+    )
+    progress.rows += len(rows)
+
+    # The rows are already updated, so removing an old extreme re-reads the new ones.
+    moved = defaultdict(lambda: ([], []))
+    for row in rows:
+        removed, added = moved[(row.user_id, row.type)]
+        removed.append(row.result)
+        added.append(changed[row.payload_digest])
+    for (user_id, calculation_type), (removed, added) in moved.items():
+        CalculationStats.record_removed_many(db, user_id, calculation_type, removed)
+        CalculationStats.record_added_many(db, user_id, calculation_type, added)
+
+    # Calculations fed by a changed result; a dependent that no longer
+    # evaluates is rolled back on its own and counted as failed.
+    sources = []
+    for start in range(0, len(digests), _IN_CHUNK):
+        sources.extend(
+            db.query(Calculation).populate_existing().filter(
+                Calculation.payload_digest.in_(digests[start:start + _IN_CHUNK]),
+                Calculation.id.in_(db.query(CalculationDependency.source_id))
+            )
+        )
+    for source in sources:
+        savepoint = db.begin_nested()
+        try:
+            progress.dependents += len(CalculationDependency.recompute_downstream(db, source))
+            savepoint.commit()
+        except ValueError:
+            savepoint.rollback()
+            progress.failed += 1
+
+def recompute_results(
+    calculation_type: str,
+    chunk_size: int = 1000,
+    workers: int = 2,
+    mode: str = "process",
+    checkpoint: Optional[str] = None,
+    resume: bool = False,
+    report: Callable[[str], None] = print,
+    db=None
+) -> RecomputeProgress:
+    calculation_type = calculation_type.lower()
+    Calculation.class_for(calculation_type)  # Rejects unknown types
+    if resume and checkpoint and os.path.exists(checkpoint):
+        progress = RecomputeProgress.load(checkpoint)
+        if progress.calculation_type != calculation_type:
+            raise ValueError(f"Checkpoint {checkpoint} is for {progress.calculation_type}, not {calculation_type}.")
+    else:
+        progress = RecomputeProgress(calculation_type)
+
+    owns_session = db is None
+    db = db or SessionLocal()
+    executor = create_executor(mode, workers)
+    try:
+        remaining = db.query(CalculationPayload).filter(CalculationPayload.type == calculation_type)
+        if progress.after is not None:
+            remaining = remaining.filter(CalculationPayload.digest > progress.after)
+        total = progress.payloads + remaining.count()
+        started, done_before = time.monotonic(), progress.payloads
+
+        def write(chunk, future):
+            _write_chunk(db, chunk, future.result(), progress)
+            db.commit()
+            progress.after = chunk[-1][0]
+            progress.payloads += len(chunk)
+            if checkpoint:
+                progress.save(checkpoint)
+            rate = (progress.payloads - done_before) / max(time.monotonic() - started, 1e-9)
+            report(
+                f"{progress.payloads}/{total} payloads, {progress.changed} changed, "
+                f"{progress.rows} rows and {progress.dependents} dependents updated, "
+                f"{progress.failed} failed ({rate:.0f} payloads/s)"
+            )
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque()
+            for chunk in _chunks(db, calculation_type, progress.after, chunk_size):
+                in_flight.append((chunk, pool.submit(_evaluate_chunk, executor, calculation_type, chunk)))
+                if len(in_flight) > workers:
+                    write(*in_flight.popleft())
+            while in_flight:
+                write(*in_flight.popleft())
+
+        return progress
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        executor.shutdown()
+        if owns_session:
+            db.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute stored calculation results of one type")
+    parser.add_argument("--type", required=True, help="Calculation type to recompute")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Payloads per chunk")
+    parser.add_argument("--workers", type=int, default=2, help="Evaluation workers (and chunks in flight)")
+    parser.add_argument("--mode", choices=["inline", "thread", "process"], default="process")
+    parser.add_argument("--checkpoint", default=None, help="File recording progress after each chunk")
+    parser.add_argument("--resume", action="store_true", help="Continue from --checkpoint")
+    args = parser.parse_args(argv)
+    progress = recompute_results(
+        args.type, args.chunk_size, args.workers, args.mode, args.checkpoint, args.resume
+    )
+    print(
+        f"Recomputed {progress.payloads} {progress.calculation_type} payloads: "
+        f"{progress.changed} changed, {progress.rows} rows and {progress.dependents} dependents updated, "
+        f"{progress.failed} failed"
+    )
+
+if __name__ == "__main__":
+    main()
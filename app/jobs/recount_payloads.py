@@ -0,0 +1,32 @@
+"""Recompute ``calculation_payloads.ref_count`` and drop orphaned payloads.
+
+Usage::
+
+    python -m app.jobs.recount_payloads
+"""
+import argparse
+
+from app.database import SessionLocal
+from app.models.user import User  # noqa: F401  (registers the users table)
+from app.models.calculation_payload import CalculationPayload
+
+def recount_payloads() -> int:
+    db = SessionLocal()
+    try:
+        removed = CalculationPayload.recount(db)
+        db.commit()
+        return removed
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recount calculation payload references")
+    parser.parse_args(argv)
+    removed = recount_payloads()
+    print(f"Removed {removed} orphaned calculation payloads")
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,101 @@
+import asyncio
+import json
+import math
+import sys
+from functools import partial
+from array import array
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
-from uuid import UUID
-from typing import List
+from uuid import UUID, uuid4
+from typing import Annotated, Dict, Iterator, List, Literal, Optional, Sequence, Tuple, Union
 
-from fastapi import Body, FastAPI, Depends, HTTPException, status, Request, Form
+from fastapi import Body, FastAPI, Depends, HTTPException, status, Request, Response, Form, Query, Header
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse, PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session, sessionmaker
 
 import uvicorn
 
 from app.auth.dependencies import get_current_active_user
 from app.models.calculation import Calculation
+from app.models.calculation_stats import CalculationStats
+from app.models.calculation_version import CalculationVersion
+from app.models.calculation_tombstone import CalculationTombstone
+from app.models.calculation_payload import CalculationPayload
+from app.models.calculation_job import CalculationJob
+from app.models.calculation_dependency import CalculationDependency
 from app.models.user import User
-from app.schemas.calculation import CalculationBase, CalculationResponse, CalculationUpdate
+from app.schemas.calculation import (
+    CalculationBase,
+    CalculationReference,
+    CalculationResponse,
+    CalculationUpdate,
+    CalculationFilter,
+    CalculationExportFilter,
+    CalculationStatsResponse,
+    CalculationChangesResponse,
+    CalculationJobResponse,
+    CalculationMapRequest,
+    CalculationMapResponse,
+    CalculationStatisticResponse,
+    CalculationImportResponse,
+    CalculationBulkFilter,
+    CalculationBulkUpdate,
+    CalculationBulkResponse,
+    CalculationType,
+    CalculationSweepRequest,
+    CalculationSweepChunk,
+    SweepRange,
+    check_expression,
+    min_inputs,
+)
 from app.schemas.token import TokenResponse
 from app.schemas.user import UserCreate, UserResponse, UserLogin, ProfileUpdate
 from app.database import Base, get_db, engine
+from app.core.etag import item_etag, collection_etag, etag_matches
+from app.core.config import settings
+from app.core.cache import CachedResponse, response_cache
+from app.core.metrics import metrics
+from app.core.singleflight import read_flights
+from app.core.group_commit import GroupCommitWriter
+from app.core.job_runner import JobRunner
+from app.core.purge import PurgeTask
+from app.core.cost import cost_guard
+from app.core import sweep
+from app.core import bulk
+from app.core.bulk import persist_new_calculations
+from app.core import importer
+from app.core import columnar
+from app.core.statistics import StreamingStatistic
+from app.core.vectorized import RowResults, evaluate_rows, to_rows
+from app.core.idempotency import (
+    IdempotencyConflict,
+    IdempotencyInProgress,
+    MAX_KEY_LENGTH,
+    StoredResponse,
+    fingerprint,
+    idempotency_store,
+)
+from app.events import broker
+from app.events.redis import RedisFanout
+
+# Clients must revalidate, which lets them reuse a body on 304.
+CACHE_CONTROL = "private, no-cache"
+
+_calculation_list_adapter = TypeAdapter(List[CalculationResponse])
+
+def _cached_json_response(entry: CachedResponse, if_none_match: Optional[str]) -> Response:
+    """Serve a pre-serialized body, or 304 when the client already has it."""
+    # Bodies and validators are per user, so shared caches must key on the token.
+    headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL, "Vary": "Authorization"}
+    if entry.body is None or etag_matches(if_none_match, entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
 
 
 @asynccontextmanager
@@ -27,7 +103,24 @@ async def lifespan(app: FastAPI):
     print("Creating tables...")
     Base.metadata.create_all(bind=engine)
     print("Tables created successfully!")
+    job_runner.recover()
+    if settings.PURGE_ENABLED:
+        purge_task.start()
+    fanout = None
+    if settings.EVENTS_REDIS_FANOUT:
+        fanout = RedisFanout(broker)
+        if not await fanout.start():
+            print("Redis unavailable; calculation events stay within this worker")
+            fanout = None
     yield
+    if fanout is not None:
+        await fanout.stop()
+    if group_writer is not None:
+        group_writer.close()
+    purge_task.stop()
+    cost_guard.offload.shutdown()
+    # Jobs still queued stay queued in the database and resume on restart.
+    job_runner.shutdown(wait=False)
 
 app = FastAPI(
     title="Calculations API",
@@ -72,6 +165,11 @@ def settings_page(request: Request):
 def read_health():
     return {"status": "ok"}
 
+@app.get("/metrics", response_class=PlainTextResponse, tags=["health"])
+def read_metrics():
+    """Process metrics in Prometheus text format"""
+    return metrics.render()
+
 
 @app.post(
     "/auth/register", 
@@ -202,68 +300,843 @@ def update_profile(
 
 
 
-@app.post(
-    "/calculations",
-    response_model=CalculationResponse,
-    status_code=status.HTTP_201_CREATED,
-    tags=["calculations"],
+def _run_idempotent(
+    idempotency_key: Optional[str],
+    current_user,
+    request_fingerprint: str,
+    success_status: int,
+    handler
+) -> Response:
+    """Run ``handler`` once per Idempotency-Key and replay its response.
+
+    ``handler`` returns the ORM object to serialize. HTTP errors it raises
+    are stored and replayed like successes; anything else releases the key.
+    """
+    if len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Idempotency-Key is too long.")
+
+    def run() -> StoredResponse:
+        try:
+            calculation = handler()
+        except HTTPException as e:
+            return StoredResponse(e.status_code, json.dumps({"detail": e.detail}).encode())
+        return StoredResponse(
+            success_status,
+            CalculationResponse.model_validate(calculation).model_dump_json().encode()
+        )
+
+    try:
+        stored, replayed = idempotency_store.run(
+            current_user.id, idempotency_key, request_fingerprint, run
+        )
+    except IdempotencyConflict:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request."
+        )
+    except IdempotencyInProgress:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress."
+        )
+    headers = {"Idempotency-Replayed": "true"} if replayed else {}
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers=headers
+    )
+
+def _persist_new_calculation(db: Session, calculation: Calculation) -> None:
+    """Insert a computed calculation with its payload, version and stats bookkeeping.
+
+    Safe to run again on the same object after a rollback, as the group
+    writer does when it retries a failed batch row by row.
+    """
+    # A rolled-back attempt leaves its digest set; attach would then skip
+    # taking the payload reference again.
+    calculation.payload_digest = None
+    calculation.change_seq = CalculationVersion.bump(db, calculation.user_id)
+    CalculationPayload.attach(db, calculation)
+    db.add(calculation)
+    db.flush()
+    CalculationStats.record_added(db, calculation)
+
+def _after_create(calculation: Calculation) -> None:
+    broker.publish(calculation.user_id, {
+        "type": "created",
+        "id": str(calculation.id),
+        "token": str(calculation.change_seq)
+    })
+
+# Sessions for work done outside a request: objects stay readable after
+# commit so they can be serialized and published.
+_background_session = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+group_writer = GroupCommitWriter(
+    _background_session,
+    _persist_new_calculation,
+    window_seconds=settings.GROUP_COMMIT_WINDOW_MS / 1000,
+    max_batch=settings.GROUP_COMMIT_MAX_BATCH,
+    wait_for_commit=settings.GROUP_COMMIT_WAIT_FOR_COMMIT
+) if settings.GROUP_COMMIT_ENABLED else None
+
+def _compute_result(
+    calculation_type: str,
+    inputs: List[float],
+    offload: bool = True,
+    expression: Optional[str] = None
+) -> float:
+    """Evaluate within the compute budget; raises ``ValueError`` when over it."""
+    evaluate = partial(Calculation.evaluate, expression=expression) if expression else Calculation.evaluate
+    return cost_guard.run(calculation_type, inputs, evaluate, offload=offload, standard=True)
+
+def _run_calculation_job(db: Session, job: CalculationJob) -> Calculation:
+    calculation = Calculation.create(job.type, job.user_id, job.inputs, expression=job.expression)
+    # Jobs already run on their own pool; no need to hop to the offload pool.
+    calculation.result = CalculationPayload.result_for(
+        db, calculation.type, calculation.inputs,
+        compute=partial(_compute_result, offload=False, expression=job.expression),
+        expression=job.expression
+    )
+    _persist_new_calculation(db, calculation)
+    return calculation
+
+job_runner = JobRunner(
+    _background_session,
+    _run_calculation_job,
+    concurrency={"standard": settings.JOBS_STANDARD_WORKERS, "heavy": settings.JOBS_HEAVY_WORKERS},
+    after_commit=_after_create,
+    heartbeat_seconds=settings.JOBS_HEARTBEAT_SECONDS,
+    stale_after_seconds=settings.JOBS_STALE_AFTER_SECONDS
 )
-def create_calculation(
+
+purge_task = PurgeTask(
+    _background_session,
+    retention=timedelta(hours=settings.PURGE_RETENTION_HOURS),
+    interval_seconds=settings.PURGE_INTERVAL_SECONDS,
+    batch_size=settings.PURGE_BATCH_ROWS,
+    max_batches=settings.PURGE_MAX_BATCHES,
+    tombstone_retention=timedelta(hours=settings.CHANGES_RETENTION_HOURS)
+)
+
+def _job_class(calculation_data: CalculationBase) -> str:
+    """Pick the job's pool; raises ``ValueError`` if it is over budget."""
+    cost = cost_guard.check(calculation_data.type.value, calculation_data.inputs)
+    return "heavy" if cost_guard.should_offload(cost) else "standard"
+
+def _resolve_inputs(db: Session, user_id: UUID, inputs: list) -> Tuple[List[float], Dict[int, UUID]]:
+    """Substitute referenced calculations' results into ``inputs``.
+
+    Returns the numeric inputs and ``{position: referenced id}``; 400 when
+    a reference is not one of the user's calculations.
+    """
+    references = {
+        position: value.calculation_id
+        for position, value in enumerate(inputs)
+        if isinstance(value, CalculationReference)
+    }
+    if not references:
+        return list(inputs), {}
+    results = dict(db.query(Calculation.id, Calculation.result).filter(
+        Calculation.user_id == user_id,
+        Calculation.deleted_at.is_(None),
+        Calculation.id.in_(set(references.values()))
+    ))
+    for calculation_id in references.values():
+        if results.get(calculation_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Referenced calculation not found: {calculation_id}"
+            )
+    resolved = [
+        results[references[position]] if position in references else value
+        for position, value in enumerate(inputs)
+    ]
+    return resolved, references
+
+def _dependency_rows(references: Dict[int, UUID]) -> List[CalculationDependency]:
+    return [
+        CalculationDependency(position=position, source_id=source_id)
+        for position, source_id in sorted(references.items())
+    ]
+
+def _recompute_dependents(db: Session, source: Calculation) -> List[UUID]:
+    """``CalculationDependency.recompute_downstream`` through the cost guard.
+
+    Raises a 400 if a dependent can no longer be computed; the caller
+    rolls back.
+    """
+    try:
+        return CalculationDependency.recompute_downstream(db, source, _compute_result)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+def _create_calculation(
     calculation_data: CalculationBase,
-    current_user = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    
+    current_user,
+    db: Session
+) -> Union[Calculation, CalculationResponse]:
+    inputs, references = _resolve_inputs(db, current_user.id, calculation_data.inputs)
     try:
         new_calculation = Calculation.create(
             calculation_type=calculation_data.type,
             user_id=current_user.id,
-            inputs=calculation_data.inputs,
+            inputs=inputs,
+            expression=calculation_data.expression,
+        )
+        new_calculation.result = CalculationPayload.result_for(
+            db, new_calculation.type, new_calculation.inputs,
+            compute=partial(_compute_result, expression=calculation_data.expression),
+            expression=calculation_data.expression
         )
-        new_calculation.result = new_calculation.get_result()
-
-        db.add(new_calculation)
-        db.commit()
-        db.refresh(new_calculation)
-        return new_calculation
-
     except ValueError as e:
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
+    if group_writer is not None and not references:
+        # Fill in column defaults now and serialize from them: once queued,
+        # the object belongs to the writer thread's session, which may be
+        # flushing it while this request responds.
+        now = datetime.utcnow()
+        new_calculation.id = uuid4()
+        new_calculation.created_at = new_calculation.updated_at = now
+        new_calculation.version = 1
+        response = CalculationResponse.model_validate(new_calculation)
+        group_writer.submit(new_calculation, after_commit=_after_create)
+        return response
+
+    new_calculation.dependencies = _dependency_rows(references)
+    _persist_new_calculation(db, new_calculation)
+    db.commit()
+    db.refresh(new_calculation)
+    _after_create(new_calculation)
+    return new_calculation
+
+@app.post(
+    "/calculations",
+    response_model=CalculationResponse,
+    status_code=status.HTTP_201_CREATED,
+    tags=["calculations"],
+)
+def create_calculation(
+    calculation_data: CalculationBase,
+    idempotency_key: Annotated[Optional[str], Header()] = None,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    if idempotency_key is None:
+        return _create_calculation(calculation_data, current_user, db)
+    return _run_idempotent(
+        idempotency_key,
+        current_user,
+        fingerprint("POST", "/calculations", calculation_data.model_dump_json()),
+        status.HTTP_201_CREATED,
+        lambda: _create_calculation(calculation_data, current_user, db)
+    )
+
+def _filter_arguments(filters: CalculationFilter) -> dict:
+    """``Calculation.filter_for_user`` keyword arguments for ``filters``."""
+    return dict(
+        calculation_type=filters.type.value if filters.type else None,
+        created_after=filters.created_after,
+        created_before=filters.created_before,
+        min_result=filters.min_result,
+        max_result=filters.max_result,
+        sort_by=filters.sort_by,
+        order=filters.order,
+    )
+
 @app.get("/calculations", response_model=List[CalculationResponse], tags=["calculations"])
 def list_calculations(
+    filters: Annotated[CalculationFilter, Query()],
+    if_none_match: Annotated[Optional[str], Header()] = None,
     current_user = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    calculations = db.query(Calculation).filter(Calculation.user_id == current_user.id).all()
-    return calculations
+    filters_key = filters.model_dump_json()
+    version = CalculationVersion.current(db, current_user.id)
 
-@app.get("/calculations/{calc_id}", response_model=CalculationResponse, tags=["calculations"])
-def get_calculation(
-    calc_id: str,
+    def build() -> CachedResponse:
+        etag = collection_etag(current_user.id, version, filters_key)
+        if etag_matches(if_none_match, etag):
+            return CachedResponse(etag=etag)
+        calculations = Calculation.filter_for_user(db, current_user.id, **_filter_arguments(filters)).all()
+        return CachedResponse(etag=etag, body=_calculation_list_adapter.dump_json(
+            _calculation_list_adapter.validate_python(calculations, from_attributes=True)
+        ))
+
+    key = f"list:{filters_key}"
+    entry = read_flights.do(
+        (current_user.id, version, key, if_none_match),
+        lambda: response_cache.get_or_build(current_user.id, version, key, build)
+    )
+    return _cached_json_response(entry, if_none_match)
+
+@app.post(
+    "/calculations/jobs",
+    response_model=CalculationJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=["calculations"],
+)
+def create_calculation_job(
+    calculation_data: CalculationBase,
+    response: Response,
     current_user = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
+    """Queue a calculation to run in the background and return the job to poll"""
+    if any(isinstance(value, CalculationReference) for value in calculation_data.inputs):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Background jobs take numeric inputs only."
+        )
     try:
-        calc_uuid = UUID(calc_id)
+        job_class = _job_class(calculation_data)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    job = CalculationJob(
+        user_id=current_user.id,
+        type=calculation_data.type.value,
+        inputs=calculation_data.inputs,
+        expression=calculation_data.expression,
+        job_class=job_class,
+        status=CalculationJob.QUEUED
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    job_runner.submit(job.id, job.job_class)
+    response.headers["Location"] = f"/calculations/jobs/{job.id}"
+    return job
+
+def _get_job(job_id: str, current_user, db: Session) -> CalculationJob:
+    try:
+        job_uuid = UUID(job_id)
     except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid calculation id format.")
+        raise HTTPException(status_code=400, detail="Invalid job id format.")
+    job = CalculationJob.for_user(db, job_uuid, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+@app.get("/calculations/jobs/{job_id}", response_model=CalculationJobResponse, tags=["calculations"])
+def get_calculation_job(
+    job_id: str,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    return _get_job(job_id, current_user, db)
+
+@app.get("/calculations/jobs/{job_id}/result", response_model=CalculationResponse, tags=["calculations"])
+def get_calculation_job_result(
+    job_id: str,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """The calculation a succeeded job stored; 409 while it is unfinished or if it failed"""
+    job = _get_job(job_id, current_user, db)
+    if job.status != CalculationJob.SUCCEEDED:
+        detail = job.error if job.status == CalculationJob.FAILED else f"Job is {job.status}."
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
     calculation = db.query(Calculation).filter(
-        Calculation.id == calc_uuid,
-        Calculation.user_id == current_user.id
+        Calculation.id == job.calculation_id,
+        Calculation.user_id == current_user.id,
+        Calculation.deleted_at.is_(None)
     ).first()
     if not calculation:
         raise HTTPException(status_code=404, detail="Calculation not found.")
     return calculation
 
-@app.put("/calculations/{calc_id}", response_model=CalculationResponse, tags=["calculations"])
-def update_calculation(
+@app.delete("/calculations/jobs/{job_id}", response_model=CalculationJobResponse, tags=["calculations"])
+def cancel_calculation_job(
+    job_id: str,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Cancel a queued or running job; a running job's work is discarded"""
+    job = _get_job(job_id, current_user, db)
+    if not job_runner.cancel(db, job):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is already {job.status}.")
+    return job
+
+def _store_succeeded(
+    db: Session,
+    user_id: UUID,
+    calculation_type: str,
+    rows: List[List[float]],
+    evaluated: RowResults,
+    expression: Optional[str] = None
+) -> Tuple[List[Optional[UUID]], int]:
+    """Persist the rows that succeeded; the caller commits.
+
+    Returns the new ids aligned with ``rows`` (``None`` for failed rows)
+    and the batch's change sequence, 0 when nothing was stored.
+    """
+    ids = [None] * len(rows)
+    succeeded = [index for index, result in enumerate(evaluated.results) if result is not None]
+    if not succeeded:
+        return ids, 0
+    new_ids, change_seq = persist_new_calculations(
+        db,
+        user_id,
+        calculation_type,
+        [rows[index] for index in succeeded],
+        [evaluated.results[index] for index in succeeded],
+        expression
+    )
+    for index, calculation_id in zip(succeeded, new_ids):
+        ids[index] = calculation_id
+    return ids, change_seq
+
+def _after_create_many(user_id: UUID, count: int, change_seq: int) -> None:
+    broker.publish(user_id, {"type": "created", "count": count, "token": str(change_seq)})
+
+def _map_calculations(
+    calculation_type: CalculationType,
+    rows: List[List[float]],
+    store: bool,
+    current_user,
+    db: Session,
+    expression: Optional[str] = None
+) -> CalculationMapResponse:
+    try:
+        evaluated = cost_guard.run_rows(calculation_type.value, rows, expression=expression)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    ids = None
+    if store:
+        ids, change_seq = _store_succeeded(
+            db, current_user.id, calculation_type.value, rows, evaluated, expression
+        )
+        if change_seq:
+            db.commit()
+            _after_create_many(current_user.id, len(rows) - len(evaluated.errors), change_seq)
+
+    return CalculationMapResponse(
+        type=calculation_type,
+        count=len(rows),
+        results=evaluated.results,
+        errors=evaluated.errors,
+        ids=ids
+    )
+
+@app.post("/calculations/map", response_model=CalculationMapResponse, tags=["calculations"])
+def map_calculations(
+    map_request: CalculationMapRequest,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Evaluate one calculation type over every input row; failed rows are reported, not fatal"""
+    return _map_calculations(
+        map_request.type, map_request.rows, map_request.store, current_user, db, map_request.expression
+    )
+
+@app.post("/calculations/map/binary", response_model=CalculationMapResponse, tags=["calculations"])
+def map_calculations_binary(
+    type: CalculationType,
+    columns: Annotated[int, Query(ge=1)],
+    body: Annotated[bytes, Body(media_type="application/octet-stream")],
+    expression: Optional[str] = None,
+    store: bool = False,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """``/calculations/map`` with the matrix sent as row-major little-endian float64"""
+    if not body or len(body) % (8 * columns):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Body must hold a whole number of rows of {columns} float64 values."
+        )
+    if columns < min_inputs(type):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Each row needs at least {min_inputs(type)} inputs for {type.value}"
+        )
+    try:
+        check_expression(type, expression, columns)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    values = _float64_values(body)
+    return _map_calculations(type, to_rows(values, columns), store, current_user, db, expression)
+
+def _float64_values(data: bytes) -> array:
+    """Little-endian float64 ``data`` as an array; 400 unless every value is finite."""
+    values = array("d")
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    if not all(map(math.isfinite, values)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inputs must be finite numbers.")
+    return values
+
+@app.post("/calculations/statistics/binary", response_model=CalculationStatisticResponse, tags=["calculations"])
+async def streamed_statistic(
+    request: Request,
+    type: CalculationType,
+    percentile: Annotated[Optional[float], Query(ge=0, le=100)] = None,
+    current_user = Depends(get_current_active_user)
+):
+    """One statistic over a little-endian float64 body, read as it arrives
+
+    Only a fixed-size summary of the values is kept, never the body, and
+    nothing is stored. Mean, variance and stddev are exact; median and
+    percentile come from a t-digest, exact for short inputs and close
+    approximations for long ones.
+    """
+    try:
+        statistic = StreamingStatistic(type.value, percentile)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        whole = len(pending) - len(pending) % 8
+        if not whole:
+            continue
+        values = _float64_values(pending[:whole])
+        pending = pending[whole:]
+        try:
+            cost_guard.check_batch(statistic.count + len(values))
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        await run_in_threadpool(statistic.extend, values)
+    if pending:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must hold a whole number of float64 values."
+        )
+    try:
+        result = statistic.result()
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return CalculationStatisticResponse(type=type, count=statistic.count, result=result)
+
+def _import_batch(db: Session, user_id: UUID, records: List[Tuple[int, importer.Record]]) -> importer.ImportBatch:
+    batch = importer.import_batch(db, user_id, records)
+    db.commit()
+    if batch.imported:
+        _after_create_many(user_id, batch.imported, batch.change_seq)
+    return batch
+
+@app.post("/calculations/import", response_model=CalculationImportResponse, tags=["calculations"])
+async def import_calculations(
+    request: Request,
+    format: Literal["csv", "ndjson"],
+    start_line: Annotated[int, Query(ge=0)] = 0,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Create calculations from a CSV or NDJSON body, read as it arrives
+
+    See ``app.core.importer`` for the record format. Records are
+    validated, evaluated and committed in batches; a bad record is
+    reported by line number and does not stop the import. If the import
+    is interrupted, send the same body again with ``start_line`` set to
+    the last committed ``line``.
+    """
+    try:
+        parser = importer.RecordParser(format, start_line)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    lines = importer.LineBuffer()
+    response = CalculationImportResponse(line=start_line, imported=0, failed=0)
+    pending: List[Tuple[int, importer.Record]] = []
+
+    async def flush():
+        batch = await run_in_threadpool(_import_batch, db, current_user.id, pending[:])
+        pending.clear()
+        response.line = batch.line
+        response.imported += batch.imported
+        response.failed += len(batch.errors)
+        for number, error in batch.errors.items():
+            if len(response.errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+                response.errors[number] = error
+            else:
+                response.errors_truncated = True
+
+    async def take(numbered):
+        for number, line in numbered:
+            record = parser.parse(number, line)
+            if record is not None:
+                pending.append((number, record))
+            if len(pending) >= settings.IMPORT_BATCH_ROWS:
+                await flush()
+
+    try:
+        async for chunk in request.stream():
+            await take(lines.feed(chunk))
+        await take(lines.close())
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{e} Lines up to {response.line} were committed."
+        )
+    if pending:
+        await flush()
+    return response
+
+def _bulk_criteria(user_id: UUID, where: CalculationBulkFilter) -> list:
+    return bulk.criteria(
+        user_id,
+        ids=where.ids,
+        calculation_type=where.type.value if where.type else None,
+        created_after=where.created_after,
+        created_before=where.created_before
+    )
+
+@app.post("/calculations/bulk/delete", response_model=CalculationBulkResponse, tags=["calculations"])
+def bulk_delete_calculations(
+    where: CalculationBulkFilter,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Delete every calculation matching the criteria with one set-based UPDATE
+
+    Like single deletes, this is a soft delete; the rows are purged later.
+
+    409 if a calculation that is not being deleted takes an input from one
+    that is.
+    """
+    criteria = _bulk_criteria(current_user.id, where)
+    dependents = CalculationDependency.dependents_outside(db, bulk.matching_ids(criteria))
+    if dependents:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{dependents} other calculation(s) take an input from these; change or delete those first."
+        )
+    ids, change_seq = bulk.delete_calculations(db, current_user.id, criteria)
+    if not ids:
+        db.rollback()
+        return CalculationBulkResponse(count=0, token=str(CalculationVersion.current(db, current_user.id)))
+    db.commit()
+    broker.publish(current_user.id, {"type": "deleted", "count": len(ids), "token": str(change_seq)})
+    return CalculationBulkResponse(count=len(ids), token=str(change_seq))
+
+@app.post("/calculations/bulk/update", response_model=CalculationBulkResponse, tags=["calculations"])
+def bulk_update_calculations(
+    bulk_update: CalculationBulkUpdate,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Re-type and/or re-input every calculation matching the criteria
+
+    Results are recomputed per distinct content and written with one
+    set-based UPDATE; calculations that take a changed result as an input
+    are recomputed too. Nothing changes if any of them fails (400).
+    """
+    changes = bulk_update.changes
+    try:
+        outcome = bulk.update_calculations(
+            db, current_user.id, _bulk_criteria(current_user.id, bulk_update.where),
+            calculation_type=changes.type.value if changes.type else None,
+            inputs=changes.inputs,
+            expression=changes.expression,
+            compute=_compute_result
+        )
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    db.commit()
+    if not outcome.ids:
+        return CalculationBulkResponse(count=0, token=str(CalculationVersion.current(db, current_user.id)))
+    broker.publish(current_user.id, {
+        "type": "updated",
+        "count": len(outcome.ids) + len(outcome.recomputed),
+        "token": str(outcome.change_seq)
+    })
+    return CalculationBulkResponse(
+        count=len(outcome.ids),
+        recomputed=len(outcome.recomputed),
+        token=str(outcome.change_seq)
+    )
+
+def _stream_sweep(
+    calculation_type: str,
+    positions: List[sweep.Position],
+    store: bool,
+    user_id: UUID,
+    db: Session,
+    expression: Optional[str] = None
+) -> Iterator[str]:
+    # The request's session was closed when the endpoint returned; a
+    # closed Session simply begins again on next use, so closing it here
+    # too is all the cleanup needed. Each stored batch commits on its own.
+    stored, change_seq = 0, 0
+    try:
+        for offset, rows in sweep.batches(positions, settings.SWEEP_BATCH_ROWS):
+            evaluated = evaluate_rows(calculation_type, rows, expression)
+            ids = None
+            if store:
+                ids, batch_seq = _store_succeeded(db, user_id, calculation_type, rows, evaluated, expression)
+                if batch_seq:
+                    db.commit()
+                    stored += len(rows) - len(evaluated.errors)
+                    change_seq = batch_seq
+            yield CalculationSweepChunk(
+                offset=offset,
+                results=evaluated.results,
+                errors=evaluated.errors,
+                ids=ids
+            ).model_dump_json() + "\n"
+    finally:
+        db.close()
+        if stored:
+            _after_create_many(user_id, stored, change_seq)
+
+@app.post("/calculations/sweep", response_class=StreamingResponse, tags=["calculations"])
+def sweep_calculations(
+    sweep_request: CalculationSweepRequest,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Evaluate a calculation over a grid of inputs, streamed as NDJSON batches
+
+    Each line is a ``CalculationSweepChunk``; ``X-Sweep-Points`` gives the
+    total number of points up front.
+    """
+    positions = [
+        sweep.Axis(position.start, position.stop, position.step)
+        if isinstance(position, SweepRange) else position
+        for position in sweep_request.inputs
+    ]
+    points = sweep.size(positions)
+    try:
+        cost_guard.check_batch(points * len(positions))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return StreamingResponse(
+        _stream_sweep(
+            sweep_request.type.value, positions, sweep_request.store,
+            current_user.id, db, sweep_request.expression
+        ),
+        media_type="application/x-ndjson",
+        headers={"X-Sweep-Points": str(points)}
+    )
+
+def _stream_export(data: Iterator[bytes], db: Session) -> Iterator[bytes]:
+    # As with sweeps, the session begins again for the export's reads
+    try:
+        yield from data
+    finally:
+        db.close()
+
+@app.get("/calculations/export", response_class=StreamingResponse, tags=["calculations"])
+def export_calculations(
+    filters: Annotated[CalculationExportFilter, Query()],
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Stream calculation history as an Arrow IPC stream or a Parquet file
+
+    Takes the same filters as ``GET /calculations``. Rows are read and
+    encoded ``EXPORT_CHUNK_ROWS`` at a time, as one record batch (Parquet
+    row group) each; ``inputs`` is a ``list<float64>`` column.
+    """
+    if not columnar.PYARROW_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Columnar export needs pyarrow, which is not installed."
+        )
+    query = columnar.export_query(db, current_user.id, **_filter_arguments(filters))
+    batches = columnar.record_batches(columnar.column_chunks(query, settings.EXPORT_CHUNK_ROWS))
+    return StreamingResponse(
+        _stream_export(columnar.stream(batches, filters.format), db),
+        media_type=columnar.MEDIA_TYPES[filters.format],
+        headers={
+            "Content-Disposition": f'attachment; filename="calculations.{columnar.EXTENSIONS[filters.format]}"'
+        }
+    )
+
+@app.get("/calculations/stats", response_model=CalculationStatsResponse, tags=["calculations"])
+def calculation_stats(
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Summary of the user's calculations, read from the maintained stats table"""
+    return CalculationStatsResponse.from_rows(CalculationStats.for_user(db, current_user.id))
+
+@app.get("/calculations/changes", response_model=CalculationChangesResponse, tags=["calculations"])
+def calculation_changes(
+    since: str = Query("0", description="Token returned by the previous sync; 0 for a full snapshot"),
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Calculations created, updated or deleted after ``since``
+
+    A token older than the retained deletes gets a full snapshot with
+    ``reset`` set, as does ``0``.
+    """
+    try:
+        since_seq = int(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync token.")
+
+    # Reading the version first bounds the window, so a write that commits
+    # mid-sync is picked up by the next call instead of being skipped.
+    current = CalculationVersion.current(db, current_user.id)
+    # Tombstones up to pruned_seq are gone, so an older token gets a snapshot.
+    reset = since_seq <= 0 or since_seq > current or since_seq < CalculationVersion.pruned(db, current_user.id)
+    if reset:
+        since_seq = 0
+
+    changes = Calculation.changed_since(db, current_user.id, since_seq, current).all()
+    deleted = [] if reset else [
+        tombstone.calculation_id
+        for tombstone in CalculationTombstone.since(db, current_user.id, since_seq, current)
+    ]
+    return CalculationChangesResponse(
+        token=str(current),
+        reset=reset,
+        changes=changes,
+        deleted=deleted,
+    )
+
+def _format_event(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+@app.get("/calculations/events", tags=["calculations"])
+async def calculation_events(
+    request: Request,
+    current_user = Depends(get_current_active_user)
+):
+    """Server-Sent Events stream of the user's calculation changes.
+
+    Events carry the change token; clients apply them with
+    ``/calculations/changes``. A ``resync`` event means the client fell
+    behind and some events were dropped.
+    """
+    subscription = broker.subscribe(current_user.id)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.get(),
+                        timeout=settings.EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield _format_event(event)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/calculations/{calc_id}", response_model=CalculationResponse, tags=["calculations"])
+def get_calculation(
     calc_id: str,
-    calculation_update: CalculationUpdate,
+    if_none_match: Annotated[Optional[str], Header()] = None,
     current_user = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -271,25 +1144,139 @@ def update_calculation(
         calc_uuid = UUID(calc_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid calculation id format.")
+
+    def build() -> CachedResponse:
+        if if_none_match:
+            # Check the version columns first so a match never loads the row.
+            current = db.query(Calculation.version, Calculation.updated_at).filter(
+                Calculation.id == calc_uuid,
+                Calculation.user_id == current_user.id,
+                Calculation.deleted_at.is_(None)
+            ).first()
+            if current and etag_matches(if_none_match, item_etag(*current)):
+                return CachedResponse(etag=item_etag(*current))
+        calculation = db.query(Calculation).filter(
+            Calculation.id == calc_uuid,
+            Calculation.user_id == current_user.id,
+            Calculation.deleted_at.is_(None)
+        ).first()
+        if not calculation:
+            raise HTTPException(status_code=404, detail="Calculation not found.")
+        return CachedResponse(
+            etag=item_etag(calculation.version, calculation.updated_at),
+            body=CalculationResponse.model_validate(calculation).model_dump_json().encode()
+        )
+
+    key = f"item:{calc_uuid}"
+    # Any write bumps the collection version, so it also keys item entries.
+    version = CalculationVersion.current(db, current_user.id) if response_cache.enabled else 0
+    entry = read_flights.do(
+        (current_user.id, version, key, if_none_match),
+        lambda: response_cache.get_or_build(current_user.id, version, key, build)
+    )
+    return _cached_json_response(entry, if_none_match)
+
+def _update_calculation(
+    calc_uuid: UUID,
+    calculation_update: CalculationUpdate,
+    current_user,
+    db: Session
+) -> Calculation:
     calculation = db.query(Calculation).filter(
         Calculation.id == calc_uuid,
-        Calculation.user_id == current_user.id
+        Calculation.user_id == current_user.id,
+        Calculation.deleted_at.is_(None)
     ).first()
     if not calculation:
         raise HTTPException(status_code=404, detail="Calculation not found.")
 
+    previous_type, previous_result = calculation.type, calculation.result
     if calculation_update.type is not None:
         calculation.type = calculation_update.type
     if calculation_update.inputs is not None:
-        calculation.inputs = calculation_update.inputs
+        inputs, references = _resolve_inputs(db, current_user.id, calculation_update.inputs)
+        if references:
+            try:
+                downstream = CalculationDependency.downstream(db, calculation.id)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+            if set(references.values()) & {calculation.id, *downstream}:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Inputs would make the calculation depend on itself."
+                )
+        calculation.inputs = inputs
+        calculation.dependencies = _dependency_rows(references)
+    if calculation_update.expression is not None:
+        if calculation.type != "expression":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="expression is only allowed for the expression type"
+            )
+        calculation.expression = calculation_update.expression
+    elif calculation.type != "expression":
+        calculation.expression = None  # Re-typed away from expression
     
     # Recalculate result if type or inputs changed
-    calculation.result = calculation.get_result()
+    try:
+        calculation.result = CalculationPayload.result_for(
+            db, calculation.type, calculation.inputs,
+            compute=partial(_compute_result, expression=calculation.expression),
+            expression=calculation.expression
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     calculation.updated_at = datetime.utcnow()
+    calculation.version = calculation.version + 1
+    calculation.change_seq = CalculationVersion.bump(db, current_user.id)
+    CalculationPayload.attach(db, calculation)
+    db.flush()
+    CalculationStats.record_removed(db, current_user.id, previous_type, previous_result)
+    CalculationStats.record_added(db, calculation)
+    recomputed = []
+    if calculation.result != previous_result:
+        try:
+            recomputed = _recompute_dependents(db, calculation)
+        except HTTPException:
+            db.rollback()
+            raise
     db.commit()
     db.refresh(calculation)
+    broker.publish(current_user.id, {
+        "type": "updated",
+        "id": str(calculation.id),
+        "token": str(calculation.change_seq)
+    })
+    if recomputed:
+        broker.publish(current_user.id, {
+            "type": "updated",
+            "ids": [str(calculation_id) for calculation_id in recomputed],
+            "token": str(calculation.change_seq)
+        })
     return calculation
 
+@app.put("/calculations/{calc_id}", response_model=CalculationResponse, tags=["calculations"])
+def update_calculation(
+    calc_id: str,
+    calculation_update: CalculationUpdate,
+    idempotency_key: Annotated[Optional[str], Header()] = None,
+    current_user = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    try:
+        calc_uuid = UUID(calc_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid calculation id format.")
+    if idempotency_key is None:
+        return _update_calculation(calc_uuid, calculation_update, current_user, db)
+    return _run_idempotent(
+        idempotency_key,
+        current_user,
+        fingerprint("PUT", f"/calculations/{calc_uuid}", calculation_update.model_dump_json()),
+        status.HTTP_200_OK,
+        lambda: _update_calculation(calc_uuid, calculation_update, current_user, db)
+    )
+
 @app.delete("/calculations/{calc_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["calculations"])
 def delete_calculation(
     calc_id: str,
@@ -302,12 +1289,36 @@ def delete_calculation(
         raise HTTPException(status_code=400, detail="Invalid calculation id format.")
     calculation = db.query(Calculation).filter(
         Calculation.id == calc_uuid,
-        Calculation.user_id == current_user.id
+        Calculation.user_id == current_user.id,
+        Calculation.deleted_at.is_(None)
     ).first()
     if not calculation:
         raise HTTPException(status_code=404, detail="Calculation not found.")
-    db.delete(calculation)
+    dependents = CalculationDependency.dependents_count(db, calculation.id)
+    if dependents:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Calculation is an input to {dependents} other calculation(s); change or delete those first."
+        )
+    # Soft delete: the row (and its payload reference) stays until the
+    # purge task removes it in bulk after the retention period.
+    change_seq = CalculationVersion.bump(db, current_user.id)
+    calculation.deleted_at = datetime.utcnow()
+    calculation.change_seq = change_seq
+    calculation.dependencies = []
+    db.flush()
+    CalculationStats.record_removed(db, current_user.id, calculation.type, calculation.result)
+    db.merge(CalculationTombstone(
+        calculation_id=calculation.id,
+        user_id=current_user.id,
+        change_seq=change_seq
+    ))
     db.commit()
+    broker.publish(current_user.id, {
+        "type": "deleted",
+        "id": str(calc_uuid),
+        "token": str(change_seq)
+    })
     return None
 
 
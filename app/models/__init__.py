@@ -1,5 +1,11 @@
 from .user import User
 from .calculation import Calculation, Addition, Subtraction, Multiplication, Division
+from .calculation_stats import CalculationStats
+from .calculation_version import CalculationVersion
+from .calculation_tombstone import CalculationTombstone
+from .calculation_payload import CalculationPayload
+from .calculation_job import CalculationJob
+from .calculation_dependency import CalculationDependency
 
 __all__ = [
     'User',
@@ -8,4 +14,10 @@ __all__ = [
     'Subtraction',
     'Multiplication',
     'Division',
+    'CalculationStats',
+    'CalculationVersion',
+    'CalculationTombstone',
+    'CalculationPayload',
+    'CalculationJob',
+    'CalculationDependency',
 ]
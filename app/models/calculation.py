@@ -2,12 +2,20 @@
 from datetime import datetime
 import uuid
 import math
-from typing import List
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Float
+from functools import partial
+from typing import Callable, List, Optional
+from sqlalchemy import Column, String, DateTime, ForeignKey, Float, Index, Integer, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship, declared_attr
 from sqlalchemy.ext.declarative import declared_attr
 from app.database import Base
+from app.core import reduction, statistics
+from app.core.expression import compile_expression
+
+# Predicates of the partial indexes; queries must repeat ``deleted_at IS
+# NULL`` for the live-row indexes to apply.
+_LIVE = text("deleted_at IS NULL")
+_DELETED = text("deleted_at IS NOT NULL")
 
 class AbstractCalculation:
     
@@ -29,8 +37,7 @@ class AbstractCalculation:
         return Column(
             UUID(as_uuid=True), 
             ForeignKey('users.id', ondelete='CASCADE'),
-            nullable=False,
-            index=True
+            nullable=False
         )
 
     @declared_attr
@@ -42,10 +49,13 @@ class AbstractCalculation:
         )
 
     @declared_attr
-    def inputs(cls):
+    def payload_digest(cls):
+        # Inputs live once per distinct (type, inputs) in calculation_payloads.
         return Column(
-            JSON, 
-            nullable=False
+            String(64),
+            ForeignKey('calculation_payloads.digest'),
+            nullable=False,
+            index=True
         )
 
     @declared_attr
@@ -72,12 +82,91 @@ class AbstractCalculation:
             nullable=False
         )
 
+    @declared_attr
+    def version(cls):
+        return Column(
+            Integer,
+            default=1,
+            nullable=False
+        )
+
+    @declared_attr
+    def change_seq(cls):
+        # Value of the owner's CalculationVersion when this row last changed.
+        return Column(
+            Integer,
+            default=0,
+            nullable=False
+        )
+
+    @declared_attr
+    def deleted_at(cls):
+        # Set by a delete; the row is hard-deleted by the purge task once
+        # PURGE_RETENTION_HOURS have passed. Every read filters on it.
+        return Column(
+            DateTime,
+            nullable=True
+        )
+
     @declared_attr
     def user(cls):
         return relationship("User", back_populates="calculations")
 
+    @declared_attr
+    def payload(cls):
+        return relationship("CalculationPayload", lazy="joined", innerjoin=True)
+
+    @declared_attr
+    def dependencies(cls):
+        # Inputs taken from other calculations' results; see CalculationDependency.
+        return relationship(
+            "CalculationDependency",
+            foreign_keys="CalculationDependency.calculation_id",
+            order_by="CalculationDependency.position",
+            cascade="all, delete-orphan",
+            lazy="selectin"
+        )
+
+    @property
+    def inputs(self) -> Optional[List[float]]:
+        # Inputs assigned on this instance win until the row is re-attached
+        # to the payload for its new content.
+        pending = getattr(self, "_inputs", None)
+        if pending is not None:
+            return pending
+        payload = self.payload
+        return payload.inputs if payload is not None else None
+
+    @inputs.setter
+    def inputs(self, value: List[float]) -> None:
+        self._inputs = value
+
+    @property
+    def expression(self) -> Optional[str]:
+        """Formula of an ``expression`` calculation; ``None`` for the other types."""
+        if hasattr(self, "_expression"):
+            return self._expression
+        payload = self.payload
+        return payload.expression if payload is not None else None
+
+    @expression.setter
+    def expression(self, value: Optional[str]) -> None:
+        self._expression = value
+
+    @classmethod
+    def create(
+        cls,
+        calculation_type: str,
+        user_id: uuid.UUID,
+        inputs: List[float],
+        expression: Optional[str] = None
+    ) -> "Calculation":
+        calculation = cls.class_for(calculation_type)(user_id=user_id, inputs=inputs, dependencies=[])
+        calculation.expression = expression
+        return calculation
+
     @classmethod
-    def create(cls, calculation_type: str, user_id: uuid.UUID, inputs: List[float]) -> "Calculation":
+    def class_for(cls, calculation_type: str) -> type:
         calculation_classes = {
             'addition': Addition,
             'subtraction': Subtraction,
@@ -89,19 +178,108 @@ class AbstractCalculation:
             'tan': Tan,
             'exponential': Exponential,
             'power': Power,
+            'mean': Mean,
+            'variance': Variance,
+            'stddev': StandardDeviation,
+            'median': Median,
+            'percentile': Percentile,
+            'expression': Expression,
         }
         calculation_class = calculation_classes.get(calculation_type.lower())
         if not calculation_class:
             raise ValueError(f"Unsupported calculation type: {calculation_type}")
-        return calculation_class(user_id=user_id, inputs=inputs)
+        return calculation_class
 
-    def get_result(self) -> float:
+    @classmethod
+    def evaluate(cls, calculation_type: str, inputs: List[float], expression: Optional[str] = None) -> float:
+        """Compute the result for ``(type, inputs)`` without an owning row."""
+        return cls.compute_function(calculation_type, expression)(inputs)
+
+    @classmethod
+    def compute_function(
+        cls,
+        calculation_type: str,
+        expression: Optional[str] = None
+    ) -> Callable[[List[float]], float]:
+        """``inputs -> result`` for one type, for evaluating many input lists."""
+        if calculation_type.lower() == "expression":
+            return partial(Expression.compute_expression, expression)
+        return cls.class_for(calculation_type).compute
+
+    @classmethod
+    def filter_for_user(
+        cls,
+        db,
+        user_id: uuid.UUID,
+        calculation_type: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        min_result: Optional[float] = None,
+        max_result: Optional[float] = None,
+        sort_by: str = "created_at",
+        order: str = "desc",
+    ):
+        """Build the filtered listing query for one user.
+
+        Every filter keeps ``user_id`` as the leading equality, and excludes
+        soft-deleted rows, so the partial composite indexes declared on
+        ``Calculation`` can serve it.
+        """
+        query = db.query(cls).filter(cls.user_id == user_id, cls.deleted_at.is_(None))
+        if calculation_type is not None:
+            query = query.filter(cls.type == calculation_type)
+        if created_after is not None:
+            query = query.filter(cls.created_at >= created_after)
+        if created_before is not None:
+            query = query.filter(cls.created_at <= created_before)
+        if min_result is not None:
+            query = query.filter(cls.result >= min_result)
+        if max_result is not None:
+            query = query.filter(cls.result <= max_result)
+
+        sort_column = cls.result if sort_by == "result" else cls.created_at
+        if order == "asc":
+            return query.order_by(sort_column.asc(), cls.id.asc())
+        return query.order_by(sort_column.desc(), cls.id.desc())
+
+    @classmethod
+    def changed_since(cls, db, user_id: uuid.UUID, since: int, until: int):
+        """Rows whose change sequence falls in ``(since, until]``."""
+        return db.query(cls).filter(
+            cls.user_id == user_id,
+            cls.deleted_at.is_(None),
+            cls.change_seq > since,
+            cls.change_seq <= until
+        ).order_by(cls.change_seq)
+
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
         raise NotImplementedError
 
+    def get_result(self) -> float:
+        return self.compute(self.inputs)
+
     def __repr__(self):
         return f"<Calculation(type={self.type}, inputs={self.inputs})>"
 
 class Calculation(Base, AbstractCalculation):
+    # Composite indexes for the per-user listing filters. ``user_id`` leads
+    # every index, so the old single-column user_id index is redundant.
+    # They are partial, over live rows only: soft-deleted rows waiting for
+    # the purge add nothing to the hot read paths.
+    __table_args__ = (
+        Index('ix_calculations_user_type_created', 'user_id', 'type', 'created_at',
+              postgresql_where=_LIVE, sqlite_where=_LIVE),
+        Index('ix_calculations_user_created', 'user_id', 'created_at',
+              postgresql_where=_LIVE, sqlite_where=_LIVE),
+        Index('ix_calculations_user_result', 'user_id', 'result',
+              postgresql_where=_LIVE, sqlite_where=_LIVE),
+        Index('ix_calculations_user_change_seq', 'user_id', 'change_seq',
+              postgresql_where=_LIVE, sqlite_where=_LIVE),
+        Index('ix_calculations_deleted_at', 'deleted_at',
+              postgresql_where=_DELETED, sqlite_where=_DELETED),
+    )
+
     __mapper_args__ = {
         "polymorphic_on": "type",
         "polymorphic_identity": "calculation",
@@ -111,64 +289,58 @@ class Calculation(Base, AbstractCalculation):
 class Addition(Calculation):
     __mapper_args__ = {"polymorphic_identity": "addition"}
 
-    def get_result(self) -> float:
-        if not isinstance(self.inputs, list):
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
+        if not isinstance(inputs, list):
             raise ValueError("Inputs must be a list of numbers.")
-        if len(self.inputs) < 2:
+        if len(inputs) < 2:
             raise ValueError("Inputs must be a list with at least two numbers.")
-        return sum(self.inputs)
+        return reduction.evaluate("addition", inputs)
 
 class Subtraction(Calculation):
     __mapper_args__ = {"polymorphic_identity": "subtraction"}
 
-    def get_result(self) -> float:
-        if not isinstance(self.inputs, list):
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
+        if not isinstance(inputs, list):
             raise ValueError("Inputs must be a list of numbers.")
-        if len(self.inputs) < 2:
+        if len(inputs) < 2:
             raise ValueError("Inputs must be a list with at least two numbers.")
-        result = self.inputs[0]
-        for value in self.inputs[1:]:
-            result -= value
-        return result
+        return reduction.evaluate("subtraction", inputs)
 
 class Multiplication(Calculation):
     __mapper_args__ = {"polymorphic_identity": "multiplication"}
 
-    def get_result(self) -> float:
-        if not isinstance(self.inputs, list):
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
+        if not isinstance(inputs, list):
             raise ValueError("Inputs must be a list of numbers.")
-        if len(self.inputs) < 2:
+        if len(inputs) < 2:
             raise ValueError("Inputs must be a list with at least two numbers.")
-        result = 1
-        for value in self.inputs:
-            result *= value
-        return result
+        return reduction.evaluate("multiplication", inputs)
 
 class Division(Calculation):
     __mapper_args__ = {"polymorphic_identity": "division"}
 
-    def get_result(self) -> float:
-        if not isinstance(self.inputs, list):
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
+        if not isinstance(inputs, list):
             raise ValueError("Inputs must be a list of numbers.")
-        if len(self.inputs) < 2:
+        if len(inputs) < 2:
             raise ValueError("Inputs must be a list with at least two numbers.")
-        result = self.inputs[0]
-        for value in self.inputs[1:]:
-            if value == 0:
-                raise ValueError("Cannot divide by zero.")
-            result /= value
-        return result
+        return reduction.evaluate("division", inputs)
 
 class Modulus(Calculation):
     __mapper_args__ = {"polymorphic_identity": "modulus"}
 
-    def get_result(self) -> float:
-        if not isinstance(self.inputs, list):
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
+        if not isinstance(inputs, list):
             raise ValueError("Inputs must be a list of numbers.")
-        if len(self.inputs) < 2:
+        if len(inputs) < 2:
             raise ValueError("Inputs must be a list with at least two numbers.")
-        result = self.inputs[0]
-        for value in self.inputs[1:]:
+        result = inputs[0]
+        for value in inputs[1:]:
             if value == 0:
                 raise ValueError("Cannot perform modulus with zero.")
             result = result % value
@@ -177,37 +349,40 @@ class Modulus(Calculation):
 class Sin(Calculation):
     __mapper_args__ = {"polymorphic_identity": "sin"}
 
-    def get_result(self) -> float:
-        if not isinstance(self.inputs, list):
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
+        if not isinstance(inputs, list):
             raise ValueError("Inputs must be a list of numbers.")
-        if len(self.inputs) < 1:
+        if len(inputs) < 1:
             raise ValueError("At least one number is required for sine calculation.")
         # Sum all inputs and take sine of the result
-        total = sum(self.inputs)
+        total = sum(inputs)
         return math.sin(math.radians(total))
 
 class Cos(Calculation):
     __mapper_args__ = {"polymorphic_identity": "cos"}
 
-    def get_result(self) -> float:
-        if not isinstance(self.inputs, list):
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
+        if not isinstance(inputs, list):
             raise ValueError("Inputs must be a list of numbers.")
-        if len(self.inputs) < 1:
+        if len(inputs) < 1:
             raise ValueError("At least one number is required for cosine calculation.")
         # Sum all inputs and take cosine of the result
-        total = sum(self.inputs)
+        total = sum(inputs)
         return math.cos(math.radians(total))
 
 class Tan(Calculation):
     __mapper_args__ = {"polymorphic_identity": "tan"}
 
-    def get_result(self) -> float:
-        if not isinstance(self.inputs, list):
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
+        if not isinstance(inputs, list):
             raise ValueError("Inputs must be a list of numbers.")
-        if len(self.inputs) < 1:
+        if len(inputs) < 1:
             raise ValueError("At least one number is required for tangent calculation.")
         # Sum all inputs and take tangent of the result
-        total = sum(self.inputs)
+        total = sum(inputs)
         angle_radians = math.radians(total)
         # Check if cos(angle) is close to 0
         if abs(math.cos(angle_radians)) < 1e-10:
@@ -217,24 +392,113 @@ class Tan(Calculation):
 class Exponential(Calculation):
     __mapper_args__ = {"polymorphic_identity": "exponential"}
 
-    def get_result(self) -> float:
-        if not isinstance(self.inputs, list):
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
+        if not isinstance(inputs, list):
             raise ValueError("Inputs must be a list of numbers.")
-        if len(self.inputs) < 1:
+        if len(inputs) < 1:
             raise ValueError("At least one number is required for exponential calculation.")
         # For multiple inputs, calculate e^(sum of inputs)
-        total = sum(self.inputs)
-        return math.exp(total)
+        total = sum(inputs)
+        try:
+            return math.exp(total)
+        except OverflowError:
+            raise ValueError("Result is too large to represent.")
 
 class Power(Calculation):
     __mapper_args__ = {"polymorphic_identity": "power"}
 
-    def get_result(self) -> float:
-        if not isinstance(self.inputs, list):
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
+        if not isinstance(inputs, list):
             raise ValueError("Inputs must be a list of numbers.")
-        if len(self.inputs) < 2:
+        if len(inputs) < 2:
             raise ValueError("At least two numbers are required for power calculation.")
         # Calculate first number to the power of second number
-        base = self.inputs[0]
-        exponent = self.inputs[1]
-        return base ** exponent
+        base = inputs[0]
+        exponent = inputs[1]
+        if base == 0 and exponent < 0:
+            raise ValueError("Zero cannot be raised to a negative power.")
+        if base < 0 and not float(exponent).is_integer():
+            raise ValueError("A negative base needs an integer exponent.")
+        try:
+            return base ** exponent
+        except OverflowError:
+            raise ValueError("Result is too large to represent.")
+
+class Mean(Calculation):
+    __mapper_args__ = {"polymorphic_identity": "mean"}
+
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
+        if not isinstance(inputs, list):
+            raise ValueError("Inputs must be a list of numbers.")
+        if len(inputs) < 1:
+            raise ValueError("At least one number is required for the mean.")
+        return statistics.mean(inputs)
+
+class Variance(Calculation):
+    """Sample variance (n - 1 denominator)."""
+    __mapper_args__ = {"polymorphic_identity": "variance"}
+
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
+        if not isinstance(inputs, list):
+            raise ValueError("Inputs must be a list of numbers.")
+        if len(inputs) < 2:
+            raise ValueError("At least two numbers are required for the variance.")
+        return statistics.variance(inputs)
+
+class StandardDeviation(Calculation):
+    """Sample standard deviation (n - 1 denominator)."""
+    __mapper_args__ = {"polymorphic_identity": "stddev"}
+
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
+        if not isinstance(inputs, list):
+            raise ValueError("Inputs must be a list of numbers.")
+        if len(inputs) < 2:
+            raise ValueError("At least two numbers are required for the standard deviation.")
+        return statistics.stddev(inputs)
+
+class Median(Calculation):
+    __mapper_args__ = {"polymorphic_identity": "median"}
+
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
+        if not isinstance(inputs, list):
+            raise ValueError("Inputs must be a list of numbers.")
+        if len(inputs) < 1:
+            raise ValueError("At least one number is required for the median.")
+        return statistics.median(inputs)
+
+class Percentile(Calculation):
+    """The first input is the percentile (0-100) of the remaining inputs."""
+    __mapper_args__ = {"polymorphic_identity": "percentile"}
+
+    @staticmethod
+    def compute(inputs: List[float]) -> float:
+        if not isinstance(inputs, list):
+            raise ValueError("Inputs must be a list of numbers.")
+        if len(inputs) < 2:
+            raise ValueError("A percentile and at least one number are required.")
+        return statistics.percentile(inputs)
+
+class Expression(Calculation):
+    """A formula over the inputs, e.g. ``(a + b) * sin(c)``.
+
+    See ``app.core.expression`` for the accepted syntax; variables bind to
+    the inputs in alphabetical order.
+    """
+    __mapper_args__ = {"polymorphic_identity": "expression"}
+
+    @staticmethod
+    def compute_expression(expression: Optional[str], inputs: List[float]) -> float:
+        if not expression:
+            raise ValueError("An expression calculation needs an expression.")
+        if not isinstance(inputs, list):
+            raise ValueError("Inputs must be a list of numbers.")
+        return compile_expression(expression)(inputs)
+
+    def get_result(self) -> float:
+        return self.compute_expression(self.expression, self.inputs)
@@ -0,0 +1,197 @@
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from sqlalchemy import Column, ForeignKey, Index, Integer, bindparam
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+from app.models.calculation import Calculation
+from app.models.calculation_payload import CalculationPayload
+from app.models.calculation_stats import CalculationStats
+
+# Ids per IN (...) lookup; stays under SQLite's bound-parameter limit.
+_IN_CHUNK = 500
+
+class CalculationDependency(Base):
+    """One input of a calculation that takes another calculation's result.
+
+    The input at ``position`` of ``calculation_id`` is the current result
+    of ``source_id``. The edges form a DAG per user; the resolved value is
+    also kept in the calculation's payload inputs, so reading a calculation
+    never walks the graph.
+    """
+    __tablename__ = "calculation_dependencies"
+    __table_args__ = (
+        Index('ix_calculation_dependencies_source', 'source_id'),
+    )
+
+    calculation_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('calculations.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    position = Column(Integer, primary_key=True)
+    source_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('calculations.id', ondelete='CASCADE'),
+        nullable=False
+    )
+
+    def __repr__(self):
+        return (
+            f"<CalculationDependency(calculation_id={self.calculation_id}, "
+            f"position={self.position}, source_id={self.source_id})>"
+        )
+
+    @classmethod
+    def _edges_from(cls, db, sources: Iterable[uuid.UUID]):
+        sources = list(sources)
+        for start in range(0, len(sources), _IN_CHUNK):
+            yield from db.query(cls.source_id, cls.calculation_id).filter(
+                cls.source_id.in_(sources[start:start + _IN_CHUNK])
+            )
+
+    @classmethod
+    def downstream(cls, db, calculation_id: uuid.UUID) -> List[uuid.UUID]:
+        """Everything that depends on ``calculation_id``, in topological order.
+
+        Walks the graph one level per query, then orders the subgraph so
+        every calculation comes after all of its affected sources. Raises
+        ``ValueError`` if the walk finds a cycle.
+        """
+        children: Dict[uuid.UUID, Set[uuid.UUID]] = defaultdict(set)
+        frontier, seen = {calculation_id}, {calculation_id}
+        while frontier:
+            found = set()
+            for source_id, dependent_id in cls._edges_from(db, frontier):
+                children[source_id].add(dependent_id)
+                found.add(dependent_id)
+            frontier = found - seen
+            seen |= frontier
+
+        indegree: Dict[uuid.UUID, int] = defaultdict(int)
+        for dependents in children.values():
+            for dependent_id in dependents:
+                indegree[dependent_id] += 1
+        if indegree[calculation_id]:
+            raise ValueError("Calculation graph has a cycle.")
+        order, ready = [], [calculation_id]
+        while ready:
+            node = ready.pop()
+            for dependent_id in children[node]:
+                indegree[dependent_id] -= 1
+                if not indegree[dependent_id]:
+                    order.append(dependent_id)
+                    ready.append(dependent_id)
+        if len(order) != len(seen) - 1:
+            raise ValueError("Calculation graph has a cycle.")
+        return order
+
+    @classmethod
+    def sources_of(cls, db, calculation_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, Dict[int, uuid.UUID]]:
+        """``{calculation_id: {position: source_id}}`` for the given calculations."""
+        calculation_ids = list(calculation_ids)
+        sources: Dict[uuid.UUID, Dict[int, uuid.UUID]] = defaultdict(dict)
+        for start in range(0, len(calculation_ids), _IN_CHUNK):
+            for edge in db.query(cls).filter(
+                cls.calculation_id.in_(calculation_ids[start:start + _IN_CHUNK])
+            ):
+                sources[edge.calculation_id][edge.position] = edge.source_id
+        return sources
+
+    @classmethod
+    def dependents_count(cls, db, calculation_id: uuid.UUID) -> int:
+        return db.query(cls.calculation_id).filter(cls.source_id == calculation_id).distinct().count()
+
+    @classmethod
+    def dependents_outside(cls, db, matched) -> int:
+        """Calculations outside ``matched`` (a SELECT of ids) that take an input from one inside it."""
+        return db.query(cls.calculation_id).filter(
+            cls.source_id.in_(matched),
+            cls.calculation_id.not_in(matched)
+        ).distinct().count()
+
+    @classmethod
+    def recompute_downstream(
+        cls,
+        db,
+        source: Calculation,
+        compute: Optional[Callable[..., float]] = None
+    ) -> List[uuid.UUID]:
+        """Bring everything downstream of ``source`` up to date with its result.
+
+        Dependents are evaluated in topological order, in memory, with
+        ``compute(type, inputs, expression=...)`` (by default
+        ``Calculation.evaluate``); one whose resolved inputs did not change
+        is skipped, and so is anything only it feeds. The changed rows are
+        then written in bulk: payload references per (type, expression),
+        one executemany UPDATE sharing ``source``'s change sequence, and
+        one release pass for the old payloads. Each changed result is moved
+        in its user's stats incrementally. Raises ``ValueError`` if a
+        dependent can no longer be computed; the caller rolls back.
+        Returns the ids of the recomputed calculations.
+        """
+        compute = compute or Calculation.evaluate
+        order = cls.downstream(db, source.id)
+        if not order:
+            return []
+        nodes = {
+            node.id: node
+            for node in db.query(Calculation).filter(Calculation.id.in_(order))
+        }
+        sources = cls.sources_of(db, order)
+
+        results = {source.id: source.result}
+        changed = []
+        for node_id in order:
+            node = nodes[node_id]
+            inputs = list(node.inputs)
+            for position, source_id in sources[node_id].items():
+                if source_id in results:
+                    inputs[position] = results[source_id]
+            if inputs == node.inputs:
+                continue
+            try:
+                result = compute(node.type, inputs, expression=node.expression)
+            except ValueError as e:
+                raise ValueError(f"Dependent calculation {node_id} cannot be recomputed: {e}")
+            results[node_id] = result
+            changed.append((node, inputs, result))
+        if not changed:
+            return []
+
+        groups = defaultdict(list)
+        for entry in changed:
+            groups[(entry[0].type, entry[0].expression)].append(entry)
+        rows = []
+        for (calculation_type, expression), entries in groups.items():
+            digests = CalculationPayload.acquire_many(
+                db, calculation_type,
+                [inputs for _, inputs, _ in entries],
+                [result for _, _, result in entries],
+                expression
+            )
+            rows.extend(
+                {"b_id": node.id, "b_result": result, "b_digest": digest}
+                for (node, _, result), digest in zip(entries, digests)
+            )
+        table = Calculation.__table__
+        db.execute(
+            table.update()
+            .where(table.c.id == bindparam("b_id"))
+            .values(
+                result=bindparam("b_result"),
+                payload_digest=bindparam("b_digest"),
+                updated_at=datetime.utcnow(),
+                version=table.c.version + 1,
+                change_seq=source.change_seq
+            ),
+            rows
+        )
+        CalculationPayload.release_many(db, [node.payload_digest for node, _, _ in changed])
+        for node, _, result in changed:
+            # The rows are updated, so removing an old extreme re-reads the new ones.
+            CalculationStats.record_removed(db, node.user_id, node.type, node.result)
+            CalculationStats.record_added_many(db, node.user_id, node.type, [result])
+            db.expire(node)
+        return [node.id for node, _, _ in changed]
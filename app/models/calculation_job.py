@@ -0,0 +1,61 @@
+from datetime import datetime
+import uuid
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Float, Index, Text
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+class CalculationJob(Base):
+    """A calculation queued to run in the background.
+
+    The row is the job's durable state: it is written when the job is
+    accepted and moves ``queued -> running -> succeeded | failed``, or to
+    ``cancelled`` from either of the first two. A successful job stores its
+    result as an ordinary calculation and links it by ``calculation_id``.
+
+    While ``running``, ``owner`` names the process running the job and
+    ``heartbeat_at`` is refreshed periodically, so a restarting process
+    can tell jobs that are still alive elsewhere from ones left behind.
+    """
+    __tablename__ = "calculation_jobs"
+    __table_args__ = (
+        Index('ix_calculation_jobs_user_created', 'user_id', 'created_at'),
+        Index('ix_calculation_jobs_status', 'status'),
+    )
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('users.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    type = Column(String(50), nullable=False)
+    inputs = Column(JSON, nullable=False)
+    expression = Column(Text, nullable=True)
+    job_class = Column(String(20), nullable=False)
+    status = Column(String(20), default=QUEUED, nullable=False)
+    result = Column(Float, nullable=True)
+    error = Column(Text, nullable=True)
+    calculation_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('calculations.id', ondelete='SET NULL'),
+        nullable=True
+    )
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    owner = Column(String(100), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<CalculationJob(id={self.id}, type={self.type}, status={self.status})>"
+
+    @classmethod
+    def for_user(cls, db, job_id: uuid.UUID, user_id: uuid.UUID) -> "CalculationJob":
+        return db.query(cls).filter(cls.id == job_id, cls.user_id == user_id).first()
@@ -0,0 +1,242 @@
+from datetime import datetime
+import hashlib
+import json
+from collections import Counter
+from functools import partial
+from typing import Callable, Iterable, List, Optional, Sequence, Set
+from sqlalchemy import Column, String, DateTime, JSON, Float, Integer, Text, bindparam, delete, func, insert, update
+from sqlalchemy.exc import IntegrityError
+from app.database import Base
+from app.models.calculation import Calculation
+
+# Digests per IN (...) lookup; stays under SQLite's bound-parameter limit.
+_IN_CHUNK = 500
+
+def content_digest(calculation_type: str, inputs: List[float], expression: Optional[str] = None) -> str:
+    """Content address of a ``(type, inputs)`` pair.
+
+    Inputs are canonicalised to floats so ``[1, 2]`` and ``[1.0, 2.0]``
+    share a payload, matching how the API schema coerces them. An
+    ``expression`` calculation's text is part of its content.
+    """
+    content = {"type": calculation_type.lower(), "inputs": [float(value) for value in inputs]}
+    if expression is not None:
+        content["expression"] = expression
+    canonical = json.dumps(content, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class CalculationPayload(Base):
+    """Inputs and result of a ``(type, inputs)`` pair, stored once for everyone.
+
+    Calculation rows reference a payload by digest instead of keeping their
+    own copy, and ``ref_count`` tracks how many rows do. The last reference
+    to go deletes the payload.
+    """
+    __tablename__ = "calculation_payloads"
+
+    digest = Column(String(64), primary_key=True)
+    type = Column(String(50), nullable=False)
+    inputs = Column(JSON, nullable=False)
+    expression = Column(Text, nullable=True)
+    result = Column(Float, nullable=True)
+    ref_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<CalculationPayload(digest={self.digest[:12]}, type={self.type}, refs={self.ref_count})>"
+
+    @classmethod
+    def result_for(
+        cls,
+        db,
+        calculation_type: str,
+        inputs: List[float],
+        compute: Optional[Callable[[str, List[float]], float]] = None,
+        expression: Optional[str] = None
+    ) -> float:
+        """Result for ``(type, inputs)``, computed only if nobody has yet.
+
+        On a miss ``compute(type, inputs)`` produces it, by default
+        ``Calculation.evaluate`` of ``expression``. Raises ``ValueError``
+        for unsupported types and invalid inputs.
+        """
+        stored = db.query(cls.result).filter(
+            cls.digest == content_digest(calculation_type, inputs, expression)
+        ).first()
+        if stored is not None:
+            return stored.result
+        if compute is None:
+            compute = partial(Calculation.evaluate, expression=expression)
+        return compute(calculation_type, inputs)
+
+    @classmethod
+    def acquire(
+        cls,
+        db,
+        calculation_type: str,
+        inputs: List[float],
+        result: float,
+        references: int = 1,
+        expression: Optional[str] = None
+    ) -> str:
+        """Take ``references`` on the payload for ``(type, inputs)``, creating it if needed."""
+        digest = content_digest(calculation_type, inputs, expression)
+        while True:
+            # Incrementing first means an existing payload cannot be released
+            # out from under us between a lookup and the reference.
+            updated = db.execute(
+                update(cls)
+                .where(cls.digest == digest)
+                .values(ref_count=cls.ref_count + references)
+            )
+            if updated.rowcount:
+                return digest
+            try:
+                with db.begin_nested():
+                    db.add(cls(
+                        digest=digest,
+                        type=calculation_type.lower(),
+                        inputs=[float(value) for value in inputs],
+                        expression=expression,
+                        result=result,
+                        ref_count=references
+                    ))
+                return digest
+            except IntegrityError:
+                continue  # A concurrent writer created it first; reference theirs.
+
+    @classmethod
+    def _existing(cls, db, digests: Iterable[str]) -> Set[str]:
+        digests, found = list(digests), set()
+        for start in range(0, len(digests), _IN_CHUNK):
+            found.update(
+                digest for digest, in db.query(cls.digest).filter(
+                    cls.digest.in_(digests[start:start + _IN_CHUNK])
+                )
+            )
+        return found
+
+    @classmethod
+    def acquire_many(
+        cls,
+        db,
+        calculation_type: str,
+        rows: Sequence[List[float]],
+        results: Sequence[float],
+        expression: Optional[str] = None
+    ) -> List[str]:
+        """``acquire`` for every row, with a few set-based statements.
+
+        Returns the digests in row order. Rows sharing content take all
+        their references with one increment.
+        """
+        digests = [content_digest(calculation_type, row, expression) for row in rows]
+        counts = Counter(digests)
+        content = {}
+        for digest, row, result in zip(digests, rows, results):
+            content.setdefault(digest, (row, result))
+
+        existing = cls._existing(db, counts)
+        if existing:
+            table = cls.__table__
+            db.execute(
+                table.update()
+                .where(table.c.digest == bindparam("b_digest"))
+                .values(ref_count=table.c.ref_count + bindparam("b_references")),
+                [{"b_digest": digest, "b_references": counts[digest]} for digest in existing]
+            )
+            # A payload released between the lookup and the increment is
+            # gone; create it again below.
+            existing &= cls._existing(db, existing)
+
+        missing = [digest for digest in counts if digest not in existing]
+        if missing:
+            now = datetime.utcnow()
+            try:
+                with db.begin_nested():
+                    db.execute(insert(cls), [
+                        {
+                            "digest": digest,
+                            "type": calculation_type.lower(),
+                            "inputs": [float(value) for value in content[digest][0]],
+                            "expression": expression,
+                            "result": content[digest][1],
+                            "ref_count": counts[digest],
+                            "created_at": now,
+                        }
+                        for digest in missing
+                    ])
+            except IntegrityError:
+                # A concurrent writer created some of them; go one by one.
+                for digest in missing:
+                    row, result = content[digest]
+                    cls.acquire(
+                        db, calculation_type, row, result,
+                        references=counts[digest], expression=expression
+                    )
+        return digests
+
+    @classmethod
+    def release(cls, db, digest: str) -> None:
+        """Drop one reference and delete the payload once nothing refers to it."""
+        db.execute(
+            update(cls)
+            .where(cls.digest == digest)
+            .values(ref_count=cls.ref_count - 1)
+        )
+        db.execute(delete(cls).where(cls.digest == digest, cls.ref_count <= 0))
+
+    @classmethod
+    def release_many(cls, db, digests: Iterable[str]) -> None:
+        """``release`` once per digest given, with set-based statements."""
+        counts = Counter(digests)
+        if not counts:
+            return
+        table = cls.__table__
+        db.execute(
+            table.update()
+            .where(table.c.digest == bindparam("b_digest"))
+            .values(ref_count=table.c.ref_count - bindparam("b_references")),
+            [{"b_digest": digest, "b_references": count} for digest, count in counts.items()]
+        )
+        digests = list(counts)
+        for start in range(0, len(digests), _IN_CHUNK):
+            db.execute(delete(cls).where(
+                cls.digest.in_(digests[start:start + _IN_CHUNK]),
+                cls.ref_count <= 0
+            ))
+
+    @classmethod
+    def attach(cls, db, calculation: Calculation) -> None:
+        """Point ``calculation`` at the payload for its current type and inputs.
+
+        Releases the previous payload when the content changed; a no-op when
+        it did not. Call before flushing the calculation row.
+        """
+        digest = content_digest(calculation.type, calculation.inputs, calculation.expression)
+        previous = calculation.payload_digest
+        if digest == previous:
+            return
+        calculation.payload_digest = cls.acquire(
+            db, calculation.type, calculation.inputs, calculation.result,
+            expression=calculation.expression
+        )
+        if previous is not None:
+            db.flush()
+            cls.release(db, previous)
+
+    @classmethod
+    def recount(cls, db) -> int:
+        """Reset every ``ref_count`` from the calculations table.
+
+        Repairs counts after rows were removed outside the API (e.g. by the
+        ``ON DELETE CASCADE`` from users) and deletes the orphaned payloads.
+        Returns the number of payloads removed.
+        """
+        counts = (
+            db.query(func.count(Calculation.id))
+            .filter(Calculation.payload_digest == cls.digest)
+            .scalar_subquery()
+        )
+        db.execute(update(cls).values(ref_count=counts))
+        return db.execute(delete(cls).where(cls.ref_count <= 0)).rowcount
@@ -0,0 +1,209 @@
+from datetime import datetime
+import math
+import uuid
+from typing import List, Optional
+from sqlalchemy import Column, String, DateTime, ForeignKey, Float, Integer, case, func, delete
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.exc import IntegrityError
+from app.database import Base
+from app.models.calculation import Calculation
+
+class CalculationStats(Base):
+    """Per-user, per-type running totals over the ``calculations`` table.
+
+    Rows are maintained incrementally by the calculation write endpoints in
+    the same transaction as the write itself, so reading a user's summary
+    never scans ``calculations``.
+    """
+    __tablename__ = "calculation_stats"
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('users.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    type = Column(String(50), primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+    total = Column(Float, default=0.0, nullable=False)
+    min_result = Column(Float, nullable=True)
+    max_result = Column(Float, nullable=True)
+    last_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<CalculationStats(user_id={self.user_id}, type={self.type}, count={self.count})>"
+
+    @classmethod
+    def _get_or_create(cls, db, user_id: uuid.UUID, calculation_type: str) -> "CalculationStats":
+        while True:
+            stats = db.get(cls, (user_id, calculation_type))
+            if stats is not None:
+                return stats
+            try:
+                with db.begin_nested():
+                    stats = cls(user_id=user_id, type=calculation_type, count=0, total=0.0)
+                    db.add(stats)
+                return stats
+            except IntegrityError:
+                continue  # A concurrent first write created the row; fold into theirs.
+
+    @classmethod
+    def record_added(cls, db, calculation: Calculation, at: Optional[datetime] = None) -> None:
+        """Fold a new (or newly re-typed) calculation into its user's totals."""
+        result = calculation.result
+        cls._fold(
+            db, calculation.user_id, calculation.type, 1,
+            result, result, result,
+            at or calculation.updated_at or datetime.utcnow()
+        )
+
+    @classmethod
+    def record_added_many(
+        cls,
+        db,
+        user_id: uuid.UUID,
+        calculation_type: str,
+        results: List[float],
+        at: Optional[datetime] = None
+    ) -> None:
+        """Fold a batch of new calculations of one type into the totals at once."""
+        if not results:
+            return
+        cls._fold(
+            db, user_id, calculation_type, len(results),
+            math.fsum(results), min(results), max(results),
+            at or datetime.utcnow()
+        )
+
+    @classmethod
+    def _fold(
+        cls,
+        db,
+        user_id: uuid.UUID,
+        calculation_type: str,
+        count: int,
+        total: Optional[float],
+        low: Optional[float],
+        high: Optional[float],
+        at: datetime
+    ) -> None:
+        stats = cls._get_or_create(db, user_id, calculation_type)
+        # SQL expressions keep concurrent writers from losing increments.
+        stats.count = cls.count + count
+        stats.last_at = at
+        if total is not None:
+            stats.total = cls.total + total
+            stats.min_result = case(
+                (cls.min_result.is_(None), low),
+                (cls.min_result > low, low),
+                else_=cls.min_result
+            )
+            stats.max_result = case(
+                (cls.max_result.is_(None), high),
+                (cls.max_result < high, high),
+                else_=cls.max_result
+            )
+        db.flush()
+
+    @classmethod
+    def record_removed(
+        cls,
+        db,
+        user_id: uuid.UUID,
+        calculation_type: str,
+        result: Optional[float],
+        at: Optional[datetime] = None
+    ) -> None:
+        """Take a deleted (or re-typed) calculation out of its user's totals.
+
+        Must run after the calculation row itself has been (soft-)deleted or
+        changed and flushed, because removing the current min or max re-reads the
+        remaining rows for that user and type.
+        """
+        cls.record_removed_many(db, user_id, calculation_type, [result], at=at)
+
+    @classmethod
+    def record_removed_many(
+        cls,
+        db,
+        user_id: uuid.UUID,
+        calculation_type: str,
+        results: List[Optional[float]],
+        at: Optional[datetime] = None
+    ) -> None:
+        """Take a batch of calculations of one type out of the totals at once.
+
+        The same ordering rule as ``record_removed`` applies; the remaining
+        rows are re-read at most once for the whole batch.
+        """
+        if not results:
+            return
+        stats = db.get(cls, (user_id, calculation_type))
+        if stats is None:
+            return
+        if stats.count <= len(results):
+            db.delete(stats)
+            db.flush()
+            return
+
+        stats.count = cls.count - len(results)
+        stats.last_at = at or datetime.utcnow()
+        known = [result for result in results if result is not None]
+        if known:
+            stats.total = cls.total - math.fsum(known)
+            if stats.min_result in known or stats.max_result in known:
+                # Only an extreme value forces a look at the remaining rows,
+                # and (user_id, type, ...) is indexed.
+                remaining = db.query(
+                    func.min(Calculation.result), func.max(Calculation.result)
+                ).filter(
+                    Calculation.user_id == user_id,
+                    Calculation.deleted_at.is_(None),
+                    Calculation.type == calculation_type
+                ).one()
+                stats.min_result, stats.max_result = remaining
+        db.flush()
+
+    @classmethod
+    def rebuild(cls, db, user_id: Optional[uuid.UUID] = None) -> int:
+        """Recompute the table from ``calculations`` with one grouped query.
+
+        Rebuilds every user's rows, or only ``user_id``'s when given. Returns
+        the number of stats rows written. The caller owns the commit.
+        """
+        clear = delete(cls)
+        grouped = db.query(
+            Calculation.user_id,
+            Calculation.type,
+            func.count(Calculation.id),
+            func.coalesce(func.sum(Calculation.result), 0.0),
+            func.min(Calculation.result),
+            func.max(Calculation.result),
+            func.max(Calculation.updated_at),
+        ).filter(Calculation.deleted_at.is_(None))
+        if user_id is not None:
+            clear = clear.where(cls.user_id == user_id)
+            grouped = grouped.filter(Calculation.user_id == user_id)
+        grouped = grouped.group_by(Calculation.user_id, Calculation.type)
+
+        db.execute(clear)
+        rows = [
+            {
+                "user_id": row_user_id,
+                "type": row_type,
+                "count": count,
+                "total": total,
+                "min_result": min_result,
+                "max_result": max_result,
+                "last_at": last_at,
+            }
+            for row_user_id, row_type, count, total, min_result, max_result, last_at in grouped
+        ]
+        if rows:
+            db.bulk_insert_mappings(cls, rows)
+        db.flush()
+        return len(rows)
+
+    @classmethod
+    def for_user(cls, db, user_id: uuid.UUID):
+        """All stats rows for one user; at most one per calculation type."""
+        return db.query(cls).filter(cls.user_id == user_id).order_by(cls.type).all()
@@ -0,0 +1,37 @@
+from datetime import datetime
+import uuid
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+class CalculationTombstone(Base):
+    """Marker left behind by a deleted calculation for delta-sync clients.
+
+    ``change_seq`` comes from the same per-user counter as
+    ``Calculation.change_seq``, so one ``> since`` range over each table
+    yields everything a client has not seen yet.
+    """
+    __tablename__ = "calculation_tombstones"
+    __table_args__ = (
+        Index('ix_calculation_tombstones_user_seq', 'user_id', 'change_seq'),
+    )
+
+    calculation_id = Column(UUID(as_uuid=True), primary_key=True)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('users.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    change_seq = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<CalculationTombstone(calculation_id={self.calculation_id}, change_seq={self.change_seq})>"
+
+    @classmethod
+    def since(cls, db, user_id: uuid.UUID, since: int, until: int):
+        return db.query(cls).filter(
+            cls.user_id == user_id,
+            cls.change_seq > since,
+            cls.change_seq <= until
+        ).order_by(cls.change_seq).all()
@@ -0,0 +1,55 @@
+import uuid
+from sqlalchemy import Column, ForeignKey, Integer, update
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.exc import IntegrityError
+from app.database import Base
+
+class CalculationVersion(Base):
+    """Per-user version counter for the user's calculation collection.
+
+    Every create, update and delete bumps it in the same transaction, so a
+    single primary-key lookup tells whether anything in the list changed.
+
+    ``pruned_seq`` is the highest change sequence whose tombstone the purge
+    has removed; a delta sync from an older token must start over.
+    """
+    __tablename__ = "calculation_versions"
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey('users.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    version = Column(Integer, default=0, nullable=False)
+    pruned_seq = Column(Integer, default=0, server_default="0", nullable=False)
+
+    def __repr__(self):
+        return f"<CalculationVersion(user_id={self.user_id}, version={self.version})>"
+
+    @classmethod
+    def current(cls, db, user_id: uuid.UUID) -> int:
+        version = db.query(cls.version).filter(cls.user_id == user_id).scalar()
+        return version or 0
+
+    @classmethod
+    def pruned(cls, db, user_id: uuid.UUID) -> int:
+        pruned_seq = db.query(cls.pruned_seq).filter(cls.user_id == user_id).scalar()
+        return pruned_seq or 0
+
+    @classmethod
+    def bump(cls, db, user_id: uuid.UUID) -> int:
+        """Increment the user's version and return the new value."""
+        while True:
+            updated = db.execute(
+                update(cls)
+                .where(cls.user_id == user_id)
+                .values(version=cls.version + 1)
+            )
+            if updated.rowcount:
+                return cls.current(db, user_id)
+            try:
+                with db.begin_nested():
+                    db.add(cls(user_id=user_id, version=1))
+                return 1
+            except IntegrityError:
+                continue  # A concurrent first write created the row; increment theirs.
@@ -10,10 +10,28 @@ from .user import (
 from .token import Token, TokenData, TokenResponse
 from .calculation import (
     CalculationType,
+    CalculationReference,
+    CalculationDependencyResponse,
     CalculationBase,
     CalculationCreate,
     CalculationUpdate,
-    CalculationResponse
+    CalculationResponse,
+    CalculationFilter,
+    CalculationExportFilter,
+    CalculationTypeStats,
+    CalculationStatsResponse,
+    CalculationChangesResponse,
+    CalculationJobResponse,
+    CalculationMapRequest,
+    CalculationMapResponse,
+    CalculationStatisticResponse,
+    CalculationImportResponse,
+    CalculationBulkFilter,
+    CalculationBulkUpdate,
+    CalculationBulkResponse,
+    SweepRange,
+    CalculationSweepRequest,
+    CalculationSweepChunk
 )
 
 __all__ = [
@@ -27,8 +45,26 @@ __all__ = [
     'TokenData',
     'TokenResponse',
     'CalculationType',
+    'CalculationReference',
+    'CalculationDependencyResponse',
     'CalculationBase',
     'CalculationCreate',
     'CalculationUpdate',
     'CalculationResponse',
+    'CalculationFilter',
+    'CalculationExportFilter',
+    'CalculationTypeStats',
+    'CalculationStatsResponse',
+    'CalculationChangesResponse',
+    'CalculationJobResponse',
+    'CalculationMapRequest',
+    'CalculationMapResponse',
+    'CalculationStatisticResponse',
+    'CalculationImportResponse',
+    'CalculationBulkFilter',
+    'CalculationBulkUpdate',
+    'CalculationBulkResponse',
+    'SweepRange',
+    'CalculationSweepRequest',
+    'CalculationSweepChunk',
 ]
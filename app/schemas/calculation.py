@@ -1,9 +1,13 @@
+import math
 from enum import Enum
 from pydantic import BaseModel, Field, ConfigDict, model_validator, field_validator
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional, Union
 from uuid import UUID
 from datetime import datetime
 
+from app.core.config import settings
+from app.core.expression import compile_expression
+
 class CalculationType(str, Enum):
     ADDITION = "addition"
     SUBTRACTION = "subtraction"
@@ -15,27 +19,81 @@ class CalculationType(str, Enum):
     TAN = "tan"
     EXPONENTIAL = "exponential"
     POWER = "power"
+    MEAN = "mean"
+    VARIANCE = "variance"
+    STDDEV = "stddev"
+    MEDIAN = "median"
+    PERCENTILE = "percentile"
+    EXPRESSION = "expression"
+
+def normalize_type(v):
+    """Calculation types are case-insensitive; ``None`` is left to the field."""
+    if v is None:
+        return v
+    allowed = {e.value for e in CalculationType}
+    if not isinstance(v, str) or v.lower() not in allowed:
+        raise ValueError(f"Type must be one of: {', '.join(sorted(allowed))}")
+    return v.lower()
+
+def check_expression(calculation_type: "CalculationType", expression: Optional[str], input_count: int) -> None:
+    """An expression is required for (and only for) ``expression`` calculations.
+
+    Compiling it here also rejects unsafe syntax and a wrong input count
+    at validation time; the compiled plan is cached for evaluation.
+    """
+    if calculation_type != CalculationType.EXPRESSION:
+        if expression is not None:
+            raise ValueError("expression is only allowed for the expression type")
+        return
+    if not expression:
+        raise ValueError("expression is required for the expression type")
+    variables = compile_expression(expression).variables
+    if input_count != len(variables):
+        raise ValueError(
+            f"Expression needs {len(variables)} inputs ({', '.join(variables)}), got {input_count}"
+        )
+
+def check_percentile(percentile) -> None:
+    """A percentile calculation's first input is the percentile itself."""
+    if isinstance(percentile, (int, float)) and not 0 <= percentile <= 100:
+        raise ValueError("Percentile (the first input) must be between 0 and 100")
+
+class CalculationReference(BaseModel):
+    """An input taken from another calculation's current result"""
+    calculation_id: UUID = Field(
+        ...,
+        description="UUID of the calculation whose result is used as this input",
+        example="123e4567-e89b-12d3-a456-426614174999"
+    )
+
+    model_config = ConfigDict(extra="forbid")
+
+class CalculationDependencyResponse(BaseModel):
+    """Which input of a calculation comes from which other calculation"""
+    position: int = Field(..., description="Index of the input", example=0)
+    source_id: UUID = Field(..., description="UUID of the calculation supplying it")
+
+    model_config = ConfigDict(from_attributes=True)
 
 class CalculationBase(BaseModel):
     type: CalculationType = Field(
         ...,
-        description="Type of calculation (addition, subtraction, multiplication, division, modulus, sin, cos, tan, exponential, power)",
+        description="Type of calculation (addition, subtraction, multiplication, division, modulus, sin, cos, tan, exponential, power, mean, variance, stddev, median, percentile, expression)",
         example="addition"
     )
-    inputs: List[float] = Field(
+    inputs: List[Union[float, CalculationReference]] = Field(
         ...,
-        description="List of numeric inputs for the calculation",
+        description="Numeric inputs for the calculation; an input may instead reference another calculation's result",
         example=[10.5, 3, 2],
         min_items=1
     )
+    expression: Optional[str] = Field(
+        None,
+        description="Formula for the expression type; its variables take the inputs in alphabetical order",
+        example="(a + b) * sin(c)"
+    )
 
-    @field_validator("type", mode="before")
-    @classmethod
-    def validate_type(cls, v):
-        allowed = {e.value for e in CalculationType}
-        if not isinstance(v, str) or v.lower() not in allowed:
-            raise ValueError(f"Type must be one of: {', '.join(sorted(allowed))}")
-        return v.lower()
+    validate_type = field_validator("type", mode="before")(normalize_type)
 
     @field_validator("inputs", mode="before")
     @classmethod
@@ -46,9 +104,11 @@ class CalculationBase(BaseModel):
 
     @model_validator(mode='after')
     def validate_inputs(self) -> "CalculationBase":
-        # Trigonometric and exponential functions only need 1+ inputs
-        trig_functions = {CalculationType.SIN, CalculationType.COS, CalculationType.TAN, CalculationType.EXPONENTIAL}
-        if self.type in trig_functions:
+        check_expression(self.type, self.expression, len(self.inputs))
+        if self.type == CalculationType.EXPRESSION:
+            return self
+        # Trigonometric, exponential, mean and median only need 1+ inputs
+        if min_inputs(self.type) == 1:
             if len(self.inputs) < 1:
                 raise ValueError("At least one number is required for this calculation")
         else:
@@ -62,6 +122,8 @@ class CalculationBase(BaseModel):
         elif self.type == CalculationType.MODULUS:
             if any(x == 0 for x in self.inputs[1:]):
                 raise ValueError("Cannot perform modulus with zero")
+        elif self.type == CalculationType.PERCENTILE:
+            check_percentile(self.inputs[0])
         return self
 
     model_config = ConfigDict(
@@ -69,7 +131,8 @@ class CalculationBase(BaseModel):
         json_schema_extra={
             "examples": [
                 {"type": "addition", "inputs": [10.5, 3, 2]},
-                {"type": "division", "inputs": [100, 2]}
+                {"type": "division", "inputs": [100, 2]},
+                {"type": "expression", "inputs": [1, 2, 30], "expression": "(a + b) * sin(c)"}
             ]
         }
     )
@@ -97,29 +160,33 @@ class CalculationUpdate(BaseModel):
         description="Updated type of calculation",
         example="addition"
     )
-    inputs: Optional[List[float]] = Field(
+    inputs: Optional[List[Union[float, CalculationReference]]] = Field(
         None,
-        description="Updated list of numeric inputs for the calculation",
+        description="Updated inputs for the calculation; an input may reference another calculation's result",
         example=[42, 7],
         min_items=1
     )
+    expression: Optional[str] = Field(
+        None,
+        description="Updated formula, for the expression type",
+        example="a * b"
+    )
 
-    @field_validator("type", mode="before")
-    @classmethod
-    def validate_type(cls, v):
-        if v is None:
-            return v
-        allowed = {e.value for e in CalculationType}
-        if not isinstance(v, str) or v.lower() not in allowed:
-            raise ValueError(f"Type must be one of: {', '.join(sorted(allowed))}")
-        return v.lower()
+    validate_type = field_validator("type", mode="before")(normalize_type)
 
     @model_validator(mode='after')
     def validate_inputs(self) -> "CalculationUpdate":
-        # Trigonometric and exponential functions only need 1+ inputs
-        trig_functions = {CalculationType.SIN, CalculationType.COS, CalculationType.TAN, CalculationType.EXPONENTIAL}
+        if self.expression is not None or self.type == CalculationType.EXPRESSION:
+            if self.type not in (None, CalculationType.EXPRESSION):
+                raise ValueError("expression is only allowed for the expression type")
+            # The input count depends on the stored formula when only one
+            # of the two changes, so it is checked when the update applies.
+            if self.expression is not None:
+                compile_expression(self.expression)
+            return self
+        # Trigonometric, exponential, mean and median only need 1+ inputs
         if self.inputs is not None:
-            if self.type in trig_functions:
+            if self.type is not None and min_inputs(self.type) == 1:
                 if len(self.inputs) < 1:
                     raise ValueError("At least one number is required for this calculation")
             else:
@@ -132,6 +199,8 @@ class CalculationUpdate(BaseModel):
         elif self.type == CalculationType.MODULUS and self.inputs is not None:
             if any(x == 0 for x in self.inputs[1:]):
                 raise ValueError("Cannot perform modulus with zero")
+        elif self.type == CalculationType.PERCENTILE and self.inputs is not None:
+            check_percentile(self.inputs[0])
         return self
 
     model_config = ConfigDict(
@@ -157,6 +226,10 @@ class CalculationResponse(CalculationBase):
         description="Result of the calculation",
         example=15.5
     )
+    dependencies: List[CalculationDependencyResponse] = Field(
+        default_factory=list,
+        description="Inputs taken from other calculations; `inputs` holds their current results"
+    )
 
     model_config = ConfigDict(
         from_attributes=True,
@@ -172,3 +245,339 @@ class CalculationResponse(CalculationBase):
             }
         }
     )
+
+class CalculationFilter(BaseModel):
+    """Query parameters accepted by ``GET /calculations``"""
+    type: Optional[CalculationType] = Field(
+        None,
+        description="Only return calculations of this type",
+        example="addition"
+    )
+    created_after: Optional[datetime] = Field(
+        None,
+        description="Only return calculations created at or after this time"
+    )
+    created_before: Optional[datetime] = Field(
+        None,
+        description="Only return calculations created at or before this time"
+    )
+    min_result: Optional[float] = Field(
+        None,
+        description="Only return calculations whose result is at least this value"
+    )
+    max_result: Optional[float] = Field(
+        None,
+        description="Only return calculations whose result is at most this value"
+    )
+    sort_by: Literal["created_at", "result"] = Field(
+        "created_at",
+        description="Column to sort by"
+    )
+    order: Literal["asc", "desc"] = Field(
+        "desc",
+        description="Sort direction"
+    )
+
+    validate_type = field_validator("type", mode="before")(normalize_type)
+
+    @model_validator(mode='after')
+    def validate_ranges(self) -> "CalculationFilter":
+        if self.created_after and self.created_before and self.created_after > self.created_before:
+            raise ValueError("created_after must not be later than created_before")
+        if self.min_result is not None and self.max_result is not None and self.min_result > self.max_result:
+            raise ValueError("min_result must not be greater than max_result")
+        return self
+
+    model_config = ConfigDict(extra="forbid")
+
+class CalculationExportFilter(CalculationFilter):
+    """Query parameters accepted by ``GET /calculations/export``"""
+    format: Literal["arrow", "parquet"] = Field(
+        "arrow",
+        description="Arrow IPC stream or Parquet file"
+    )
+
+class CalculationTypeStats(BaseModel):
+    """Running totals for one calculation type"""
+    type: str = Field(..., description="Calculation type", example="addition")
+    count: int = Field(..., description="Number of calculations of this type", example=3)
+    total: float = Field(..., description="Sum of all results", example=42.0)
+    average: Optional[float] = Field(None, description="Average result", example=14.0)
+    min_result: Optional[float] = Field(None, description="Smallest result", example=2.0)
+    max_result: Optional[float] = Field(None, description="Largest result", example=30.0)
+    last_at: Optional[datetime] = Field(None, description="Time of the last change")
+
+    model_config = ConfigDict(from_attributes=True)
+
+class CalculationStatsResponse(BaseModel):
+    """Summary of a user's calculations, overall and per type"""
+    count: int = Field(..., description="Total number of calculations", example=3)
+    total: float = Field(..., description="Sum of all results", example=42.0)
+    average: Optional[float] = Field(None, description="Average result", example=14.0)
+    min_result: Optional[float] = Field(None, description="Smallest result", example=2.0)
+    max_result: Optional[float] = Field(None, description="Largest result", example=30.0)
+    last_at: Optional[datetime] = Field(None, description="Time of the last change")
+    by_type: List[CalculationTypeStats] = Field(default_factory=list, description="Totals per type")
+
+    @classmethod
+    def from_rows(cls, rows) -> "CalculationStatsResponse":
+        """Roll per-type ``CalculationStats`` rows up into one summary."""
+        by_type = [
+            CalculationTypeStats(
+                type=row.type,
+                count=row.count,
+                total=row.total,
+                average=row.total / row.count if row.count else None,
+                min_result=row.min_result,
+                max_result=row.max_result,
+                last_at=row.last_at,
+            )
+            for row in rows
+        ]
+        count = sum(item.count for item in by_type)
+        total = sum(item.total for item in by_type)
+        mins = [item.min_result for item in by_type if item.min_result is not None]
+        maxes = [item.max_result for item in by_type if item.max_result is not None]
+        lasts = [item.last_at for item in by_type if item.last_at is not None]
+        return cls(
+            count=count,
+            total=total,
+            average=total / count if count else None,
+            min_result=min(mins) if mins else None,
+            max_result=max(maxes) if maxes else None,
+            last_at=max(lasts) if lasts else None,
+            by_type=by_type,
+        )
+
+class CalculationChangesResponse(BaseModel):
+    """Changes to a user's calculations since a sync token"""
+    token: str = Field(..., description="Token to pass as `since` on the next sync", example="42")
+    reset: bool = Field(
+        False,
+        description="True when `changes` is a full snapshot and the client should drop its local copy"
+    )
+    changes: List[CalculationResponse] = Field(
+        default_factory=list,
+        description="Calculations created or updated since the token"
+    )
+    deleted: List[UUID] = Field(
+        default_factory=list,
+        description="IDs of calculations deleted since the token"
+    )
+
+class CalculationJobResponse(BaseModel):
+    """State of a background calculation job"""
+    id: UUID = Field(..., description="Unique UUID of the job")
+    type: CalculationType = Field(..., description="Type of calculation", example="addition")
+    inputs: List[float] = Field(..., description="Inputs the job was submitted with", example=[10.5, 3, 2])
+    expression: Optional[str] = Field(None, description="Formula, for the expression type")
+    job_class: str = Field(..., description="Worker pool the job runs on", example="standard")
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"] = Field(
+        ...,
+        description="Current state of the job",
+        example="queued"
+    )
+    result: Optional[float] = Field(None, description="Result once the job has succeeded", example=15.5)
+    error: Optional[str] = Field(None, description="Why the job failed")
+    calculation_id: Optional[UUID] = Field(
+        None,
+        description="The calculation that stores the result once the job has succeeded"
+    )
+    created_at: datetime = Field(..., description="Time when the job was submitted")
+    started_at: Optional[datetime] = Field(None, description="Time when a worker picked the job up")
+    finished_at: Optional[datetime] = Field(None, description="Time when the job finished")
+
+    model_config = ConfigDict(from_attributes=True)
+
+def min_inputs(calculation_type: CalculationType) -> int:
+    """Fewest inputs a calculation of this type accepts."""
+    single = {
+        CalculationType.SIN, CalculationType.COS, CalculationType.TAN,
+        CalculationType.EXPONENTIAL, CalculationType.MEAN, CalculationType.MEDIAN,
+        CalculationType.EXPRESSION
+    }
+    return 1 if calculation_type in single else 2
+
+class CalculationMapRequest(BaseModel):
+    """One calculation type evaluated over every row of an input matrix"""
+    type: CalculationType = Field(..., description="Type of calculation applied to each row", example="power")
+    rows: List[List[float]] = Field(
+        ...,
+        description="Input rows, all of the same length; each row is one calculation's inputs",
+        example=[[2, 1], [2, 2], [2, 3]],
+        min_length=1
+    )
+    expression: Optional[str] = Field(None, description="Formula, for the expression type", example=None)
+    store: bool = Field(False, description="Also save every row that succeeds as a calculation")
+
+    validate_type = field_validator("type", mode="before")(normalize_type)
+
+    @model_validator(mode='after')
+    def validate_matrix(self) -> "CalculationMapRequest":
+        columns = len(self.rows[0])
+        if any(len(row) != columns for row in self.rows):
+            raise ValueError("All rows must have the same number of inputs")
+        if columns < min_inputs(self.type):
+            raise ValueError(f"Each row needs at least {min_inputs(self.type)} inputs for {self.type.value}")
+        check_expression(self.type, self.expression, columns)
+        return self
+
+class CalculationMapResponse(BaseModel):
+    """Per-row results of a map request, one column per field"""
+    type: CalculationType = Field(..., description="Type of calculation applied", example="power")
+    count: int = Field(..., description="Number of rows evaluated", example=3)
+    results: List[Optional[float]] = Field(
+        ...,
+        description="Result of each row, in row order; null where the row failed",
+        example=[2.0, 4.0, 8.0]
+    )
+    errors: Dict[int, str] = Field(
+        default_factory=dict,
+        description="Why each failed row failed, keyed by row index"
+    )
+    ids: Optional[List[Optional[UUID]]] = Field(
+        None,
+        description="With `store`, the saved calculation of each row; null where the row failed"
+    )
+
+class CalculationStatisticResponse(BaseModel):
+    """One statistic computed over a streamed body of values"""
+    type: CalculationType = Field(..., description="Statistic computed", example="median")
+    count: int = Field(..., description="Number of values read", example=1000000)
+    result: float = Field(..., description="Value of the statistic", example=0.0012)
+
+class CalculationImportResponse(BaseModel):
+    """Outcome of a bulk import; batches before a failure stay committed"""
+    line: int = Field(
+        ...,
+        description="Last line of the input committed; pass it as start_line to resume",
+        example=20000
+    )
+    imported: int = Field(..., description="Calculations created", example=19998)
+    failed: int = Field(..., description="Records rejected", example=2)
+    errors: Dict[int, str] = Field(
+        default_factory=dict,
+        description="Why each rejected record failed, keyed by line number (the first ones only)"
+    )
+    errors_truncated: bool = Field(False, description="Whether more records failed than errors lists")
+
+class CalculationBulkFilter(BaseModel):
+    """Which calculations a bulk delete or update applies to; criteria combine with AND"""
+    ids: Optional[List[UUID]] = Field(
+        None,
+        description="Only these calculations",
+        max_length=1000
+    )
+    type: Optional[CalculationType] = Field(
+        None,
+        description="Only calculations of this type",
+        example="addition"
+    )
+    created_after: Optional[datetime] = Field(
+        None,
+        description="Only calculations created at or after this time"
+    )
+    created_before: Optional[datetime] = Field(
+        None,
+        description="Only calculations created at or before this time"
+    )
+    all: bool = Field(
+        False,
+        description="Required to match every calculation when no other criterion is given"
+    )
+
+    validate_type = field_validator("type", mode="before")(normalize_type)
+
+    @model_validator(mode='after')
+    def validate_criteria(self) -> "CalculationBulkFilter":
+        if self.created_after and self.created_before and self.created_after > self.created_before:
+            raise ValueError("created_after must not be later than created_before")
+        criteria = (self.ids, self.type, self.created_after, self.created_before)
+        if all(criterion is None for criterion in criteria) and not self.all:
+            raise ValueError("Give ids or a filter, or set all to match every calculation")
+        return self
+
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra={"example": {"type": "addition", "created_before": "2024-01-01T00:00:00"}}
+    )
+
+class CalculationBulkUpdate(BaseModel):
+    """Re-type and/or re-input every calculation matching ``where``"""
+    where: CalculationBulkFilter
+    changes: CalculationUpdate
+
+    @model_validator(mode='after')
+    def validate_changes(self) -> "CalculationBulkUpdate":
+        if self.changes.type is None and self.changes.inputs is None and self.changes.expression is None:
+            raise ValueError("changes must set type, inputs or expression")
+        if self.changes.inputs is not None and any(
+            isinstance(value, CalculationReference) for value in self.changes.inputs
+        ):
+            raise ValueError("Bulk updates take numeric inputs only")
+        return self
+
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra={"example": {"where": {"type": "addition"}, "changes": {"type": "multiplication"}}}
+    )
+
+class CalculationBulkResponse(BaseModel):
+    """Outcome of a bulk delete or update"""
+    count: int = Field(..., description="Calculations deleted or updated", example=120)
+    recomputed: int = Field(0, description="Dependent calculations recomputed after an update", example=0)
+    token: str = Field(..., description="Change token after the operation, as in /calculations/changes", example="42")
+
+class SweepRange(BaseModel):
+    """Values from ``start`` to ``stop`` inclusive, ``step`` apart"""
+    start: float = Field(..., description="First value", example=0)
+    stop: float = Field(..., description="Last value, included when a whole number of steps away", example=360)
+    step: float = Field(..., description="Distance between values; negative to count down", example=1)
+
+    @model_validator(mode='after')
+    def validate_direction(self) -> "SweepRange":
+        if self.step == 0:
+            raise ValueError("step must not be zero")
+        steps = (self.stop - self.start) / self.step
+        if steps < 0:
+            raise ValueError("step must move start towards stop")
+        # Checked before the axis counts its points, which int() cannot do for inf.
+        if not math.isfinite(steps) or steps >= settings.COST_MAX_WORK:
+            raise ValueError(f"range has more than {settings.COST_MAX_WORK} points")
+        return self
+
+    model_config = ConfigDict(extra="forbid")
+
+class CalculationSweepRequest(BaseModel):
+    """One calculation type over the grid spanned by fixed inputs and ranges"""
+    type: CalculationType = Field(..., description="Type of calculation applied to each point", example="sin")
+    inputs: List[Union[float, SweepRange]] = Field(
+        ...,
+        description="A fixed value or a range for each input position; the points are every combination",
+        example=[{"start": 0, "stop": 360, "step": 1}],
+        min_length=1
+    )
+    expression: Optional[str] = Field(None, description="Formula, for the expression type", example=None)
+    store: bool = Field(False, description="Also save every point that succeeds as a calculation")
+
+    validate_type = field_validator("type", mode="before")(normalize_type)
+
+    @model_validator(mode='after')
+    def validate_inputs(self) -> "CalculationSweepRequest":
+        if len(self.inputs) < min_inputs(self.type):
+            raise ValueError(f"At least {min_inputs(self.type)} inputs are required for {self.type.value}")
+        check_expression(self.type, self.expression, len(self.inputs))
+        return self
+
+class CalculationSweepChunk(BaseModel):
+    """One streamed batch of sweep results, in the grid's row order"""
+    offset: int = Field(..., description="Index of the batch's first point in the grid", example=0)
+    results: List[Optional[float]] = Field(..., description="Result of each point; null where it failed")
+    errors: Dict[int, str] = Field(
+        default_factory=dict,
+        description="Why each failed point failed, keyed by index within the batch"
+    )
+    ids: Optional[List[Optional[UUID]]] = Field(
+        None,
+        description="With `store`, the saved calculation of each point; null where it failed"
+    )
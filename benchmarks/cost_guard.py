@@ -0,0 +1,53 @@
+"""Worst-case request time with and without the compute budget.
+
+Times adversarial calculations through ``Calculation.evaluate`` directly
+and through the cost guard. Integer inputs are what make the unguarded
+case expensive: Python builds the exact (huge) integer before anything
+checks its size. The guard answers every case from its estimate.
+
+Usage::
+
+    python -m benchmarks.cost_guard --exponent 2000000
+"""
+import argparse
+import time
+
+from app.core.cost import CostGuard
+from app.models.calculation import Calculation
+
+def cases(exponent: int, size: int):
+    return [
+        ("power int", "power", [7, exponent]),
+        ("power float", "power", [10.0, 1e6]),
+        ("multiplication int", "multiplication", [10 ** 50] * (exponent // 2000)),
+        ("exponential", "exponential", [1e6]),
+        ("addition max size", "addition", [1.0] * size),
+    ]
+
+def timed(fn):
+    started = time.perf_counter()
+    try:
+        fn()
+        outcome = "ok"
+    except ValueError as e:
+        outcome = type(e).__name__
+    return time.perf_counter() - started, outcome
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--exponent", type=int, default=2_000_000)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    guard = CostGuard()
+    worst_raw = worst_guarded = 0.0
+    print(f"{'case':>20} {'unguarded s':>12} {'guarded s':>10} {'guarded outcome':>16}")
+    for name, calculation_type, inputs in cases(args.exponent, args.size):
+        raw, _ = timed(lambda: Calculation.evaluate(calculation_type, inputs))
+        guarded, outcome = timed(lambda: guard.run(calculation_type, inputs, Calculation.evaluate))
+        worst_raw, worst_guarded = max(worst_raw, raw), max(worst_guarded, guarded)
+        print(f"{name:>20} {raw:>12.4f} {guarded:>10.4f} {outcome:>16}")
+    print(f"{'worst case':>20} {worst_raw:>12.4f} {worst_guarded:>10.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Small-request latency while large calculations run, per executor mode.
+
+Small clients evaluate a 10-input addition every 5 ms while large clients
+keep multiplying a multi-million-element input. Large work is routed to
+the offload executor by the cost guard; with ``inline`` and ``thread``
+it competes with the small requests for this process's GIL, with
+``process`` it does not.
+
+Usage::
+
+    python -m benchmarks.executor_mixed --seconds 5 --large-size 2000000
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from app.core.cost import CostGuard
+from app.core.executor import create_executor
+from app.models.calculation import Calculation
+
+def run(mode, seconds: float, small_clients: int, large_clients: int, large_size: int,
+        interval: float = 0.005) -> dict:
+    executor = create_executor(mode, max(large_clients, 1)) if mode else None
+    guard = CostGuard(offload_work=100_000, offload=executor, offload_timeout=60)
+    small = [float(i) for i in range(10)]
+    large = [1.0000001] * large_size
+    stop = threading.Event()
+    latencies, large_done = [], [0]
+
+    if executor is not None:
+        guard.run("multiplication", large, Calculation.evaluate)  # warm the pool
+
+    def small_client():
+        # Requests are due on a fixed schedule and timed from when they were
+        # due, so time spent waiting for the GIL counts as latency.
+        due = time.perf_counter()
+        while not stop.is_set():
+            due += interval
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            guard.run("addition", small, Calculation.evaluate)
+            latencies.append(time.perf_counter() - due)
+
+    def large_client():
+        while not stop.is_set():
+            guard.run("multiplication", large, Calculation.evaluate)
+            large_done[0] += 1
+
+    threads = [threading.Thread(target=small_client) for _ in range(small_clients)]
+    if executor is not None:
+        threads += [threading.Thread(target=large_client) for _ in range(large_clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    if executor is not None:
+        executor.shutdown()
+
+    latencies.sort()
+    return {
+        "small": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "large": large_done[0],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--small-clients", type=int, default=8)
+    parser.add_argument("--large-clients", type=int, default=2)
+    parser.add_argument("--large-size", type=int, default=2_000_000)
+    args = parser.parse_args(argv)
+
+    print(f"{'large via':>10} {'small reqs':>10} {'p50 ms':>8} {'p99 ms':>8} {'large reqs':>10}")
+    for mode in (None, "inline", "thread", "process"):
+        r = run(mode, args.seconds, args.small_clients, args.large_clients, args.large_size)
+        print(f"{mode or 'idle':>10} {r['small']:>10} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['large']:>10}")
+
+if __name__ == "__main__":
+    main()
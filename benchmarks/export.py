@@ -0,0 +1,97 @@
+"""Calculation history export: the JSON listing against columnar export.
+
+Seeds a SQLite file database with ``--rows`` calculations for one user,
+then times building the ``GET /calculations`` JSON body and the chunked
+columnar read, encoded as an Arrow IPC stream and as Parquet when pyarrow
+is installed. Reports rows per second, output size and the peak Python
+memory of each (measured in a second, traced pass).
+
+Usage::
+
+    python -m benchmarks.export --rows 200000 --inputs 4
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.main as app_main
+from app.core import columnar
+from app.core.bulk import persist_new_calculations
+from app.database import Base
+from app.models.calculation import Calculation
+from app.models.user import User
+
+def setup(path: str, rows: int, inputs: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    user_id = uuid.uuid4()
+    rng = random.Random(0)
+    with sessionmaker(bind=engine)() as db:
+        db.add(User(id=user_id, username="bench", email="bench@example.com",
+                    password="x", first_name="B", last_name="U"))
+        for start in range(0, rows, 10_000):
+            batch = [[rng.uniform(-1e3, 1e3) for _ in range(inputs)] for _ in range(min(10_000, rows - start))]
+            persist_new_calculations(db, user_id, "addition", batch, [sum(row) for row in batch])
+            db.commit()
+    return engine, user_id
+
+def cases(Session, user_id, chunk_size: int):
+    def json_listing():
+        with Session() as db:
+            calculations = Calculation.filter_for_user(db, user_id).all()
+            adapter = app_main._calculation_list_adapter
+            return len(adapter.dump_json(adapter.validate_python(calculations, from_attributes=True)))
+
+    def columns_only():
+        with Session() as db:
+            for _ in columnar.column_chunks(columnar.export_query(db, user_id), chunk_size):
+                pass
+        return 0
+
+    def encoded(format):
+        def run():
+            with Session() as db:
+                query = columnar.export_query(db, user_id)
+                batches = columnar.record_batches(columnar.column_chunks(query, chunk_size))
+                return sum(len(data) for data in columnar.stream(batches, format))
+        return run
+
+    yield "json listing", json_listing
+    yield "columns (no encoding)", columns_only
+    if columnar.PYARROW_AVAILABLE:
+        yield "arrow stream", encoded("arrow")
+        yield "parquet", encoded("parquet")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--inputs", type=int, default=4, help="Inputs per calculation")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine, user_id = setup(os.path.join(directory, "bench.db"), args.rows, args.inputs)
+        Session = sessionmaker(bind=engine)
+        if not columnar.PYARROW_AVAILABLE:
+            print("pyarrow is not installed; skipping the arrow and parquet cases")
+        print(f"{'case':>22} {'krows/s':>9} {'MB out':>8} {'peak MB':>8}")
+        for name, run in cases(Session, user_id, args.chunk_size):
+            started = time.perf_counter()
+            size = run()
+            elapsed = time.perf_counter() - started
+            tracemalloc.start()
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name:>22} {args.rows / elapsed / 1e3:>9.1f} {size / 1e6:>8.1f} {peak / 1e6:>8.1f}")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Throughput benchmark for group-committed calculation inserts.
+
+Runs ``--clients`` concurrent create requests against a SQLite file
+database (synchronous=FULL, so each commit is an fsync), once with a commit
+per request and once through the group-commit writer.
+
+Usage::
+
+    python -m benchmarks.group_commit --clients 500 --window-ms 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import app.main as app_main
+from app.core.cache import response_cache
+from app.core.group_commit import GroupCommitWriter
+from app.database import Base
+from app.models.user import User
+from app.schemas.calculation import CalculationBase
+
+def setup(path: str):
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": 120},
+        pool_size=600,
+        max_overflow=0
+    )
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(conn, _):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+
+    Base.metadata.create_all(engine)
+    user_id = uuid.uuid4()
+    with sessionmaker(bind=engine)() as db:
+        db.add(User(id=user_id, username="bench", email="bench@example.com",
+                    password="x", first_name="B", last_name="U"))
+        db.commit()
+    return engine, user_id
+
+def run(engine, user_id, clients: int) -> dict:
+    Session = sessionmaker(autoflush=False, bind=engine)
+    user = SimpleNamespace(id=user_id)
+    barrier = threading.Barrier(clients)
+    latencies, errors = [], []
+
+    def client(i):
+        db = Session()
+        data = CalculationBase(type="addition", inputs=[i, i])
+        try:
+            barrier.wait()
+            started = time.perf_counter()
+            app_main._create_calculation(data, user, db)
+            latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rows_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0,
+        "errors": len(errors),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=256)
+    args = parser.parse_args(argv)
+
+    response_cache.enabled = False
+    print(f"{'mode':>14} {'clients':>8} {'rows/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for mode in ("per-request", "group-commit"):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine, user_id = setup(os.path.join(tmp, "bench.db"))
+            writer = None
+            if mode == "group-commit":
+                writer = GroupCommitWriter(
+                    sessionmaker(autoflush=False, expire_on_commit=False, bind=engine),
+                    app_main._persist_new_calculation,
+                    window_seconds=args.window_ms / 1000,
+                    max_batch=args.max_batch
+                )
+            app_main.group_writer = writer
+            r = run(engine, user_id, args.clients)
+            if writer is not None:
+                writer.close()
+            engine.dispose()
+        print(f"{mode:>14} {args.clients:>8} {r['rows_per_s']:>9.0f} {r['p50_ms']:>9.1f} "
+              f"{r['p99_ms']:>9.1f} {r['errors']:>7}")
+
+if __name__ == "__main__":
+    main()
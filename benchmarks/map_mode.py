@@ -0,0 +1,99 @@
+"""N single ``POST /calculations`` calls against one ``/calculations/map``.
+
+Sends the same ``--rows`` power calculations through the HTTP stack (an
+in-process TestClient over a SQLite file database): one request per row,
+then one JSON map request and one binary map request, each with and
+without ``store``.
+
+Usage::
+
+    python -m benchmarks.map_mode --rows 2000
+"""
+import argparse
+import os
+import struct
+import tempfile
+import time
+import uuid
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.main as app_main
+from app.auth.dependencies import get_current_active_user
+from app.database import Base, get_db
+from app.models.user import User
+
+def setup(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    user_id = uuid.uuid4()
+    Session = sessionmaker(autoflush=False, bind=engine)
+    with Session() as db:
+        db.add(User(id=user_id, username="bench", email="bench@example.com",
+                    password="x", first_name="B", last_name="U"))
+        db.commit()
+
+    def get_bench_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app_main.app.dependency_overrides[get_db] = get_bench_db
+    app_main.app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(id=user_id)
+    return engine
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    rows = [[1.0 + i / args.rows, float(i % 10)] for i in range(args.rows)]
+    binary = b"".join(struct.pack("<2d", *row) for row in rows)
+    app_main.group_writer = None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup(os.path.join(tmp, "bench.db"))
+        client = TestClient(app_main.app)
+
+        def singles():
+            for row in rows:
+                response = client.post("/calculations", json={"type": "power", "inputs": row})
+                assert response.status_code == 201
+
+        def mapped(store):
+            response = client.post("/calculations/map", json={"type": "power", "rows": rows, "store": store})
+            assert response.status_code == 200 and not response.json()["errors"]
+
+        def mapped_binary(store):
+            response = client.post(
+                f"/calculations/map/binary?type=power&columns=2&store={str(store).lower()}",
+                content=binary,
+                headers={"Content-Type": "application/octet-stream"}
+            )
+            assert response.status_code == 200 and not response.json()["errors"]
+
+        baseline = timed(singles)
+        print(f"{'mode':>22} {'seconds':>9} {'rows/s':>10} {'speed-up':>9}")
+        print(f"{'single calls (stored)':>22} {baseline:>9.3f} {args.rows / baseline:>10.0f} {1.0:>8.1f}x")
+        for name, fn in [
+            ("map json", lambda: mapped(False)),
+            ("map json + store", lambda: mapped(True)),
+            ("map binary", lambda: mapped_binary(False)),
+            ("map binary + store", lambda: mapped_binary(True)),
+        ]:
+            elapsed = timed(fn)
+            print(f"{name:>22} {elapsed:>9.3f} {args.rows / elapsed:>10.0f} {baseline / elapsed:>8.1f}x")
+        app_main.app.dependency_overrides.clear()
+
+if __name__ == "__main__":
+    main()
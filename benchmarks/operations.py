@@ -0,0 +1,63 @@
+"""Throughput of the scalar ``operations`` in a loop against their array forms.
+
+For each operation, times a Python loop calling the scalar function per
+element, the ``operations.vectorized`` function on lists, the same with
+an ``out=`` buffer, and (when NumPy is installed) the ufunc path on
+arrays, with and without ``out=``. Reports millions of elements per
+second; the best of ``--repeat`` runs is kept.
+
+Usage::
+
+    python -m benchmarks.operations --size 1000000
+"""
+import argparse
+import random
+import time
+from array import array
+
+import operations
+from operations import vectorized
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def cases(name: str, left, right):
+    scalar = getattr(operations, name)
+    array_fn = getattr(vectorized, name)
+    out = array("d", bytes(8 * len(left)))
+    yield "loop", lambda: [scalar(a, b) for a, b in zip(left, right)]
+    yield "vectorized", lambda: array_fn(left, right)
+    yield "vectorized out=", lambda: array_fn(left, right, out=out)
+    if vectorized.NUMPY_AVAILABLE:
+        np = vectorized.np
+        left_array, right_array = np.asarray(left), np.asarray(right)
+        out_array = np.empty_like(left_array)
+        yield "numpy", lambda: array_fn(left_array, right_array)
+        yield "numpy out=", lambda: array_fn(left_array, right_array, out=out_array)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    left = [rng.uniform(-1e3, 1e3) for _ in range(args.size)]
+    right = [rng.uniform(0.5, 1e3) for _ in range(args.size)]
+    if not vectorized.NUMPY_AVAILABLE:
+        print("numpy is not installed; skipping the ndarray cases")
+    print(f"{'operation':>10} {'mode':>16} {'Melem/s':>9} {'speed-up':>9}")
+    for name in ("add", "subtract", "multiply", "divide"):
+        baseline = None
+        for mode, fn in cases(name, left, right):
+            elapsed = best_of(args.repeat, fn)
+            baseline = baseline or elapsed
+            print(f"{name:>10} {mode:>16} {args.size / elapsed / 1e6:>9.1f} {baseline / elapsed:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Throughput of chunked reductions against the number of worker processes.
+
+Reduces one large input with the old sequential Python loop, with the
+in-process chunked reduction, and through ``ProcessExecutor.reduce`` with
+1, 2, 4, ... workers (up to ``--max-workers``, default the CPU count).
+
+Usage::
+
+    python -m benchmarks.parallel_reduction --size 4000000
+"""
+import argparse
+import os
+import random
+import time
+
+from app.core import reduction
+from app.core.executor import ProcessExecutor
+
+def loop(calculation_type, inputs):
+    result = inputs[0]
+    for value in inputs[1:]:
+        if calculation_type == "addition":
+            result += value
+        else:
+            result *= value
+    return result
+
+def best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=4_000_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    inputs = [rng.uniform(0.999999, 1.000001) for _ in range(args.size)]
+    workers = [1]
+    while workers[-1] * 2 <= args.max_workers:
+        workers.append(workers[-1] * 2)
+
+    print(f"{args.size} inputs, {os.cpu_count()} CPUs")
+    print(f"{'type':>15} {'engine':>16} {'seconds':>9} {'Melem/s':>9}")
+    for calculation_type in ("addition", "multiplication"):
+        rows = [
+            ("python loop", lambda: loop(calculation_type, inputs)),
+            ("chunked inline", lambda: reduction.evaluate(calculation_type, inputs)),
+        ]
+        executors = []
+        for count in workers:
+            executor = ProcessExecutor(max_workers=count)
+            executor.reduce(calculation_type, inputs[:count * 2])  # start the workers
+            executors.append(executor)
+            rows.append((f"{count} process(es)", lambda e=executor: e.reduce(calculation_type, inputs)))
+        for name, fn in rows:
+            seconds = best_of(fn, args.repeats)
+            print(f"{calculation_type:>15} {name:>16} {seconds:>9.3f} {args.size / seconds / 1e6:>9.1f}")
+        for executor in executors:
+            executor.shutdown()
+
+if __name__ == "__main__":
+    main()
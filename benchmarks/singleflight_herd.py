@@ -0,0 +1,94 @@
+"""Thundering-herd benchmark for coalesced calculation reads.
+
+Fires N concurrent identical ``list_calculations`` calls for one user
+against a SQLite file database and counts the SQL statements executed, with
+request coalescing on and off.
+
+Usage::
+
+    python -m benchmarks.singleflight_herd --callers 50 --rows 2000
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.cache import response_cache
+from app.core.singleflight import read_flights
+from app.database import Base
+from app.main import list_calculations
+from app.models.calculation import Calculation
+from app.models.calculation_payload import CalculationPayload, content_digest
+from app.models.user import User
+from app.schemas.calculation import CalculationFilter
+
+def setup(path: str, rows: int):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    user_id = uuid.uuid4()
+    with Session() as db:
+        db.add(User(id=user_id, username="bench", email="bench@example.com",
+                    password="x", first_name="B", last_name="U"))
+        digests = [content_digest("addition", [i, i]) for i in range(rows)]
+        db.bulk_insert_mappings(CalculationPayload, [
+            {"digest": digests[i], "type": "addition", "inputs": [float(i), float(i)],
+             "result": 2.0 * i, "ref_count": 1}
+            for i in range(rows)
+        ])
+        db.bulk_insert_mappings(Calculation, [
+            {"id": uuid.uuid4(), "user_id": user_id, "type": "addition",
+             "payload_digest": digests[i], "result": 2.0 * i, "version": 1, "change_seq": 0}
+            for i in range(rows)
+        ])
+        db.commit()
+    return engine, Session, user_id
+
+def herd(Session, user_id, callers: int) -> float:
+    barrier = threading.Barrier(callers)
+    user = SimpleNamespace(id=user_id)
+
+    def call():
+        db = Session()
+        try:
+            barrier.wait()
+            list_calculations(CalculationFilter(), None, current_user=user, db=db)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--callers", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    response_cache.enabled = False
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, Session, user_id = setup(os.path.join(tmp, "bench.db"), args.rows)
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+        print(f"{'mode':>12} {'callers':>8} {'queries':>8} {'seconds':>8}")
+        for enabled in (False, True):
+            read_flights.enabled = enabled
+            statements.clear()
+            elapsed = herd(Session, user_id, args.callers)
+            mode = "coalesced" if enabled else "independent"
+            print(f"{mode:>12} {args.callers:>8} {len(statements):>8} {elapsed:>8.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Connection-count benchmark for the calculation event broker.
+
+Opens N in-process subscriptions spread over a number of users, publishes
+events from a worker thread (as the sync endpoints do) and reports fan-out
+latency and memory per connection.
+
+Usage::
+
+    python -m benchmarks.sse_connections --connections 1000 5000 20000
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+import tracemalloc
+import uuid
+
+from app.events.broker import EventBroker
+
+async def run(connections: int, users: int, events: int) -> dict:
+    broker = EventBroker(queue_size=100)
+    user_ids = [uuid.uuid4() for _ in range(users)]
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    subscriptions = [broker.subscribe(user_ids[i % users]) for i in range(connections)]
+    per_connection = (tracemalloc.get_traced_memory()[0] - baseline) / connections
+    tracemalloc.stop()
+
+    latencies = []
+
+    async def consume(subscription, expected):
+        for _ in range(expected):
+            event = await subscription.get()
+            latencies.append(time.perf_counter() - event["sent"])
+
+    per_user = events // users or 1
+    consumers = [
+        asyncio.create_task(consume(subscription, per_user))
+        for subscription in subscriptions
+    ]
+
+    def produce():
+        for _ in range(per_user):
+            for user_id in user_ids:
+                broker.publish(user_id, {"type": "created", "sent": time.perf_counter()})
+
+    started = time.perf_counter()
+    thread = threading.Thread(target=produce)
+    thread.start()
+    await asyncio.gather(*consumers)
+    thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "connections": connections,
+        "deliveries": len(latencies),
+        "deliveries_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "bytes_per_connection": per_connection,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--events", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    print(f"{'connections':>12} {'deliveries':>11} {'deliv/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'B/conn':>8}")
+    for connections in args.connections:
+        r = asyncio.run(run(connections, min(args.users, connections), args.events))
+        print(
+            f"{r['connections']:>12} {r['deliveries']:>11} {r['deliveries_per_s']:>10.0f} "
+            f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['bytes_per_connection']:>8.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
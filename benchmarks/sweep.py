@@ -0,0 +1,53 @@
+"""A ``sin`` sweep as one ``/calculations/sweep`` request against per-point calls.
+
+The per-point baseline is one ``POST /calculations`` per value, as the
+browser loop does; it is timed on ``--sample`` points and scaled to the
+full sweep. Uses the same in-process setup as ``benchmarks.map_mode``.
+
+Usage::
+
+    python -m benchmarks.sweep --points 10000 --sample 500
+"""
+import argparse
+import os
+import tempfile
+
+from fastapi.testclient import TestClient
+
+import app.main as app_main
+from benchmarks.map_mode import setup, timed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=10_000)
+    parser.add_argument("--sample", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    step = 360 / args.points
+    spec = [{"start": 0, "stop": step * (args.points - 1), "step": step}]
+    app_main.group_writer = None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup(os.path.join(tmp, "bench.db"))
+        client = TestClient(app_main.app)
+
+        def singles():
+            for index in range(args.sample):
+                response = client.post("/calculations", json={"type": "sin", "inputs": [index * step]})
+                assert response.status_code == 201
+
+        def swept(store):
+            response = client.post("/calculations/sweep", json={"type": "sin", "inputs": spec, "store": store})
+            assert response.status_code == 200
+            assert response.headers["x-sweep-points"] == str(args.points)
+
+        baseline = timed(singles) * args.points / args.sample
+        print(f"{'mode':>24} {'seconds':>9} {'speed-up':>9}")
+        print(f"{'per-point calls (est.)':>24} {baseline:>9.3f} {1.0:>8.1f}x")
+        for name, store in [("sweep", False), ("sweep + store", True)]:
+            elapsed = timed(lambda: swept(store))
+            print(f"{name:>24} {elapsed:>9.3f} {baseline / elapsed:>8.1f}x")
+        app_main.app.dependency_overrides.clear()
+
+if __name__ == "__main__":
+    main()
@@ -18,4 +18,7 @@ def divide(a: Number, b: Number) -> float:
     if b == 0:
         raise ValueError("Cannot divide by zero!")
     result = a / b
-    return result
\ No newline at end of file
+    return result
+
+# Array-aware variants of the functions above; imported last, as they use them.
+from operations import vectorized  # noqa: E402
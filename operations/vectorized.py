@@ -0,0 +1,94 @@
+"""Array-aware versions of ``add``, ``subtract``, ``multiply`` and ``divide``.
+
+Each function takes scalars, flat sequences or NumPy arrays and works
+element-wise with broadcasting: a scalar or a length-1 sequence pairs
+with every element of the other operand. Two scalars give the same
+result as the scalar function. Sequences come back as lists and are
+computed with ``map`` over the :mod:`operator` functions, so the loop
+runs in C. Any NumPy array operand (or ``out``) hands the whole
+operation to the matching ufunc, which also broadcasts N-d shapes.
+
+``out=`` writes the result into an existing list, ``array.array`` or
+ndarray of the right length and returns it. Only ufuncs can fill it
+without a temporary; for lists and ``array.array`` it just keeps the
+caller's buffer.
+``divide`` keeps the scalar semantics: any zero divisor raises
+``ValueError`` before anything is computed or written.
+"""
+import operator
+from array import array
+from itertools import repeat
+from typing import Callable, Iterable, Sequence, Tuple, Union
+
+import operations
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# A scalar, a flat sequence, or a NumPy array of any shape
+Operand = Union[operations.Number, Sequence[operations.Number]]
+
+def _is_scalar(value) -> bool:
+    return isinstance(value, (int, float))
+
+def _uses_numpy(*values) -> bool:
+    return NUMPY_AVAILABLE and any(isinstance(value, np.ndarray) for value in values)
+
+def _operands(a, b) -> Tuple[Iterable, Iterable, int]:
+    """Both operands as iterables of one common length."""
+    if _is_scalar(a):
+        return repeat(a, len(b)), b, len(b)
+    if _is_scalar(b):
+        return a, repeat(b, len(a)), len(a)
+    if len(a) == len(b):
+        return a, b, len(a)
+    if len(a) == 1:
+        return repeat(a[0], len(b)), b, len(b)
+    if len(b) == 1:
+        return a, repeat(b[0], len(a)), len(a)
+    raise ValueError(f"Operands could not be broadcast together (lengths {len(a)} and {len(b)}).")
+
+def _apply(
+    scalar: Callable,
+    element: Callable,
+    ufunc_name: str,
+    a: Operand,
+    b: Operand,
+    out=None
+):
+    if _uses_numpy(a, b, out):
+        return getattr(np, ufunc_name)(a, b, out=out)
+    if _is_scalar(a) and _is_scalar(b):
+        if out is not None:
+            raise ValueError("out= needs at least one sequence operand.")
+        return scalar(a, b)
+    left, right, length = _operands(a, b)
+    results = map(element, left, right)
+    if out is None:
+        return list(results)
+    if len(out) != length:
+        raise ValueError(f"out= has length {len(out)}, the result has {length}.")
+    out[:] = array(out.typecode, results) if isinstance(out, array) else list(results)
+    return out
+
+def add(a: Operand, b: Operand, out=None):
+    return _apply(operations.add, operator.add, "add", a, b, out)
+
+def subtract(a: Operand, b: Operand, out=None):
+    return _apply(operations.subtract, operator.sub, "subtract", a, b, out)
+
+def multiply(a: Operand, b: Operand, out=None):
+    return _apply(operations.multiply, operator.mul, "multiply", a, b, out)
+
+def divide(a: Operand, b: Operand, out=None):
+    if _uses_numpy(a, b, out):
+        has_zero = bool(np.any(np.asarray(b) == 0))
+    else:
+        has_zero = b == 0 if _is_scalar(b) else 0 in b
+    if has_zero:
+        raise ValueError("Cannot divide by zero!")
+    return _apply(operations.divide, operator.truediv, "true_divide", a, b, out)
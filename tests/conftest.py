@@ -1,7 +1,11 @@
+import uuid
+from datetime import datetime
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
 
 from app.main import app
 from app.database import Base, get_db
@@ -13,7 +17,13 @@ SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 @pytest.fixture(scope="function")
 def db_engine():
     """Create an in-memory database for testing."""
-    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+    # StaticPool keeps one connection so the TestClient's worker thread sees
+    # the same in-memory database as the fixtures.
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
     Base.metadata.create_all(bind=engine)
     yield engine
     Base.metadata.drop_all(bind=engine)
@@ -77,3 +87,81 @@ def test_user_token(client, test_user):
 def auth_headers(test_user_token):
     """Return authorization headers for authenticated requests."""
     return {"Authorization": f"Bearer {test_user_token}"}
+
+
+@pytest.fixture(scope="function")
+def other_headers(client, db_session, test_user):
+    """Return authorization headers for a second user."""
+    from app.models.user import User
+
+    User.register(db_session, {
+        "first_name": "Other",
+        "last_name": "User",
+        "email": "other@example.com",
+        "username": "otheruser",
+        "password": "OtherPass123!"
+    })
+    db_session.commit()
+    response = client.post(
+        "/auth/login",
+        json={"username": "otheruser", "password": "OtherPass123!"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="function")
+def create_calculation(client, auth_headers):
+    """Return a helper that creates a calculation over the API and returns its JSON."""
+    def _create(calc_type, inputs, headers=None):
+        response = client.post(
+            "/calculations",
+            json={"type": calc_type, "inputs": inputs},
+            headers=headers or auth_headers,
+        )
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return _create
+
+
+@pytest.fixture(scope="function")
+def interleave(db_engine):
+    """Return a helper that runs ``sql`` right after the next statement starting with ``prefix``.
+
+    Stands in for another writer committing between a lookup and the write
+    that depends on it.
+    """
+    pending = []
+
+    def run(conn, cursor, statement, parameters, context, executemany):
+        if pending and statement.startswith(pending[0][0]):
+            _, sql, params = pending.pop(0)
+            conn.exec_driver_sql(sql, params)
+
+    def _interleave(prefix, sql, params=()):
+        pending.append((prefix, sql, params))
+
+    event.listen(db_engine, "after_cursor_execute", run)
+    yield _interleave
+    event.remove(db_engine, "after_cursor_execute", run)
+
+
+@pytest.fixture(scope="function")
+def explain_plan(db_session):
+    """Return a helper that captures SQLite's EXPLAIN QUERY PLAN for an ORM query."""
+    def _plain(value):
+        if isinstance(value, uuid.UUID):
+            return value.hex
+        if isinstance(value, datetime):
+            return value.isoformat(sep=" ")
+        return value
+
+    def _explain(query):
+        compiled = query.statement.compile(dialect=db_session.bind.dialect)
+        params = tuple(_plain(compiled.params[name]) for name in compiled.positiontup)
+        rows = db_session.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + str(compiled), params
+        ).fetchall()
+        return "\n".join(row[-1] for row in rows)
+
+    return _explain
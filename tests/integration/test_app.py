@@ -1,5 +1,7 @@
 import pytest
 
+from app.schemas.calculation import CalculationType
+
 
 class TestAuthenticationFlow:
     def test_register_duplicate_username(self, client, test_user):
@@ -38,6 +40,13 @@ class TestPageRoutes:
         response = client.get("/register")
         assert response.status_code == 200
 
+    def test_dashboard_offers_every_type(self, client):
+        response = client.get("/dashboard")
+        assert response.status_code == 200
+        for calculation_type in CalculationType:
+            # Once in the create form, once in the history filter
+            assert response.text.count(f'<option value="{calculation_type.value}">') == 2
+
     def test_health_check(self, client):
         response = client.get("/health")
         assert response.status_code == 200
@@ -0,0 +1,170 @@
+import uuid
+
+import pytest
+
+from app.models.calculation import Calculation
+from app.models.calculation_payload import CalculationPayload
+from app.models.calculation_stats import CalculationStats
+from app.models.calculation_tombstone import CalculationTombstone
+from app.models.user import User
+
+
+def _get(client, headers, calculation):
+    return client.get(f"/calculations/{calculation['id']}", headers=headers)
+
+
+def _row(db_session, calculation):
+    return db_session.get(Calculation, uuid.UUID(calculation["id"]))
+
+
+def _delete(client, headers, **where):
+    return client.post("/calculations/bulk/delete", json=where, headers=headers)
+
+
+def _update(client, headers, where, changes):
+    return client.post("/calculations/bulk/update", json={"where": where, "changes": changes}, headers=headers)
+
+
+class TestBulkDelete:
+    def test_by_ids(self, client, auth_headers, db_session, test_user, create_calculation):
+        kept = create_calculation("addition", [1, 2])
+        gone = [create_calculation("addition", [3, 4]) for _ in range(2)]
+        token = client.get("/calculations/changes", headers=auth_headers).json()["token"]
+
+        response = _delete(client, auth_headers, ids=[item["id"] for item in gone])
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["count"] == 2
+
+        assert [item["id"] for item in client.get("/calculations", headers=auth_headers).json()] == [kept["id"]]
+        assert all(_row(db_session, item).deleted_at is not None for item in gone)
+        assert db_session.query(CalculationTombstone).count() == 2
+        assert db_session.get(CalculationStats, (test_user.id, "addition")).total == 3.0
+
+        changes = client.get(f"/calculations/changes?since={token}", headers=auth_headers).json()
+        assert sorted(changes["deleted"]) == sorted(item["id"] for item in gone)
+        assert changes["token"] == data["token"]
+
+    def test_by_filter(self, client, auth_headers, create_calculation):
+        create_calculation("addition", [1, 2])
+        create_calculation("division", [1, 2])
+        create_calculation("division", [1, 4])
+        assert _delete(client, auth_headers, type="division").json()["count"] == 2
+        assert len(client.get("/calculations", headers=auth_headers).json()) == 1
+        assert _delete(client, auth_headers, all=True).json()["count"] == 1
+
+    def test_only_own_calculations(self, client, auth_headers, db_session, create_calculation):
+        mine = create_calculation("addition", [1, 2])
+        User.register(db_session, {
+            "first_name": "Other", "last_name": "User", "email": "other@example.com",
+            "username": "otheruser", "password": "OtherPass123!"
+        })
+        db_session.commit()
+        token = client.post("/auth/login", json={"username": "otheruser", "password": "OtherPass123!"}).json()
+        other_headers = {"Authorization": f"Bearer {token['access_token']}"}
+        assert _delete(client, other_headers, ids=[mine["id"]]).json()["count"] == 0
+        assert _delete(client, other_headers, all=True).json()["count"] == 0
+        assert _get(client, auth_headers, mine).status_code == 200
+
+    def test_needs_criteria(self, client, auth_headers):
+        assert _delete(client, auth_headers).status_code == 422
+
+    def test_sources_of_other_calculations_are_kept(self, client, auth_headers, create_calculation):
+        a = create_calculation("addition", [1, 2])
+        b = create_calculation("addition", [{"calculation_id": a["id"]}, 1])
+        assert _delete(client, auth_headers, ids=[a["id"]]).status_code == 409
+        # Deleting both together is fine
+        assert _delete(client, auth_headers, ids=[a["id"], b["id"]]).json()["count"] == 2
+
+
+class TestBulkUpdate:
+    def test_retype_recomputes(self, client, auth_headers, db_session, test_user, create_calculation):
+        rows = [create_calculation("addition", inputs) for inputs in ([2, 3], [4, 5])]
+        untouched = create_calculation("division", [8, 2])
+
+        response = _update(client, auth_headers, {"type": "addition"}, {"type": "multiplication"})
+        assert response.status_code == 200, response.text
+        assert response.json()["count"] == 2
+
+        updated = [_get(client, auth_headers, item).json() for item in rows]
+        assert [(item["type"], item["result"], item["inputs"]) for item in updated] == [
+            ("multiplication", 6.0, [2.0, 3.0]),
+            ("multiplication", 20.0, [4.0, 5.0]),
+        ]
+        assert [_row(db_session, item).version for item in (*rows, untouched)] == [2, 2, 1]
+        assert db_session.get(CalculationStats, (test_user.id, "multiplication")).total == 26.0
+        assert db_session.get(CalculationStats, (test_user.id, "addition")) is None
+        assert db_session.query(CalculationPayload).filter(CalculationPayload.type == "addition").count() == 0
+
+    def test_reinput_by_ids_shares_one_payload(self, client, auth_headers, db_session, create_calculation):
+        rows = [
+            create_calculation("addition", [1, 2]),
+            create_calculation("multiplication", [3, 4]),
+        ]
+        response = _update(client, auth_headers, {"ids": [item["id"] for item in rows]}, {"inputs": [5, 6]})
+        assert response.json()["count"] == 2
+        assert [_get(client, auth_headers, item).json()["result"] for item in rows] == [11.0, 30.0]
+        assert db_session.query(CalculationPayload).count() == 2
+
+    def test_failure_changes_nothing(self, client, auth_headers, create_calculation):
+        ok = create_calculation("addition", [4, 2])
+        create_calculation("addition", [4, 0])
+        response = _update(client, auth_headers, {"all": True}, {"type": "division"})
+        assert response.status_code == 400
+        assert "cannot be updated" in response.json()["detail"]
+        assert _get(client, auth_headers, ok).json()["type"] == "addition"
+
+    def test_dependents_follow(self, client, auth_headers, create_calculation):
+        a = create_calculation("addition", [2, 3])
+        b = create_calculation("multiplication", [{"calculation_id": a["id"]}, 2])
+        response = _update(client, auth_headers, {"ids": [a["id"]]}, {"type": "multiplication"})
+        assert response.json()["recomputed"] == 1
+        assert _get(client, auth_headers, b).json()["result"] == 12.0
+
+    def test_reinput_drops_references(self, client, auth_headers, create_calculation):
+        a = create_calculation("addition", [2, 3])
+        b = create_calculation("multiplication", [{"calculation_id": a["id"]}, 2])
+        _update(client, auth_headers, {"ids": [b["id"]]}, {"inputs": [1, 1]})
+        assert _get(client, auth_headers, b).json()["dependencies"] == []
+        assert _delete(client, auth_headers, ids=[a["id"]]).json()["count"] == 1
+
+    def test_expression_only_for_expression_rows(self, client, auth_headers, create_calculation):
+        create_calculation("addition", [2, 3])
+        response = _update(client, auth_headers, {"all": True}, {"expression": "x0 * x1"})
+        assert response.status_code == 400
+
+    def test_rejects_references_and_empty_changes(self, client, auth_headers, create_calculation):
+        a = create_calculation("addition", [2, 3])
+        assert _update(client, auth_headers, {"all": True}, {}).status_code == 422
+        assert _update(
+            client, auth_headers, {"all": True}, {"inputs": [{"calculation_id": a["id"]}, 1]}
+        ).status_code == 422
+
+
+class TestBulkStats:
+    @staticmethod
+    def _stats(db_session, user_id):
+        db_session.expire_all()
+        return [
+            (row.type, row.count, row.total, row.min_result, row.max_result)
+            for row in CalculationStats.for_user(db_session, user_id)
+        ]
+
+    def test_deltas_match_a_rebuild(self, client, auth_headers, db_session, test_user, create_calculation, monkeypatch):
+        smallest = create_calculation("addition", [1, 1])
+        create_calculation("addition", [2, 3])
+        largest = create_calculation("addition", [50, 50])
+        b = create_calculation("multiplication", [{"calculation_id": smallest["id"]}, 3])
+        create_calculation("multiplication", [4, 4])
+
+        rebuild = CalculationStats.rebuild
+        monkeypatch.setattr(CalculationStats, "rebuild", classmethod(lambda cls, *args: pytest.fail("rebuilt")))
+        assert _delete(client, auth_headers, ids=[largest["id"]]).json()["count"] == 1
+        assert _update(client, auth_headers, {"ids": [smallest["id"]]}, {"inputs": [7, 8]}).json()["recomputed"] == 1
+        assert _update(client, auth_headers, {"ids": [b["id"]]}, {"type": "addition"}).json()["count"] == 1
+        incremental = self._stats(db_session, test_user.id)
+
+        rebuild.__func__(CalculationStats, db_session, test_user.id)
+        db_session.commit()
+        assert incremental == self._stats(db_session, test_user.id)
+        assert incremental == [("addition", 3, 38.0, 5.0, 18.0), ("multiplication", 1, 16.0, 16.0, 16.0)]
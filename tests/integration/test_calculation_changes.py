@@ -0,0 +1,38 @@
+class TestCalculationChanges:
+    def test_initial_sync_is_full_snapshot(self, client, auth_headers, create_calculation):
+        create_calculation("addition", [1, 2])
+        create_calculation("power", [2, 3])
+        data = client.get("/calculations/changes", headers=auth_headers).json()
+        assert data["reset"] is True
+        assert len(data["changes"]) == 2
+        assert data["deleted"] == []
+        assert data["token"] == "2"
+
+    def test_incremental_sync_returns_only_new_work(self, client, auth_headers, create_calculation):
+        kept = create_calculation("addition", [1, 2])
+        removed = create_calculation("addition", [3, 4])
+        token = client.get("/calculations/changes", headers=auth_headers).json()["token"]
+
+        added = create_calculation("multiplication", [2, 2])
+        client.put(f"/calculations/{kept['id']}", json={"inputs": [5, 5]}, headers=auth_headers)
+        client.delete(f"/calculations/{removed['id']}", headers=auth_headers)
+
+        data = client.get(f"/calculations/changes?since={token}", headers=auth_headers).json()
+        assert data["reset"] is False
+        assert [calc["id"] for calc in data["changes"]] == [added["id"], kept["id"]]
+        assert data["changes"][1]["result"] == 10
+        assert data["deleted"] == [removed["id"]]
+
+        again = client.get(f"/calculations/changes?since={data['token']}", headers=auth_headers).json()
+        assert again["changes"] == [] and again["deleted"] == []
+        assert again["token"] == data["token"]
+
+    def test_invalid_token(self, client, auth_headers):
+        response = client.get("/calculations/changes?since=abc", headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_changes_query_uses_index(self, db_session, test_user, explain_plan):
+        from app.models.calculation import Calculation
+
+        plan = explain_plan(Calculation.changed_since(db_session, test_user.id, 5, 10))
+        assert "SEARCH calculations USING INDEX ix_calculations_user_change_seq (" in plan
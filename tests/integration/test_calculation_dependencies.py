@@ -0,0 +1,129 @@
+import uuid
+
+import pytest
+
+from app.models.calculation_dependency import CalculationDependency
+from app.models.calculation_payload import CalculationPayload
+from app.models.calculation_stats import CalculationStats
+
+
+def _ref(calculation):
+    return {"calculation_id": calculation["id"]}
+
+
+def _get(client, headers, calculation):
+    return client.get(f"/calculations/{calculation['id']}", headers=headers).json()
+
+
+def _update(client, headers, calculation, inputs):
+    return client.put(f"/calculations/{calculation['id']}", json={"inputs": inputs}, headers=headers)
+
+
+@pytest.fixture
+def chain(create_calculation):
+    a = create_calculation("addition", [2, 3])
+    b = create_calculation("multiplication", [_ref(a), 2])
+    c = create_calculation("addition", [_ref(b), 1])
+    return a, b, c
+
+
+class TestCalculationDependencies:
+    def test_reference_resolves_to_result(self, chain):
+        a, b, c = chain
+        assert b["inputs"] == [5.0, 2.0] and b["result"] == 10.0
+        assert c["result"] == 11.0
+        assert b["dependencies"] == [{"position": 0, "source_id": a["id"]}]
+
+    def test_update_recomputes_downstream(self, client, auth_headers, chain, create_calculation):
+        a, b, c = chain
+        other = create_calculation("addition", [7, 7])
+
+        response = _update(client, auth_headers, a, [10, 10])
+        assert response.status_code == 200
+
+        b_now, c_now = _get(client, auth_headers, b), _get(client, auth_headers, c)
+        assert (b_now["inputs"], b_now["result"]) == ([20.0, 2.0], 40.0)
+        assert (c_now["inputs"], c_now["result"]) == ([40.0, 1.0], 41.0)
+        assert _get(client, auth_headers, other)["updated_at"] == other["updated_at"]
+
+    def test_diamond_is_recomputed_in_topological_order(self, client, auth_headers, create_calculation):
+        a = create_calculation("addition", [1, 1])
+        b = create_calculation("addition", [_ref(a), 1])
+        c = create_calculation("multiplication", [_ref(a), 2])
+        d = create_calculation("addition", [_ref(b), _ref(c)])
+        assert d["result"] == 7.0
+
+        _update(client, auth_headers, a, [5, 5])
+        assert _get(client, auth_headers, d)["result"] == 31.0
+
+    def test_unchanged_result_stops_propagation(self, client, auth_headers, chain):
+        a, b, _ = chain
+        assert _update(client, auth_headers, a, [1, 4]).status_code == 200
+        assert _get(client, auth_headers, b)["updated_at"] == b["updated_at"]
+
+    def test_changes_feed_and_stats_include_recomputed_rows(self, client, auth_headers, chain, db_session, test_user):
+        a, b, c = chain
+        token = client.get("/calculations/changes", headers=auth_headers).json()["token"]
+        _update(client, auth_headers, a, [10, 10])
+
+        changes = client.get(f"/calculations/changes?since={token}", headers=auth_headers).json()
+        assert {item["id"] for item in changes["changes"]} == {a["id"], b["id"], c["id"]}
+
+        db_session.expire_all()
+        stats = db_session.get(CalculationStats, (test_user.id, "addition"))
+        assert (stats.count, stats.total) == (2, 61.0)
+        old = db_session.query(CalculationPayload).filter(CalculationPayload.result == 10.0).count()
+        assert old == 0
+
+    def test_recomputed_rows_move_stats_without_a_rebuild(
+        self, client, auth_headers, chain, db_session, test_user, monkeypatch
+    ):
+        a, _, _ = chain
+        monkeypatch.setattr(CalculationStats, "rebuild", classmethod(lambda cls, *args: pytest.fail("rebuilt")))
+        assert _update(client, auth_headers, a, [10, 10]).status_code == 200
+
+        db_session.expire_all()
+        addition = db_session.get(CalculationStats, (test_user.id, "addition"))
+        multiplication = db_session.get(CalculationStats, (test_user.id, "multiplication"))
+        assert (addition.count, addition.total, addition.min_result, addition.max_result) == (2, 61.0, 20.0, 41.0)
+        assert (multiplication.count, multiplication.total, multiplication.min_result) == (1, 40.0, 40.0)
+
+    @pytest.mark.parametrize("target", [0, 2])
+    def test_cycles_are_rejected(self, client, auth_headers, chain, target):
+        a = chain[0]
+        response = _update(client, auth_headers, a, [_ref(chain[target]), 1])
+        assert response.status_code == 400
+        assert "depend on itself" in response.json()["detail"]
+
+    def test_dependent_that_cannot_be_recomputed_rolls_back(self, client, auth_headers, db_session, create_calculation):
+        a = create_calculation("addition", [1, 1])
+        b = create_calculation("division", [1, _ref(a)])
+
+        response = _update(client, auth_headers, a, [1, -1])
+        assert response.status_code == 400
+        assert b["id"] in response.json()["detail"]
+        assert _get(client, auth_headers, a)["result"] == 2.0
+        assert _get(client, auth_headers, b)["result"] == 0.5
+
+    def test_unknown_reference_is_rejected(self, client, auth_headers):
+        response = client.post(
+            "/calculations",
+            json={"type": "addition", "inputs": [{"calculation_id": str(uuid.uuid4())}, 1]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
+
+    def test_sources_cannot_be_deleted_while_used(self, client, auth_headers, chain, db_session):
+        a, b, c = chain
+        assert client.delete(f"/calculations/{a['id']}", headers=auth_headers).status_code == 409
+        assert client.delete(f"/calculations/{c['id']}", headers=auth_headers).status_code == 204
+        assert client.delete(f"/calculations/{b['id']}", headers=auth_headers).status_code == 204
+        assert client.delete(f"/calculations/{a['id']}", headers=auth_headers).status_code == 204
+        assert db_session.query(CalculationDependency).count() == 0
+
+    def test_replacing_inputs_drops_references(self, client, auth_headers, chain):
+        a, b, _ = chain
+        _update(client, auth_headers, b, [3, 3])
+        assert _get(client, auth_headers, b)["dependencies"] == []
+        _update(client, auth_headers, a, [50, 50])
+        assert _get(client, auth_headers, b)["result"] == 9.0
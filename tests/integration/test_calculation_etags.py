@@ -0,0 +1,63 @@
+from app.models.calculation_version import CalculationVersion
+
+
+class TestCollectionETag:
+    def test_unchanged_list_returns_304(self, client, auth_headers, create_calculation):
+        create_calculation("addition", [1, 2])
+        first = client.get("/calculations", headers=auth_headers)
+        etag = first.headers["ETag"]
+        assert etag.startswith('W/"')
+
+        second = client.get("/calculations", headers={**auth_headers, "If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.content == b""
+
+    def test_write_changes_list_etag(self, client, auth_headers, create_calculation):
+        calc = create_calculation("addition", [1, 2])
+        etag = client.get("/calculations", headers=auth_headers).headers["ETag"]
+
+        client.delete(f"/calculations/{calc['id']}", headers=auth_headers)
+        response = client.get("/calculations", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_filters_have_distinct_etags(self, client, auth_headers, create_calculation):
+        create_calculation("addition", [1, 2])
+        etag = client.get("/calculations", headers=auth_headers).headers["ETag"]
+        filtered = client.get("/calculations?type=power", headers={**auth_headers, "If-None-Match": etag})
+        assert filtered.status_code == 200
+        assert filtered.json() == []
+
+    def test_users_never_share_etags(self, client, auth_headers, other_headers, create_calculation):
+        create_calculation("addition", [1, 2])
+        create_calculation("addition", [1, 2], headers=other_headers)
+        mine = client.get("/calculations", headers=auth_headers)
+        theirs = client.get("/calculations", headers={**other_headers, "If-None-Match": mine.headers["ETag"]})
+        assert theirs.status_code == 200
+        assert theirs.headers["ETag"] != mine.headers["ETag"]
+        assert mine.headers["Vary"] == "Authorization"
+
+
+class TestItemETag:
+    def test_item_304_until_updated(self, client, auth_headers, create_calculation):
+        calc = create_calculation("addition", [1, 2])
+        url = f"/calculations/{calc['id']}"
+        etag = client.get(url, headers=auth_headers).headers["ETag"]
+
+        assert client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code == 304
+
+        client.put(url, json={"inputs": [3, 4]}, headers=auth_headers)
+        response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["result"] == 7
+        assert response.headers["ETag"] != etag
+
+
+class TestCalculationVersion:
+    def test_concurrent_first_bump_increments_existing_row(self, db_session, test_user, interleave):
+        interleave(
+            "UPDATE calculation_versions",
+            "INSERT INTO calculation_versions (user_id, version) VALUES (?, 1)",
+            (test_user.id.hex,)
+        )
+        assert CalculationVersion.bump(db_session, test_user.id) == 2
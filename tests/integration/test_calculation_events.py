@@ -0,0 +1,37 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.events import broker
+from app.main import calculation_events
+
+
+class _DisconnectingRequest:
+    """Stands in for a client that stays connected for ``checks`` polls."""
+
+    def __init__(self, checks):
+        self.checks = checks
+
+    async def is_disconnected(self):
+        self.checks -= 1
+        return self.checks < 0
+
+
+def test_event_stream_delivers_events_and_heartbeats(monkeypatch):
+    monkeypatch.setattr(settings, "EVENTS_HEARTBEAT_SECONDS", 0.05)
+    user = SimpleNamespace(id=uuid.uuid4())
+
+    async def scenario():
+        response = await calculation_events(_DisconnectingRequest(checks=2), current_user=user)
+        assert response.media_type == "text/event-stream"
+        broker.publish(user.id, {"type": "created", "id": "abc", "token": "1"})
+        chunks = [chunk async for chunk in response.body_iterator]
+        return chunks, broker.subscriber_count(user.id)
+
+    chunks, remaining = asyncio.run(scenario())
+    assert chunks[0].startswith("retry:")
+    assert chunks[1].startswith("event: created\ndata: ")
+    assert '"token": "1"' in chunks[1]
+    assert chunks[2] == ": heartbeat\n\n"
+    assert remaining == 0
@@ -0,0 +1,83 @@
+import io
+
+import pytest
+
+from app.core import columnar
+from app.core.config import settings
+from app.jobs.export_calculations import export_calculations
+
+
+@pytest.fixture
+def history(create_calculation):
+    return [
+        create_calculation("addition", [1, 2]),
+        create_calculation("multiplication", [2, 3, 4]),
+        create_calculation("addition", [0.5, 0.25]),
+    ]
+
+
+@pytest.fixture
+def pyarrow():
+    return pytest.importorskip("pyarrow")
+
+
+class TestColumnChunks:
+    def test_chunks_of_columns(self, db_session, test_user, history):
+        query = columnar.export_query(db_session, test_user.id, order="asc")
+        chunks = list(columnar.column_chunks(query, 2))
+        assert [len(chunk["id"]) for chunk in chunks] == [2, 1]
+        assert set(chunks[0]) == set(columnar.COLUMNS)
+        assert chunks[0]["id"] == [history[0]["id"], history[1]["id"]]
+        assert chunks[0]["inputs"] == [[1.0, 2.0], [2.0, 3.0, 4.0]]
+        assert chunks[1]["result"] == [0.75]
+        assert chunks[0]["expression"] == [None, None]
+
+    def test_filters_apply(self, db_session, test_user, history):
+        query = columnar.export_query(db_session, test_user.id, calculation_type="addition", min_result=1)
+        assert [chunk["result"] for chunk in columnar.column_chunks(query, 10)] == [[3.0]]
+
+
+class TestExportEndpoint:
+    def test_needs_pyarrow(self, client, auth_headers, monkeypatch):
+        monkeypatch.setattr(columnar, "PYARROW_AVAILABLE", False)
+        response = client.get("/calculations/export", headers=auth_headers)
+        assert response.status_code == 501
+        assert "pyarrow" in response.json()["detail"]
+
+    def test_rejects_unknown_format(self, client, auth_headers):
+        assert client.get("/calculations/export?format=csv", headers=auth_headers).status_code == 422
+
+    def test_arrow_stream(self, client, auth_headers, history, monkeypatch, pyarrow):
+        import pyarrow.ipc
+        monkeypatch.setattr(settings, "EXPORT_CHUNK_ROWS", 2)
+        response = client.get("/calculations/export?format=arrow&order=asc", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == columnar.MEDIA_TYPES["arrow"]
+        reader = pyarrow.ipc.open_stream(response.content)
+        assert reader.schema.field("inputs").type == pyarrow.list_(pyarrow.float64())
+        batches = list(reader)
+        assert [batch.num_rows for batch in batches] == [2, 1]
+        table = pyarrow.Table.from_batches(batches)
+        assert table.column("id").to_pylist() == [item["id"] for item in history]
+        assert table.column("inputs").to_pylist()[1] == [2.0, 3.0, 4.0]
+
+    def test_parquet_row_groups(self, client, auth_headers, history, monkeypatch, pyarrow):
+        import pyarrow.parquet as pq
+        monkeypatch.setattr(settings, "EXPORT_CHUNK_ROWS", 2)
+        response = client.get("/calculations/export?format=parquet&type=addition", headers=auth_headers)
+        assert response.status_code == 200
+        parquet = pq.ParquetFile(io.BytesIO(response.content))
+        assert parquet.metadata.num_rows == 2
+        assert parquet.read().column("result").to_pylist() == [0.75, 3.0]
+
+
+class TestExportJob:
+    def test_writes_parquet_file(self, tmp_path, db_session, test_user, history, pyarrow):
+        import pyarrow.parquet as pq
+        path = tmp_path / "history.parquet"
+        lines = []
+        rows = export_calculations(str(path), test_user.id, chunk_size=1, report=lines.append, db=db_session)
+        assert rows == 3 and "rows/s" in lines[0]
+        parquet = pq.ParquetFile(path)
+        assert parquet.num_row_groups == 3
+        assert parquet.read().column("type").to_pylist() == ["addition", "multiplication", "addition"]
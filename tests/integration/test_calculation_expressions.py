@@ -0,0 +1,76 @@
+import pytest
+
+from app.models.calculation_payload import CalculationPayload
+
+
+def _create(client, headers, body):
+    return client.post("/calculations", json=body, headers=headers)
+
+
+class TestExpressionCalculations:
+    def test_create_and_read_back(self, client, auth_headers):
+        response = _create(client, auth_headers, {
+            "type": "expression", "inputs": [1, 2, 90], "expression": "(a + b) * sin(c)",
+        })
+        assert response.status_code == 201
+        created = response.json()
+        assert created["result"] == pytest.approx(3.0)
+        assert created["expression"] == "(a + b) * sin(c)"
+
+        fetched = client.get(f"/calculations/{created['id']}", headers=auth_headers).json()
+        assert fetched["expression"] == "(a + b) * sin(c)"
+        assert fetched["inputs"] == [1.0, 2.0, 90.0]
+
+    @pytest.mark.parametrize("body", [
+        {"type": "expression", "inputs": [1]},
+        {"type": "expression", "inputs": [1], "expression": "__import__('os')"},
+        {"type": "expression", "inputs": [1], "expression": "a + b"},
+        {"type": "addition", "inputs": [1, 2], "expression": "a + b"},
+    ])
+    def test_invalid_requests_are_rejected(self, client, auth_headers, body):
+        assert _create(client, auth_headers, body).status_code == 422
+
+    def test_evaluation_error_is_bad_request(self, client, auth_headers):
+        response = _create(client, auth_headers, {
+            "type": "expression", "inputs": [1, 0], "expression": "a / b",
+        })
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Cannot divide by zero."
+
+    def test_expression_is_part_of_the_payload(self, client, auth_headers, db_session):
+        for text in ("a + b", "a * b", "a + b"):
+            _create(client, auth_headers, {"type": "expression", "inputs": [2, 3], "expression": text})
+        payloads = db_session.query(CalculationPayload).order_by(CalculationPayload.ref_count).all()
+        assert [(p.expression, p.ref_count) for p in payloads] == [("a * b", 1), ("a + b", 2)]
+
+    def test_update_expression_and_retype(self, client, auth_headers):
+        created = _create(client, auth_headers, {
+            "type": "expression", "inputs": [2, 3], "expression": "a + b",
+        }).json()
+
+        updated = client.put(
+            f"/calculations/{created['id']}", json={"expression": "a ** b"}, headers=auth_headers
+        )
+        assert updated.status_code == 200
+        assert updated.json()["result"] == 8.0
+
+        retyped = client.put(
+            f"/calculations/{created['id']}", json={"type": "multiplication"}, headers=auth_headers
+        )
+        assert retyped.status_code == 200
+        assert retyped.json()["result"] == 6.0
+        assert retyped.json()["expression"] is None
+
+    def test_map_over_an_expression(self, client, auth_headers):
+        response = client.post("/calculations/map", json={
+            "type": "expression", "expression": "a * b + 1", "rows": [[1, 2], [3, 4]],
+        }, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["results"] == [3.0, 13.0]
+
+    def test_huge_literal_is_rejected(self, client, auth_headers):
+        response = client.post("/calculations/map", json={
+            "type": "expression", "expression": "a + " + "9" * 400, "rows": [[1]],
+        }, headers=auth_headers)
+        assert response.status_code == 422
+        assert "too large" in response.text
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.calculation import Calculation
+
+
+class TestCalculationFilters:
+    def test_filter_by_type(self, client, auth_headers, create_calculation):
+        create_calculation("addition", [1, 2])
+        create_calculation("multiplication", [3, 4])
+        response = client.get("/calculations?type=addition", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert [calc["type"] for calc in data] == ["addition"]
+
+    def test_filter_by_result_range_sorted(self, client, auth_headers, create_calculation):
+        for inputs in ([1, 1], [5, 5], [50, 50]):
+            create_calculation("addition", inputs)
+        response = client.get(
+            "/calculations?min_result=5&max_result=100&sort_by=result&order=asc",
+            headers=auth_headers,
+        )
+        assert [calc["result"] for calc in response.json()] == [10, 100]
+
+    def test_filter_by_created_range(self, client, auth_headers, create_calculation):
+        create_calculation("addition", [1, 2])
+        future = (datetime.utcnow() + timedelta(days=1)).isoformat()
+        response = client.get(f"/calculations?created_after={future}", headers=auth_headers)
+        assert response.json() == []
+
+    def test_invalid_range_rejected(self, client, auth_headers):
+        response = client.get("/calculations?min_result=10&max_result=1", headers=auth_headers)
+        assert response.status_code == 422
+
+
+class TestListingQueryPlans:
+    @pytest.mark.parametrize(
+        "filters, index_name",
+        [
+            ({}, "ix_calculations_user_created"),
+            ({"calculation_type": "addition"}, "ix_calculations_user_type_created"),
+            (
+                {"calculation_type": "addition", "created_after": datetime(2025, 1, 1)},
+                "ix_calculations_user_type_created",
+            ),
+            ({"min_result": 0.0, "sort_by": "result"}, "ix_calculations_user_result"),
+        ],
+    )
+    def test_listing_uses_index(self, db_session, test_user, explain_plan, filters, index_name):
+        query = Calculation.filter_for_user(db_session, test_user.id, **filters)
+        plan = explain_plan(query)
+        assert f"SEARCH calculations USING INDEX {index_name} (" in plan
+        assert "SCAN calculations\n" not in plan + "\n"
+        # Only the id tie-breaker may need sorting; the main order comes from the index.
+        assert "USE TEMP B-TREE FOR ORDER BY" not in plan
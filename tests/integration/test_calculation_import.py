@@ -0,0 +1,126 @@
+import json
+import uuid
+
+import pytest
+
+from app.core import importer
+from app.core.config import settings
+from app.jobs.import_calculations import import_calculations
+from app.models.calculation import Calculation
+from app.models.calculation_stats import CalculationStats
+
+
+def _import(client, headers, format, body, **params):
+    return client.post(
+        "/calculations/import",
+        params={"format": format, **params},
+        content=body.encode(),
+        headers=headers
+    )
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_BATCH_ROWS", 2)
+
+
+NDJSON = "\n".join([
+    json.dumps({"type": "addition", "inputs": [1, 2]}),
+    json.dumps({"type": "division", "inputs": [1, 0]}),
+    "",
+    "not json",
+    json.dumps({"type": "multiplication", "inputs": [2, 3]}),
+    json.dumps({"type": "expression", "inputs": [2, 5], "expression": "x0 ** 2 + x1"}),
+])
+
+
+class TestCalculationImport:
+    def test_ndjson_reports_errors_by_line(self, client, auth_headers, db_session, test_user, small_batches):
+        response = _import(client, auth_headers, "ndjson", NDJSON)
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert (data["line"], data["imported"], data["failed"]) == (6, 3, 2)
+        assert set(data["errors"]) == {"2", "4"}
+        assert "zero" in data["errors"]["2"]
+        assert data["errors_truncated"] is False
+
+        rows = db_session.query(Calculation).filter(Calculation.user_id == test_user.id).all()
+        assert sorted(row.result for row in rows) == [3.0, 6.0, 9.0]
+        assert db_session.get(CalculationStats, (test_user.id, "addition")).total == 3.0
+
+    def test_csv_with_expression_column(self, client, auth_headers, db_session, test_user):
+        body = (
+            "type,inputs,expression\r\n"
+            "addition,1;2;3,\r\n"
+            'subtraction,"[10, 4]",\r\n'
+            "expression,2 3,x0 * x1\r\n"
+            "addition,1,\r\n"
+            "bogus,1;2,\r\n"
+        )
+        data = _import(client, auth_headers, "csv", body).json()
+        assert (data["imported"], data["failed"]) == (3, 2)
+        assert set(data["errors"]) == {"5", "6"}
+        listed = client.get("/calculations", headers=auth_headers).json()
+        assert sorted(item["result"] for item in listed) == [6.0, 6.0, 6.0]
+
+    def test_start_line_resumes(self, client, auth_headers, db_session, test_user):
+        data = _import(client, auth_headers, "ndjson", NDJSON, start_line=4).json()
+        assert (data["line"], data["imported"], data["failed"]) == (6, 2, 0)
+
+    def test_csv_header_must_name_columns(self, client, auth_headers):
+        response = _import(client, auth_headers, "csv", "kind,values\naddition,1;2\n")
+        assert response.status_code == 400
+        assert "inputs, type" in response.json()["detail"]
+
+    def test_errors_are_capped(self, client, auth_headers, monkeypatch):
+        monkeypatch.setattr(settings, "IMPORT_MAX_REPORTED_ERRORS", 1)
+        data = _import(client, auth_headers, "ndjson", "x\ny\n").json()
+        assert (data["failed"], list(data["errors"]), data["errors_truncated"]) == (2, ["1"], True)
+
+    def test_long_line_fails_only_itself(self, client, auth_headers, monkeypatch):
+        monkeypatch.setattr(importer, "MAX_LINE_BYTES", 64)
+        body = "\n".join([
+            json.dumps({"type": "addition", "inputs": [1, 2]}),
+            json.dumps({"type": "addition", "inputs": [1] * 40}),
+            json.dumps({"type": "addition", "inputs": [3, 4]}),
+        ])
+        data = _import(client, auth_headers, "ndjson", body).json()
+        assert (data["imported"], data["failed"]) == (2, 1)
+        assert data["errors"] == {"2": "Line is longer than 64 bytes."}
+
+    def test_requires_auth(self, client):
+        assert _import(client, {}, "ndjson", NDJSON).status_code == 401
+
+
+class TestImportJob:
+    def test_imports_file_with_checkpoint(self, tmp_path, db_session, test_user):
+        path = tmp_path / "history.ndjson"
+        path.write_text(NDJSON)
+        checkpoint = tmp_path / "import.json"
+        errors = tmp_path / "errors.ndjson"
+        lines = []
+        with open(errors, "w") as sink:
+            state = import_calculations(
+                str(path), test_user.id, batch_size=2, checkpoint=str(checkpoint),
+                errors=sink, report=lines.append, db=db_session
+            )
+        assert (state["line"], state["imported"], state["failed"]) == (6, 3, 2)
+        assert json.loads(checkpoint.read_text()) == state
+        assert [json.loads(line)["line"] for line in errors.read_text().splitlines()] == [2, 4]
+        assert len(lines) == 3 and "rows/s" in lines[-1]
+
+        # Nothing left after the checkpoint
+        state = import_calculations(
+            str(path), test_user.id, checkpoint=str(checkpoint), resume=True,
+            report=lines.append, db=db_session
+        )
+        assert state["imported"] == 3
+        assert db_session.query(Calculation).filter(Calculation.user_id == test_user.id).count() == 3
+
+    def test_checkpoint_is_for_one_file(self, tmp_path, db_session, test_user):
+        checkpoint = tmp_path / "import.json"
+        checkpoint.write_text(json.dumps({"path": "/elsewhere.csv", "line": 1, "imported": 0, "failed": 0}))
+        path = tmp_path / "history.csv"
+        path.write_text("type,inputs\n")
+        with pytest.raises(ValueError, match="elsewhere"):
+            import_calculations(str(path), uuid.uuid4(), checkpoint=str(checkpoint), resume=True, db=db_session)
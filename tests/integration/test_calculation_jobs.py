@@ -0,0 +1,182 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import app.main as main
+from app.core.job_runner import JobRunner
+from app.models.calculation import Calculation
+from app.models.calculation_job import CalculationJob
+
+
+def _runner(db_engine, execute=main._run_calculation_job):
+    return JobRunner(
+        sessionmaker(autoflush=False, expire_on_commit=False, bind=db_engine),
+        execute,
+        concurrency={"standard": 2, "heavy": 1},
+        after_commit=main._after_create
+    )
+
+
+@pytest.fixture
+def job_runner(db_engine, monkeypatch):
+    runner = _runner(db_engine)
+    monkeypatch.setattr(main, "job_runner", runner)
+    yield runner
+    runner.shutdown()
+
+
+def _submit(client, auth_headers, calc_type, inputs):
+    response = client.post(
+        "/calculations/jobs",
+        json={"type": calc_type, "inputs": inputs},
+        headers=auth_headers,
+    )
+    assert response.status_code == 202
+    return response
+
+
+def test_job_runs_and_stores_calculation(client, auth_headers, job_runner):
+    response = _submit(client, auth_headers, "addition", [1, 2, 3])
+    job = response.json()
+    assert response.headers["Location"] == f"/calculations/jobs/{job['id']}"
+    assert job["job_class"] == "standard"
+
+    job_runner.drain(timeout=5)
+    job = client.get(f"/calculations/jobs/{job['id']}", headers=auth_headers).json()
+    assert job["status"] == "succeeded"
+    assert job["result"] == 6
+    assert job["started_at"] and job["finished_at"]
+
+    result = client.get(f"/calculations/jobs/{job['id']}/result", headers=auth_headers)
+    assert result.status_code == 200
+    assert result.json()["id"] == job["calculation_id"]
+    listed = client.get("/calculations", headers=auth_headers).json()
+    assert [calc["id"] for calc in listed] == [job["calculation_id"]]
+
+
+def test_expensive_jobs_use_heavy_class(client, auth_headers, job_runner, monkeypatch):
+    monkeypatch.setattr(main.cost_guard, "offload_work", 3)
+    assert _submit(client, auth_headers, "addition", [1, 2]).json()["job_class"] == "standard"
+    # The test database is one shared connection; keep the jobs sequential.
+    job_runner.drain(timeout=5)
+    job = _submit(client, auth_headers, "addition", [1, 2, 3]).json()
+    assert job["job_class"] == "heavy"
+    job_runner.drain(timeout=5)
+    assert client.get(f"/calculations/jobs/{job['id']}", headers=auth_headers).json()["result"] == 6
+
+
+def test_over_budget_job_is_rejected_up_front(client, auth_headers, job_runner):
+    response = client.post(
+        "/calculations/jobs",
+        json={"type": "power", "inputs": [10, 1000]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
+    assert "too large" in response.json()["detail"]
+
+
+def test_failed_job_reports_error(client, auth_headers, job_runner):
+    job = _submit(client, auth_headers, "tan", [90]).json()
+    job_runner.drain(timeout=5)
+
+    job = client.get(f"/calculations/jobs/{job['id']}", headers=auth_headers).json()
+    assert job["status"] == "failed"
+    assert "undefined" in job["error"]
+    result = client.get(f"/calculations/jobs/{job['id']}/result", headers=auth_headers)
+    assert result.status_code == 409
+
+
+def test_cancel_running_job_discards_work(client, auth_headers, db_engine, db_session, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow(db, job):
+        started.set()
+        release.wait(5)
+        return main._run_calculation_job(db, job)
+
+    runner = _runner(db_engine, slow)
+    monkeypatch.setattr(main, "job_runner", runner)
+    job = _submit(client, auth_headers, "addition", [1, 1]).json()
+    assert started.wait(5)
+
+    response = client.delete(f"/calculations/jobs/{job['id']}", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    release.set()
+    runner.drain(timeout=5)
+    runner.shutdown()
+
+    db_session.expire_all()
+    assert db_session.query(Calculation).count() == 0
+    again = client.delete(f"/calculations/jobs/{job['id']}", headers=auth_headers)
+    assert again.status_code == 409
+
+
+def test_recover_reschedules_queued_and_fails_interrupted(client, auth_headers, test_user, db_session, job_runner):
+    queued = CalculationJob(user_id=test_user.id, type="addition", inputs=[2, 2], job_class="standard")
+    running = CalculationJob(
+        user_id=test_user.id, type="addition", inputs=[3, 3], job_class="standard",
+        status=CalculationJob.RUNNING
+    )
+    db_session.add_all([queued, running])
+    db_session.commit()
+
+    assert job_runner.recover() == 1
+    job_runner.drain(timeout=5)
+    db_session.expire_all()
+    assert db_session.get(CalculationJob, queued.id).status == "succeeded"
+    assert db_session.get(CalculationJob, running.id).status == "failed"
+
+
+def test_recover_leaves_jobs_of_live_processes(test_user, db_session, job_runner):
+    now = datetime.utcnow()
+
+    def running(owner, heartbeat_at):
+        return CalculationJob(
+            user_id=test_user.id, type="addition", inputs=[1, 1], job_class="standard",
+            status=CalculationJob.RUNNING, owner=owner, heartbeat_at=heartbeat_at
+        )
+
+    alive = running("other-worker", now - timedelta(seconds=5))
+    stale = running("crashed-worker", now - timedelta(minutes=5))
+    mine = running(job_runner.owner_id, now)
+    db_session.add_all([alive, stale, mine])
+    db_session.commit()
+
+    job_runner.recover(now=now)
+    db_session.expire_all()
+    assert [db_session.get(CalculationJob, job.id).status for job in (alive, stale, mine)] == [
+        "running", "failed", "failed"
+    ]
+
+
+def test_running_jobs_heartbeat(client, auth_headers, db_engine, db_session, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow(db, job):
+        started.set()
+        release.wait(5)
+        return main._run_calculation_job(db, job)
+
+    runner = _runner(db_engine, execute=slow)
+    monkeypatch.setattr(main, "job_runner", runner)
+    try:
+        job = _submit(client, auth_headers, "addition", [1, 2]).json()
+        assert started.wait(5)
+        later = datetime.utcnow() + timedelta(minutes=1)
+        assert runner.beat(now=later) == 1
+        db_session.expire_all()
+        row = db_session.get(CalculationJob, main.UUID(job["id"]))
+        assert (row.owner, row.heartbeat_at) == (runner.owner_id, later)
+    finally:
+        release.set()
+        runner.shutdown()
+
+
+def test_jobs_are_private(client, auth_headers, job_runner):
+    response = client.get(f"/calculations/jobs/{main.uuid4()}", headers=auth_headers)
+    assert response.status_code == 404
+    response = client.get("/calculations/jobs/not-a-uuid", headers=auth_headers)
+    assert response.status_code == 400
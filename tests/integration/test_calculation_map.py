@@ -0,0 +1,100 @@
+import struct
+
+from app.models.calculation import Calculation
+from app.models.calculation_payload import CalculationPayload, content_digest
+from app.models.calculation_stats import CalculationStats
+
+
+def _binary(rows):
+    return b"".join(struct.pack(f"<{len(row)}d", *row) for row in rows)
+
+
+class TestCalculationMap:
+    def test_evaluates_every_row(self, client, auth_headers, db_session):
+        response = client.post(
+            "/calculations/map",
+            json={"type": "power", "rows": [[2, 1], [2, 2], [2, 3]]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert body["count"] == 3
+        assert body["results"] == [2.0, 4.0, 8.0]
+        assert body["errors"] == {}
+        assert body["ids"] is None
+        assert db_session.query(Calculation).count() == 0
+
+    def test_failed_rows_do_not_fail_the_request(self, client, auth_headers):
+        response = client.post(
+            "/calculations/map",
+            json={"type": "division", "rows": [[6, 3], [1, 0]]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["results"] == [2.0, None]
+        assert response.json()["errors"] == {"1": "Cannot divide by zero."}
+
+    def test_rejects_ragged_and_short_rows(self, client, auth_headers):
+        ragged = client.post(
+            "/calculations/map",
+            json={"type": "addition", "rows": [[1, 2], [1, 2, 3]]},
+            headers=auth_headers,
+        )
+        short = client.post(
+            "/calculations/map",
+            json={"type": "addition", "rows": [[1], [2]]},
+            headers=auth_headers,
+        )
+        assert ragged.status_code == 422
+        assert short.status_code == 422
+
+    def test_store_persists_successful_rows(self, client, auth_headers, db_session, test_user):
+        response = client.post(
+            "/calculations/map",
+            json={"type": "division", "rows": [[6, 3], [1, 0], [6, 3], [9, 3]], "store": True},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        ids = response.json()["ids"]
+        assert ids[1] is None and None not in (ids[0], ids[2], ids[3])
+
+        listed = client.get("/calculations", headers=auth_headers).json()
+        assert sorted(item["result"] for item in listed) == [2.0, 2.0, 3.0]
+        assert db_session.get(CalculationPayload, content_digest("division", [6, 3])).ref_count == 2
+
+        stats = db_session.get(CalculationStats, (test_user.id, "division"))
+        assert (stats.count, stats.total, stats.min_result, stats.max_result) == (3, 7.0, 2.0, 3.0)
+
+    def test_stored_rows_show_up_in_changes(self, client, auth_headers):
+        token = client.get("/calculations/changes", headers=auth_headers).json()["token"]
+        client.post(
+            "/calculations/map",
+            json={"type": "addition", "rows": [[1, 2], [3, 4]], "store": True},
+            headers=auth_headers,
+        )
+        changes = client.get(f"/calculations/changes?since={token}", headers=auth_headers).json()
+        assert sorted(item["result"] for item in changes["changes"]) == [3.0, 7.0]
+
+    def test_binary_matrix(self, client, auth_headers):
+        response = client.post(
+            "/calculations/map/binary?type=multiplication&columns=3",
+            content=_binary([[1, 2, 3], [4, 5, 6]]),
+            headers={**auth_headers, "Content-Type": "application/octet-stream"},
+        )
+        assert response.status_code == 200
+        assert response.json()["results"] == [6.0, 120.0]
+
+    def test_binary_rejects_partial_rows_and_nan(self, client, auth_headers):
+        headers = {**auth_headers, "Content-Type": "application/octet-stream"}
+        partial = client.post(
+            "/calculations/map/binary?type=addition&columns=2",
+            content=_binary([[1, 2, 3]]),
+            headers=headers,
+        )
+        nan = client.post(
+            "/calculations/map/binary?type=addition&columns=2",
+            content=_binary([[1, float("nan")]]),
+            headers=headers,
+        )
+        assert partial.status_code == 400
+        assert nan.status_code == 400
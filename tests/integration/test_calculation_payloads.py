@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+from app.core.purge import purge_batch
+from app.models.calculation import Addition
+from app.models.calculation_payload import CalculationPayload, content_digest
+
+
+def _payload(db_session, calc_type, inputs):
+    db_session.expire_all()
+    return db_session.get(CalculationPayload, content_digest(calc_type, inputs))
+
+
+class TestCalculationPayloads:
+    def test_digest_ignores_int_float_spelling(self):
+        assert content_digest("addition", [1, 2]) == content_digest("Addition", [1.0, 2.0])
+        assert content_digest("addition", [1, 2]) != content_digest("addition", [2, 1])
+        assert content_digest("addition", [1, 2]) != content_digest("subtraction", [1, 2])
+
+    def test_identical_calculations_share_one_payload(self, other_headers, db_session, create_calculation):
+        mine = create_calculation("addition", [1, 2])
+        theirs = create_calculation("addition", [1.0, 2.0], headers=other_headers)
+
+        assert mine["id"] != theirs["id"]
+        assert mine["inputs"] == theirs["inputs"] == [1.0, 2.0]
+        assert db_session.query(CalculationPayload).count() == 1
+        assert _payload(db_session, "addition", [1, 2]).ref_count == 2
+
+    def test_repeat_reuses_stored_result(self, monkeypatch, create_calculation):
+        first = create_calculation("addition", [4, 5])
+
+        def fail(self):
+            raise AssertionError("result should come from the payload")
+
+        monkeypatch.setattr(Addition, "get_result", fail)
+        second = create_calculation("addition", [4, 5])
+        assert second["result"] == first["result"] == 9
+
+    def test_last_purge_removes_payload(self, client, auth_headers, db_session, create_calculation):
+        first = create_calculation("multiplication", [3, 3])
+        second = create_calculation("multiplication", [3, 3])
+
+        # Soft-deleted rows keep their reference until they are purged
+        client.delete(f"/calculations/{first['id']}", headers=auth_headers)
+        client.delete(f"/calculations/{second['id']}", headers=auth_headers)
+        assert _payload(db_session, "multiplication", [3, 3]).ref_count == 2
+
+        later = datetime.utcnow() + timedelta(seconds=1)
+        assert purge_batch(db_session, later, 1) == 1
+        db_session.commit()
+        assert _payload(db_session, "multiplication", [3, 3]).ref_count == 1
+
+        assert purge_batch(db_session, later, 1) == 1
+        db_session.commit()
+        assert _payload(db_session, "multiplication", [3, 3]) is None
+
+    def test_update_moves_reference(self, client, auth_headers, db_session, create_calculation):
+        calc = create_calculation("addition", [1, 1])
+
+        response = client.put(
+            f"/calculations/{calc['id']}", json={"inputs": [2, 2]}, headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert response.json()["inputs"] == [2, 2]
+        assert _payload(db_session, "addition", [1, 1]) is None
+        assert _payload(db_session, "addition", [2, 2]).ref_count == 1
+
+        response = client.put(
+            f"/calculations/{calc['id']}", json={"type": "multiplication"}, headers=auth_headers
+        )
+        assert response.json()["result"] == 4
+        assert _payload(db_session, "addition", [2, 2]) is None
+        assert _payload(db_session, "multiplication", [2, 2]).result == 4
+
+    def test_recount_repairs_leaked_references(self, db_session, create_calculation):
+        create_calculation("addition", [7, 7])
+        payload = _payload(db_session, "addition", [7, 7])
+        payload.ref_count = 5
+        db_session.add(CalculationPayload(
+            digest=content_digest("addition", [8, 8]), type="addition",
+            inputs=[8.0, 8.0], result=16.0, ref_count=1
+        ))
+        db_session.commit()
+
+        assert CalculationPayload.recount(db_session) == 1
+        db_session.commit()
+        assert _payload(db_session, "addition", [7, 7]).ref_count == 1
+        assert _payload(db_session, "addition", [8, 8]) is None
@@ -0,0 +1,140 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.core.metrics import metrics
+from app.core.purge import PurgeTask
+from app.models.calculation import Calculation
+from app.models.calculation_dependency import CalculationDependency
+from app.models.calculation_stats import CalculationStats
+from app.models.calculation_tombstone import CalculationTombstone
+
+
+def _row(db_session, calculation):
+    db_session.expire_all()
+    return db_session.get(Calculation, uuid.UUID(calculation["id"]))
+
+
+@pytest.fixture
+def purge(db_engine):
+    """A purge task on its own sessions; with no retention it takes everything deleted."""
+    metrics.reset()
+
+    def make(**kwargs):
+        kwargs.setdefault("retention", timedelta(0))
+        return PurgeTask(sessionmaker(bind=db_engine), **kwargs)
+    return make
+
+
+class TestSoftDelete:
+    def test_deleted_rows_are_hidden(self, client, auth_headers, db_session, test_user, create_calculation):
+        kept = create_calculation("addition", [1, 2])
+        gone = create_calculation("addition", [3, 4])
+        token = client.get("/calculations/changes", headers=auth_headers).json()["token"]
+
+        assert client.delete(f"/calculations/{gone['id']}", headers=auth_headers).status_code == 204
+
+        assert _row(db_session, gone).deleted_at is not None
+        assert client.get(f"/calculations/{gone['id']}", headers=auth_headers).status_code == 404
+        assert client.delete(f"/calculations/{gone['id']}", headers=auth_headers).status_code == 404
+        assert client.put(
+            f"/calculations/{gone['id']}", json={"inputs": [1, 1]}, headers=auth_headers
+        ).status_code == 404
+        assert [item["id"] for item in client.get("/calculations", headers=auth_headers).json()] == [kept["id"]]
+        assert client.post("/calculations", json={
+            "type": "addition", "inputs": [{"calculation_id": gone["id"]}, 1]
+        }, headers=auth_headers).status_code == 400
+
+        changes = client.get(f"/calculations/changes?since={token}", headers=auth_headers).json()
+        assert (changes["changes"], changes["deleted"]) == ([], [gone["id"]])
+        assert client.get("/calculations/changes", headers=auth_headers).json()["changes"][0]["id"] == kept["id"]
+
+        CalculationStats.rebuild(db_session, test_user.id)
+        db_session.commit()
+        assert client.get("/calculations/stats", headers=auth_headers).json()["total"] == 3.0
+
+    def test_deleted_dependent_releases_its_source(self, client, auth_headers, db_session, create_calculation):
+        source = create_calculation("addition", [1, 2])
+        dependent = create_calculation("addition", [{"calculation_id": source["id"]}, 1])
+        client.delete(f"/calculations/{dependent['id']}", headers=auth_headers)
+        assert db_session.query(CalculationDependency).count() == 0
+        assert client.delete(f"/calculations/{source['id']}", headers=auth_headers).status_code == 204
+
+
+class TestPurge:
+    def test_purges_after_retention(self, client, auth_headers, db_session, purge, create_calculation):
+        gone = create_calculation("addition", [1, 2])
+        client.delete(f"/calculations/{gone['id']}", headers=auth_headers)
+
+        task = purge(retention=timedelta(hours=1))
+        assert task.run_once() == 0
+        assert _row(db_session, gone) is not None
+        assert task.run_once(now=datetime.utcnow() + timedelta(hours=2)) == 1
+        assert _row(db_session, gone) is None
+
+    def test_live_rows_are_never_purged(self, db_session, purge, create_calculation):
+        kept = create_calculation("addition", [1, 2])
+        assert purge().run_once(now=datetime.utcnow() + timedelta(days=365)) == 0
+        assert _row(db_session, kept) is not None
+
+    def test_runs_are_bounded(self, client, auth_headers, db_session, purge, create_calculation):
+        created = [create_calculation("addition", [i, 1]) for i in range(5)]
+        assert client.post(
+            "/calculations/bulk/delete", json={"all": True}, headers=auth_headers
+        ).json()["count"] == 5
+
+        task = purge(batch_size=2, max_batches=2)
+        later = datetime.utcnow() + timedelta(seconds=1)
+        assert task.run_once(now=later) == 4
+        assert metrics.counter("calculations_purged_total") == 4
+        assert metrics.counter("calculation_purge_batches_total") == 2
+        assert metrics.summary("calculation_purge_batch_seconds")[0] == 2
+
+        assert task.run_once(now=later) == 1
+        assert all(_row(db_session, item) is None for item in created)
+        assert "calculations_purged_total 5.0" in metrics.render()
+
+    def test_background_thread(self, client, auth_headers, db_session, purge, create_calculation):
+        gone = create_calculation("addition", [1, 2])
+        client.delete(f"/calculations/{gone['id']}", headers=auth_headers)
+        task = purge(interval_seconds=0.01)
+        task.start()
+        try:
+            for _ in range(200):
+                if metrics.counter("calculations_purged_total"):
+                    break
+                time.sleep(0.01)
+        finally:
+            task.stop()
+        assert metrics.counter("calculations_purged_total") == 1
+        assert _row(db_session, gone) is None
+
+
+class TestTombstonePruning:
+    def test_old_tombstones_are_pruned_and_old_tokens_resync(
+        self, client, auth_headers, db_session, purge, create_calculation
+    ):
+        kept = create_calculation("addition", [1, 2])
+        first = create_calculation("addition", [3, 4])
+        stale_token = client.get("/calculations/changes", headers=auth_headers).json()["token"]
+        client.delete(f"/calculations/{first['id']}", headers=auth_headers)
+        fresh_token = client.get("/calculations/changes", headers=auth_headers).json()["token"]
+        second = create_calculation("addition", [5, 6])
+
+        task = purge(retention=timedelta(days=365), tombstone_retention=timedelta(hours=1))
+        assert task.run_once() == 0
+        assert db_session.query(CalculationTombstone).count() == 1
+        task.run_once(now=datetime.utcnow() + timedelta(hours=2))
+        assert db_session.query(CalculationTombstone).count() == 0
+        assert metrics.counter("calculation_tombstones_pruned_total") == 1
+
+        stale = client.get(f"/calculations/changes?since={stale_token}", headers=auth_headers).json()
+        assert stale["reset"] is True
+        assert {item["id"] for item in stale["changes"]} == {kept["id"], second["id"]}
+
+        fresh = client.get(f"/calculations/changes?since={fresh_token}", headers=auth_headers).json()
+        assert fresh["reset"] is False
+        assert [item["id"] for item in fresh["changes"]] == [second["id"]]
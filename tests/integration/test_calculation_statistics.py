@@ -0,0 +1,92 @@
+import random
+import struct
+
+import pytest
+
+from app.core import statistics
+
+
+def _binary(values):
+    return struct.pack(f"<{len(values)}d", *values)
+
+
+class TestStatisticalCalculations:
+    @pytest.mark.parametrize("calculation_type, inputs, expected", [
+        ("mean", [4], 4.0),
+        ("variance", [1, 2, 3, 4], 5 / 3),
+        ("stddev", [2, 4, 4, 4, 5, 5, 7, 9], (32 / 7) ** 0.5),
+        ("median", [9, 1, 5, 3], 4.0),
+        ("percentile", [75, 10, 20, 30, 40, 50], 40.0),
+    ])
+    def test_create(self, client, auth_headers, calculation_type, inputs, expected):
+        response = client.post(
+            "/calculations", json={"type": calculation_type, "inputs": inputs}, headers=auth_headers
+        )
+        assert response.status_code == 201, response.text
+        assert response.json()["result"] == pytest.approx(expected)
+
+    @pytest.mark.parametrize("calculation_type, inputs", [
+        ("variance", [1]),
+        ("stddev", [1]),
+        ("percentile", [50]),
+        ("percentile", [150, 1, 2]),
+    ])
+    def test_validation(self, client, auth_headers, calculation_type, inputs):
+        response = client.post(
+            "/calculations", json={"type": calculation_type, "inputs": inputs}, headers=auth_headers
+        )
+        assert response.status_code == 422
+
+    def test_variance_beyond_float_range_is_refused(self, client, auth_headers):
+        response = client.post(
+            "/calculations", json={"type": "variance", "inputs": [-1e200, 1e200]}, headers=auth_headers
+        )
+        assert response.status_code == 400
+
+
+class TestStreamedStatistic:
+    @pytest.fixture
+    def values(self):
+        rng = random.Random(7)
+        return [rng.uniform(-50, 50) for _ in range(20_000)]
+
+    def test_moments_are_exact(self, client, auth_headers, values):
+        response = client.post(
+            "/calculations/statistics/binary?type=variance",
+            content=_binary(values),
+            headers={**auth_headers, "Content-Type": "application/octet-stream"},
+        )
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["count"] == len(values)
+        assert body["result"] == pytest.approx(statistics.variance(values), rel=1e-12)
+
+    def test_streamed_body_in_odd_sized_chunks(self, client, auth_headers, values):
+        data = _binary(values)
+
+        def chunks():
+            for start in range(0, len(data), 1001):
+                yield data[start:start + 1001]
+
+        response = client.post(
+            "/calculations/statistics/binary?type=percentile&percentile=95",
+            content=chunks(),
+            headers={**auth_headers, "Content-Type": "application/octet-stream"},
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["result"] == pytest.approx(statistics.quantile(values, 0.95), abs=0.5)
+
+    @pytest.mark.parametrize("query, data", [
+        ("type=mean", b"\x00" * 12),
+        ("type=mean", b""),
+        ("type=percentile", _binary([1.0])),
+        ("type=addition", _binary([1.0])),
+        ("type=median", _binary([float("nan")])),
+    ])
+    def test_rejects_bad_requests(self, client, auth_headers, query, data):
+        response = client.post(
+            f"/calculations/statistics/binary?{query}",
+            content=data,
+            headers={**auth_headers, "Content-Type": "application/octet-stream"},
+        )
+        assert response.status_code == 400
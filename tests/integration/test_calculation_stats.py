@@ -0,0 +1,65 @@
+import pytest
+
+from app.models.calculation_stats import CalculationStats
+
+
+class TestCalculationStats:
+    def test_empty_stats(self, client, auth_headers):
+        response = client.get("/calculations/stats", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 0
+        assert data["average"] is None
+        assert data["by_type"] == []
+
+    def test_stats_follow_create_update_delete(self, client, auth_headers, create_calculation):
+        first = create_calculation("addition", [1, 2])
+        second = create_calculation("addition", [10, 20])
+        create_calculation("multiplication", [2, 5])
+
+        data = client.get("/calculations/stats", headers=auth_headers).json()
+        assert data["count"] == 3
+        assert data["total"] == 43
+        addition = next(item for item in data["by_type"] if item["type"] == "addition")
+        assert addition["count"] == 2
+        assert addition["min_result"] == 3
+        assert addition["max_result"] == 30
+
+        client.put(f"/calculations/{second['id']}", json={"inputs": [1, 1]}, headers=auth_headers)
+        data = client.get("/calculations/stats", headers=auth_headers).json()
+        addition = next(item for item in data["by_type"] if item["type"] == "addition")
+        assert addition["total"] == 5
+        assert addition["max_result"] == 3
+        assert addition["min_result"] == 2
+
+        client.delete(f"/calculations/{first['id']}", headers=auth_headers)
+        data = client.get("/calculations/stats", headers=auth_headers).json()
+        addition = next(item for item in data["by_type"] if item["type"] == "addition")
+        assert addition["count"] == 1
+        assert addition["min_result"] == addition["max_result"] == 2
+        assert data["count"] == 2
+
+    def test_rebuild_matches_incremental(self, client, auth_headers, db_session, test_user, create_calculation):
+        for inputs in ([1, 2], [3, 4], [5, 6]):
+            create_calculation("addition", inputs)
+        create_calculation("power", [2, 3])
+        before = client.get("/calculations/stats", headers=auth_headers).json()
+
+        db_session.query(CalculationStats).delete()
+        db_session.commit()
+        assert CalculationStats.rebuild(db_session) == 2
+        db_session.commit()
+
+        after = client.get("/calculations/stats", headers=auth_headers).json()
+        assert after == before
+
+    def test_concurrent_first_write_folds_into_existing_row(self, db_session, test_user, interleave):
+        interleave(
+            "SELECT calculation_stats.",
+            "INSERT INTO calculation_stats (user_id, type, count, total) VALUES (?, 'addition', 1, 2.0)",
+            (test_user.id.hex,)
+        )
+        CalculationStats.record_added_many(db_session, test_user.id, "addition", [3.0])
+        db_session.commit()
+        stats = db_session.get(CalculationStats, (test_user.id, "addition"))
+        assert (stats.count, stats.total) == (2, 5.0)
@@ -0,0 +1,82 @@
+import json
+import math
+
+import pytest
+
+from app.core.config import settings
+from app.models.calculation import Calculation
+
+
+def _sweep(client, headers, body):
+    response = client.post("/calculations/sweep", json=body, headers=headers)
+    lines = [json.loads(line) for line in response.text.splitlines()] if response.status_code == 200 else []
+    return response, lines
+
+
+class TestCalculationSweep:
+    def test_sin_over_degrees(self, client, auth_headers):
+        response, lines = _sweep(client, auth_headers, {
+            "type": "sin",
+            "inputs": [{"start": 0, "stop": 360, "step": 90}],
+        })
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert response.headers["x-sweep-points"] == "5"
+        results = lines[0]["results"]
+        assert results == pytest.approx([math.sin(math.radians(d)) for d in (0, 90, 180, 270, 360)])
+
+    def test_streams_in_batches(self, client, auth_headers, monkeypatch):
+        monkeypatch.setattr(settings, "SWEEP_BATCH_ROWS", 4)
+        response, lines = _sweep(client, auth_headers, {
+            "type": "power",
+            "inputs": [{"start": 1, "stop": 2, "step": 1}, {"start": 0, "stop": 4, "step": 1}],
+        })
+        assert response.headers["x-sweep-points"] == "10"
+        assert [line["offset"] for line in lines] == [0, 4, 8]
+        results = [value for line in lines for value in line["results"]]
+        assert results == [1, 1, 1, 1, 1, 1, 2, 4, 8, 16]
+
+    def test_failed_points_are_reported_in_their_batch(self, client, auth_headers):
+        _, lines = _sweep(client, auth_headers, {
+            "type": "division",
+            "inputs": [1, {"start": -1, "stop": 1, "step": 1}],
+        })
+        assert lines[0]["results"] == [-1.0, None, 1.0]
+        assert lines[0]["errors"] == {"1": "Cannot divide by zero."}
+
+    def test_store_saves_successful_points(self, client, auth_headers, db_session):
+        _, lines = _sweep(client, auth_headers, {
+            "type": "division",
+            "inputs": [1, {"start": -1, "stop": 1, "step": 1}],
+            "store": True,
+        })
+        ids = lines[0]["ids"]
+        assert ids[1] is None and ids[0] and ids[2]
+        db_session.expire_all()
+        assert db_session.query(Calculation).count() == 2
+
+    def test_rejects_bad_ranges(self, client, auth_headers):
+        zero_step, _ = _sweep(client, auth_headers, {
+            "type": "sin", "inputs": [{"start": 0, "stop": 1, "step": 0}],
+        })
+        wrong_way, _ = _sweep(client, auth_headers, {
+            "type": "sin", "inputs": [{"start": 0, "stop": 1, "step": -1}],
+        })
+        assert zero_step.status_code == 422
+        assert wrong_way.status_code == 422
+
+    @pytest.mark.parametrize("start, stop, step", [(0, 1e308, 1e-308), (0, 1, 1e-320), (0, 10 ** 7, 1)])
+    def test_rejects_ranges_with_too_many_points(self, client, auth_headers, start, stop, step):
+        response, _ = _sweep(client, auth_headers, {
+            "type": "sin", "inputs": [{"start": start, "stop": stop, "step": step}],
+        })
+        assert response.status_code == 422
+        assert "points" in response.text
+
+    def test_over_budget_is_rejected_before_streaming(self, client, auth_headers):
+        response, _ = _sweep(client, auth_headers, {
+            "type": "addition",
+            "inputs": [{"start": 0, "stop": 10 ** 6, "step": 1}, {"start": 0, "stop": 10 ** 6, "step": 1}],
+        })
+        assert response.status_code == 400
+        assert "compute budget" in response.json()["detail"]
@@ -0,0 +1,28 @@
+def test_over_budget_create_is_rejected(client, auth_headers):
+    response = client.post(
+        "/calculations",
+        json={"type": "power", "inputs": [10, 100000]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
+    assert "too large" in response.json()["detail"]
+    assert client.get("/calculations", headers=auth_headers).json() == []
+
+
+def test_power_domain_errors_are_client_errors(client, auth_headers):
+    for inputs in ([-8, 0.5], [0, -1]):
+        response = client.post(
+            "/calculations",
+            json={"type": "power", "inputs": inputs},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
+
+
+def test_exponential_overflow_is_rejected(client, auth_headers):
+    response = client.post(
+        "/calculations",
+        json={"type": "exponential", "inputs": [1000]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
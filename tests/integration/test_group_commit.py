@@ -0,0 +1,105 @@
+import threading
+import uuid
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import app.main as main
+from app.core.group_commit import GroupCommitWriter
+from app.models.calculation import Calculation
+from app.models.calculation_payload import CalculationPayload
+from app.models.calculation_stats import CalculationStats
+
+
+@pytest.fixture
+def group_writer(db_engine, monkeypatch):
+    writer = GroupCommitWriter(
+        sessionmaker(autoflush=False, expire_on_commit=False, bind=db_engine),
+        main._persist_new_calculation,
+        window_seconds=0.001
+    )
+    monkeypatch.setattr(main, "group_writer", writer)
+    yield writer
+    writer.close()
+
+
+def test_create_through_group_writer(client, auth_headers, db_session, group_writer):
+    response = client.post(
+        "/calculations",
+        json={"type": "multiplication", "inputs": [3, 4]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert data["result"] == 12
+
+    stored = db_session.get(Calculation, main.UUID(data["id"]))
+    assert stored is not None and stored.change_seq == 1
+    assert db_session.query(CalculationStats).one().count == 1
+
+
+def test_invalid_create_never_reaches_writer(client, auth_headers, group_writer):
+    response = client.post(
+        "/calculations",
+        json={"type": "power", "inputs": [2]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 422
+
+
+def test_unacknowledged_create_responds_from_captured_values(client, auth_headers, db_engine, monkeypatch):
+    release = threading.Event()
+
+    def persist(db, calculation):
+        # Holds the object on the writer thread until the response is out.
+        release.wait(5)
+        main._persist_new_calculation(db, calculation)
+
+    writer = GroupCommitWriter(
+        sessionmaker(autoflush=False, expire_on_commit=False, bind=db_engine),
+        persist,
+        window_seconds=0.001,
+        wait_for_commit=False
+    )
+    monkeypatch.setattr(main, "group_writer", writer)
+    try:
+        response = client.post(
+            "/calculations",
+            json={"type": "addition", "inputs": [1, 2]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 201
+        assert (response.json()["result"], response.json()["inputs"]) == (3, [1, 2])
+    finally:
+        release.set()
+        writer.close()
+    assert client.get(f"/calculations/{response.json()['id']}", headers=auth_headers).status_code == 200
+
+
+def test_good_row_survives_a_failed_batch(client, auth_headers, db_session, db_engine, test_user, monkeypatch):
+    bad_user, attempts = uuid.uuid4(), []
+
+    def persist(db, calculation):
+        attempts.append(calculation.user_id)
+        main._persist_new_calculation(db, calculation)
+        if calculation.user_id == bad_user:
+            raise ValueError("rejected")
+
+    writer = GroupCommitWriter(
+        sessionmaker(autoflush=False, expire_on_commit=False, bind=db_engine),
+        persist,
+        window_seconds=0.5,
+        wait_for_commit=False
+    )
+    good = Calculation.create("addition", test_user.id, [2, 3])
+    bad = Calculation.create("addition", bad_user, [2, 3])
+    for calculation in (good, bad):
+        calculation.result = 5.0
+        writer.submit(calculation)
+    writer.close()
+    assert attempts == [test_user.id, bad_user, test_user.id, bad_user]  # one batch, then row by row
+
+    db_session.expire_all()
+    payload = db_session.get(CalculationPayload, good.payload_digest)
+    assert payload is not None and payload.ref_count == 1
+    assert client.get(f"/calculations/{good.id}", headers=auth_headers).json()["result"] == 5.0
@@ -0,0 +1,54 @@
+import pytest
+
+from app.core.idempotency import idempotency_store
+from app.models.calculation import Calculation
+
+
+@pytest.fixture(autouse=True)
+def clean_store():
+    idempotency_store.clear()
+    yield
+    idempotency_store.clear()
+
+
+def _post(client, auth_headers, key, inputs):
+    return client.post(
+        "/calculations",
+        json={"type": "addition", "inputs": inputs},
+        headers={**auth_headers, "Idempotency-Key": key},
+    )
+
+
+class TestIdempotentCreate:
+    def test_replay_returns_first_response_without_new_row(self, client, auth_headers, db_session):
+        first = _post(client, auth_headers, "key-1", [1, 2])
+        second = _post(client, auth_headers, "key-1", [1, 2])
+        assert first.status_code == second.status_code == 201
+        assert second.json() == first.json()
+        assert second.headers["Idempotency-Replayed"] == "true"
+        assert db_session.query(Calculation).count() == 1
+
+    def test_reused_key_with_different_body_is_rejected(self, client, auth_headers):
+        _post(client, auth_headers, "key-1", [1, 2])
+        response = _post(client, auth_headers, "key-1", [3, 4])
+        assert response.status_code == 422
+
+    def test_errors_are_replayed(self, client, auth_headers):
+        first = client.put(
+            "/calculations/00000000-0000-0000-0000-000000000000",
+            json={"inputs": [1, 2]},
+            headers={**auth_headers, "Idempotency-Key": "missing"},
+        )
+        assert first.status_code == 404
+        second = client.put(
+            "/calculations/00000000-0000-0000-0000-000000000000",
+            json={"inputs": [1, 2]},
+            headers={**auth_headers, "Idempotency-Key": "missing"},
+        )
+        assert second.status_code == 404
+        assert second.headers["Idempotency-Replayed"] == "true"
+
+    def test_without_key_creates_every_time(self, client, auth_headers, db_session):
+        for _ in range(2):
+            client.post("/calculations", json={"type": "addition", "inputs": [1, 2]}, headers=auth_headers)
+        assert db_session.query(Calculation).count() == 2
@@ -0,0 +1,78 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, inspect
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+from app.jobs.migrate_schema import migrate_schema
+from app.models.calculation_payload import CalculationPayload
+from app.models.calculation_stats import CalculationStats
+from app.models.user import User
+
+_legacy = MetaData()
+_legacy_calculations = Table(
+    "calculations", _legacy,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("user_id", UUID(as_uuid=True), ForeignKey(User.__table__.c.id), nullable=False, index=True),
+    Column("type", String(50), nullable=False, index=True),
+    Column("inputs", JSON, nullable=False),
+    Column("result", Float, nullable=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+_legacy_versions = Table(
+    "calculation_versions", _legacy,
+    Column("user_id", UUID(as_uuid=True), primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+
+
+@pytest.fixture
+def legacy_db(db_engine):
+    """The schema of an earlier release: inputs inline, versions without pruned_seq."""
+    Base.metadata.drop_all(bind=db_engine)
+    User.__table__.create(bind=db_engine)
+    _legacy.create_all(bind=db_engine, tables=[_legacy_calculations, _legacy_versions])
+    return db_engine
+
+
+def _insert(db_session, user_id, calc_type, inputs, result):
+    now = datetime.utcnow()
+    db_session.execute(_legacy_calculations.insert().values(
+        id=uuid.uuid4(), user_id=user_id, type=calc_type, inputs=inputs, result=result,
+        created_at=now, updated_at=now
+    ))
+
+
+class TestMigrateSchema:
+    def test_upgrades_a_legacy_database(self, legacy_db, client, auth_headers, db_session, test_user):
+        for inputs in ([1, 2], [1, 2], [3, 4]):
+            _insert(db_session, test_user.id, "addition", inputs, float(sum(inputs)))
+        _insert(db_session, test_user.id, "multiplication", [2, 5], 10.0)
+        db_session.commit()
+
+        lines = []
+        summary = migrate_schema(chunk_size=2, report=lines.append, db=db_session)
+        assert {"calculations.payload_digest", "calculations.change_seq", "calculations.deleted_at",
+                "calculation_versions.pruned_seq"} <= set(summary.columns)
+        assert (summary.payloads, summary.sequenced, summary.stats_rows) == (4, 4, 2)
+        assert lines[-1] == "Moved the inputs of 4 calculations to calculation_payloads"
+
+        inspector = inspect(legacy_db)
+        assert "inputs" not in {column["name"] for column in inspector.get_columns("calculations")}
+        assert "ix_calculations_user_change_seq" in {index["name"] for index in inspector.get_indexes("calculations")}
+        assert db_session.query(CalculationPayload).filter(CalculationPayload.ref_count == 2).count() == 1
+        assert db_session.get(CalculationStats, (test_user.id, "addition")).total == 13.0
+
+        listed = client.get("/calculations", headers=auth_headers).json()
+        assert sorted(item["inputs"] for item in listed) == [[1.0, 2.0], [1.0, 2.0], [2.0, 5.0], [3.0, 4.0]]
+        changes = client.get("/calculations/changes?since=0", headers=auth_headers).json()
+        assert len(changes["changes"]) == 4
+        created = client.post("/calculations", json={"type": "addition", "inputs": [1, 2]}, headers=auth_headers)
+        assert created.status_code == 201
+        later = client.get(f"/calculations/changes?since={changes['token']}", headers=auth_headers).json()
+        assert [item["id"] for item in later["changes"]] == [created.json()["id"]]
+
+        assert migrate_schema(report=lines.append, db=db_session).columns == []
@@ -0,0 +1,123 @@
+import uuid
+
+import pytest
+
+from app.jobs.recompute_results import RecomputeProgress, recompute_results
+from app.models.calculation import Calculation, Division
+from app.models.calculation_payload import CalculationPayload
+from app.models.calculation_stats import CalculationStats
+
+
+@pytest.fixture
+def floor_division(monkeypatch):
+    """Call to change division's semantics, leaving stored results stale."""
+    def compute(inputs):
+        if inputs[0] == 13:
+            raise ValueError("Unlucky.")
+        return float(inputs[0] // inputs[1])
+    return lambda: monkeypatch.setattr(Division, "compute", staticmethod(compute))
+
+
+def _row(db_session, calculation):
+    return db_session.get(Calculation, uuid.UUID(calculation["id"]))
+
+
+def _run(db_session, **kwargs):
+    lines = []
+    kwargs.setdefault("report", lines.append)
+    progress = recompute_results("division", mode="inline", db=db_session, **kwargs)
+    db_session.expire_all()
+    return progress, lines
+
+
+class TestRecomputeResults:
+    def test_rewrites_stale_results(
+        self, client, auth_headers, db_session, test_user, floor_division, create_calculation
+    ):
+        stale = [create_calculation("division", [7, 2]) for _ in range(2)]
+        exact = create_calculation("division", [8, 2])
+        other = create_calculation("addition", [7, 2])
+        token = client.get("/calculations/changes", headers=auth_headers).json()["token"]
+        floor_division()
+
+        progress, lines = _run(db_session, chunk_size=1)
+
+        assert (progress.payloads, progress.changed, progress.rows, progress.failed) == (2, 1, 2, 0)
+        assert len(lines) == 2 and "payloads/s" in lines[-1]
+        for calculation in stale:
+            row = _row(db_session, calculation)
+            assert (row.result, row.version) == (3.0, 2)
+        assert _row(db_session, exact).version == 1
+        assert _row(db_session, other).version == 1
+        payload = db_session.query(CalculationPayload).filter(CalculationPayload.result == 3.0).one()
+        assert payload.ref_count == 2
+        assert db_session.get(CalculationStats, (test_user.id, "division")).total == 10.0
+
+        changes = client.get(f"/calculations/changes?since={token}", headers=auth_headers).json()
+        assert {item["id"] for item in changes["changes"]} == {item["id"] for item in stale}
+
+    def test_rows_that_fail_are_kept(self, db_session, floor_division, create_calculation):
+        failing = create_calculation("division", [13, 2])
+        floor_division()
+        progress, _ = _run(db_session)
+        assert (progress.failed, progress.changed) == (1, 0)
+        assert _row(db_session, failing).result == 6.5
+
+    def test_dependents_follow(self, db_session, floor_division, create_calculation):
+        source = create_calculation("division", [7, 2])
+        dependent = create_calculation("addition", [{"calculation_id": source["id"]}, 1])
+        floor_division()
+        progress, _ = _run(db_session)
+        assert progress.dependents == 1
+        row = _row(db_session, dependent)
+        assert (row.inputs, row.result) == ([3.0, 1.0], 4.0)
+
+    def test_resumes_from_checkpoint(self, db_session, floor_division, tmp_path, create_calculation):
+        for numerator in (3, 5, 7, 9):
+            create_calculation("division", [numerator, 2])
+        checkpoint = str(tmp_path / "recompute.json")
+        floor_division()
+
+        def crash_after_two(line, calls=[]):
+            calls.append(line)
+            if len(calls) == 2:
+                raise RuntimeError("interrupted")
+
+        with pytest.raises(RuntimeError):
+            _run(db_session, chunk_size=1, workers=1, checkpoint=checkpoint, report=crash_after_two)
+        assert RecomputeProgress.load(checkpoint).payloads == 2
+
+        progress, lines = _run(db_session, chunk_size=1, workers=1, checkpoint=checkpoint, resume=True)
+        assert (progress.payloads, progress.changed) == (4, 4)
+        assert len(lines) == 2
+        results = sorted(row.result for row in db_session.query(Calculation))
+        assert results == [1.0, 2.0, 3.0, 4.0]
+
+    def test_interrupted_run_leaves_stats_consistent(
+        self, db_session, test_user, floor_division, create_calculation
+    ):
+        for numerator in (3, 5, 7, 9):
+            create_calculation("division", [numerator, 2])
+        floor_division()
+
+        def crash_after_two(line, calls=[]):
+            calls.append(line)
+            if len(calls) == 2:
+                raise RuntimeError("interrupted")
+
+        with pytest.raises(RuntimeError):
+            _run(db_session, chunk_size=1, workers=1, report=crash_after_two)
+        db_session.expire_all()
+        stats = db_session.get(CalculationStats, (test_user.id, "division"))
+        results = [row.result for row in db_session.query(Calculation)]
+        assert (stats.count, stats.total) == (4, sum(results))
+        assert (stats.min_result, stats.max_result) == (min(results), max(results))
+        assert sorted(results) != [1.0, 2.0, 3.0, 4.0]  # only part of the run committed
+
+    def test_rejects_unknown_type_and_mismatched_checkpoint(self, db_session, tmp_path):
+        with pytest.raises(ValueError):
+            recompute_results("nonsense", db=db_session)
+        checkpoint = str(tmp_path / "recompute.json")
+        RecomputeProgress("addition").save(checkpoint)
+        with pytest.raises(ValueError, match="addition"):
+            recompute_results("division", checkpoint=checkpoint, resume=True, db=db_session)
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+from sqlalchemy import event
+
+from app.core.cache import response_cache
+from app.core.metrics import metrics
+from app.jobs.import_calculations import import_calculations
+
+
+@pytest.fixture
+def enabled_cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "enabled", True)
+    response_cache.clear()
+    metrics.reset()
+    yield response_cache
+    response_cache.clear()
+
+
+@pytest.fixture
+def query_counter(db_engine):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(db_engine, "before_cursor_execute", count)
+
+
+class TestResponseCache:
+    def test_repeat_list_served_from_version_lookup(
+        self, client, auth_headers, enabled_cache, query_counter, create_calculation
+    ):
+        create_calculation("addition", [1, 2])
+        first = client.get("/calculations", headers=auth_headers)
+        query_counter.clear()
+
+        second = client.get("/calculations", headers=auth_headers)
+        assert second.json() == first.json()
+        assert second.headers["ETag"] == first.headers["ETag"]
+        # Only the version check reaches the database.
+        assert len(query_counter) == 1
+        assert "FROM calculation_versions" in query_counter[0]
+
+    def test_write_invalidates(self, client, auth_headers, enabled_cache, create_calculation):
+        calc = create_calculation("addition", [1, 2])
+        client.get(f"/calculations/{calc['id']}", headers=auth_headers)
+        assert len(client.get("/calculations", headers=auth_headers).json()) == 1
+
+        client.put(f"/calculations/{calc['id']}", json={"inputs": [5, 5]}, headers=auth_headers)
+        assert client.get(f"/calculations/{calc['id']}", headers=auth_headers).json()["result"] == 10
+
+        create_calculation("addition", [3, 4])
+        assert len(client.get("/calculations", headers=auth_headers).json()) == 2
+
+    def test_out_of_process_writes_are_seen(
+        self, client, auth_headers, db_session, test_user, enabled_cache, tmp_path, create_calculation
+    ):
+        create_calculation("addition", [1, 2])
+        assert len(client.get("/calculations", headers=auth_headers).json()) == 1
+
+        # The import job writes through its own session, never touching the cache.
+        path = tmp_path / "history.ndjson"
+        path.write_text(json.dumps({"type": "addition", "inputs": [3, 4]}))
+        import_calculations(str(path), test_user.id, db=db_session)
+        assert len(client.get("/calculations", headers=auth_headers).json()) == 2
+
+    def test_filters_are_part_of_key(self, client, auth_headers, enabled_cache, create_calculation):
+        create_calculation("addition", [1, 2])
+        assert len(client.get("/calculations", headers=auth_headers).json()) == 1
+        assert client.get("/calculations?type=power", headers=auth_headers).json() == []
+
+    def test_cached_etag_answers_304(self, client, auth_headers, enabled_cache, create_calculation):
+        create_calculation("addition", [1, 2])
+        etag = client.get("/calculations", headers=auth_headers).headers["ETag"]
+        response = client.get("/calculations", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_metrics_exported(self, client, auth_headers, enabled_cache, create_calculation):
+        create_calculation("addition", [1, 2])
+        client.get("/calculations", headers=auth_headers)
+        client.get("/calculations", headers=auth_headers)
+        body = client.get("/metrics").text
+        assert "response_cache_hits_total 1.0" in body
+        assert "response_cache_misses_total 1.0" in body
+        assert "response_cache_hit_ratio 0.5" in body
+        assert "response_cache_saved_seconds_total" in body
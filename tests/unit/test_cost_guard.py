@@ -0,0 +1,127 @@
+import math
+import random
+import threading
+import time
+
+import pytest
+
+from app.core.cost import CostExceeded, CostGuard, estimate
+from app.core.executor import CalculationExecutor
+from app.models.calculation import Calculation
+
+TYPES = [
+    "addition", "subtraction", "multiplication", "division", "modulus",
+    "sin", "cos", "tan", "exponential", "power",
+]
+
+
+def _value(rng):
+    kind = rng.random()
+    if kind < 0.1:
+        return 0.0
+    if kind < 0.3:
+        return float(rng.randint(-10, 10))
+    if kind < 0.6:
+        return rng.choice([-1, 1]) * 10 ** rng.uniform(-300, 300)
+    return rng.uniform(-1e6, 1e6)
+
+
+class TestEstimate:
+    def test_power_magnitude(self):
+        assert estimate("power", [10, 400]).magnitude == pytest.approx(400)
+        assert estimate("power", [10, -400]).magnitude == pytest.approx(-400)
+        assert estimate("power", [0, 5]).magnitude == -math.inf
+
+    def test_multiplication_magnitude(self):
+        assert estimate("multiplication", [1e200, 1e200]).magnitude == pytest.approx(400)
+        assert estimate("multiplication", [1e200, 0, 1e200]).magnitude == -math.inf
+
+    def test_exponential_magnitude(self):
+        assert estimate("exponential", [1000]).magnitude == pytest.approx(1000 * math.log10(math.e))
+
+    def test_work_counts_inputs(self):
+        assert estimate("addition", [1.0] * 50).work == 50
+
+
+class TestCostGuard:
+    def test_rejects_oversized_results_without_computing(self):
+        guard = CostGuard()
+
+        def never(calculation_type, inputs):
+            raise AssertionError("should not run")
+
+        with pytest.raises(CostExceeded, match="too large"):
+            guard.run("power", [10, 1e6], never)
+        with pytest.raises(CostExceeded, match="too large"):
+            guard.run("multiplication", [1e300, 1e300], never)
+
+    def test_rejects_too_much_work(self):
+        guard = CostGuard(max_work=10)
+        with pytest.raises(CostExceeded, match="compute budget"):
+            guard.check("addition", [1.0] * 11)
+
+    def test_rejects_non_finite_inputs(self):
+        guard = CostGuard()
+        with pytest.raises(ValueError, match="finite"):
+            guard.check("power", [2.0, float("inf")])
+        with pytest.raises(ValueError):
+            guard.run("addition", [1.0, float("nan")], lambda calculation_type, inputs: sum(inputs))
+
+    def test_offloads_large_work(self):
+        guard = CostGuard(offload_work=3)
+        seen = []
+
+        def compute(calculation_type, inputs):
+            seen.append(threading.current_thread().name)
+            return 1.0
+
+        guard.run("sin", [1.0, 2.0], compute)
+        guard.run("sin", [1.0, 2.0, 3.0], compute)
+        assert not seen[0].startswith("calc-thread")
+        assert seen[1].startswith("calc-thread")
+
+    def test_fuzz_results_are_finite_or_rejected_fast(self):
+        """Random inputs either give a finite float or a ValueError, quickly."""
+        guard = CostGuard()
+        rng = random.Random(1234)
+        slowest = 0.0
+        for _ in range(3000):
+            calculation_type = rng.choice(TYPES)
+            inputs = [_value(rng) for _ in range(rng.randint(1, 6))]
+            started = time.perf_counter()
+            try:
+                result = guard.run(calculation_type, inputs, Calculation.evaluate)
+            except ValueError:
+                pass
+            else:
+                assert isinstance(result, float) and math.isfinite(result), (calculation_type, inputs)
+            slowest = max(slowest, time.perf_counter() - started)
+        assert slowest < 0.05
+
+    def test_fuzz_estimate_bounds_actual_magnitude(self):
+        rng = random.Random(99)
+        for _ in range(2000):
+            calculation_type = rng.choice(["addition", "multiplication", "division", "power"])
+            inputs = [rng.uniform(-1e3, 1e3) for _ in range(rng.randint(2, 4))]
+            try:
+                result = Calculation.evaluate(calculation_type, inputs)
+            except ValueError:
+                continue
+            if result:
+                assert math.log10(abs(result)) <= estimate(calculation_type, inputs).magnitude + 1e-9
+
+    def test_large_reductions_use_the_executor_reduce(self):
+        class Recording(CalculationExecutor):
+            calls = []
+
+            def reduce(self, calculation_type, inputs, timeout=None):
+                self.calls.append(calculation_type)
+                return super().reduce(calculation_type, inputs, timeout)
+
+        guard = CostGuard(offload_work=3, offload=Recording())
+        assert guard.run("subtraction", [10.0, 1.0, 2.0], Calculation.evaluate, standard=True) == 7.0
+        assert Recording.calls == ["subtraction"]
+
+    def test_offloaded_reducible_types_use_the_given_evaluator(self):
+        guard = CostGuard(offload_work=3)
+        assert guard.run("addition", [1.0, 2.0, 3.0], lambda calculation_type, inputs: max(inputs)) == 3.0
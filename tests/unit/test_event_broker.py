@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import uuid
+
+from app.events.broker import EventBroker, RESYNC_EVENT
+
+
+def test_publish_from_thread_reaches_subscriber():
+    async def scenario():
+        broker = EventBroker(queue_size=10)
+        user_id = uuid.uuid4()
+        subscription = broker.subscribe(user_id)
+        thread = threading.Thread(target=broker.publish, args=(user_id, {"type": "created", "id": "1"}))
+        thread.start()
+        thread.join()
+        return await asyncio.wait_for(subscription.get(), timeout=1)
+
+    assert asyncio.run(scenario()) == {"type": "created", "id": "1"}
+
+
+def test_events_are_scoped_to_user():
+    async def scenario():
+        broker = EventBroker(queue_size=10)
+        mine, other = uuid.uuid4(), uuid.uuid4()
+        subscription = broker.subscribe(mine)
+        broker.publish(other, {"type": "created"})
+        await asyncio.sleep(0)
+        return subscription.queue.qsize()
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_slow_consumer_gets_resync_instead_of_backlog():
+    async def scenario():
+        broker = EventBroker(queue_size=3)
+        user_id = uuid.uuid4()
+        subscription = broker.subscribe(user_id)
+        for i in range(10):
+            broker.publish(user_id, {"type": "created", "id": str(i)})
+        await asyncio.sleep(0)
+        events = []
+        while not subscription.queue.empty():
+            events.append(subscription.queue.get_nowait())
+        return events, subscription.dropped
+
+    events, dropped = asyncio.run(scenario())
+    assert len(events) <= 3
+    assert RESYNC_EVENT in events
+    assert dropped > 0
+
+
+def test_unsubscribe_and_forwarder():
+    forwarded = []
+
+    async def scenario():
+        broker = EventBroker(queue_size=10)
+        broker.forwarder = lambda user_id, event: forwarded.append(event)
+        user_id = uuid.uuid4()
+        subscription = broker.subscribe(user_id)
+        assert broker.subscriber_count(user_id) == 1
+        broker.unsubscribe(subscription)
+        broker.publish(user_id, {"type": "deleted"})
+        return broker.subscriber_count()
+
+    assert asyncio.run(scenario()) == 0
+    assert forwarded == [{"type": "deleted"}]
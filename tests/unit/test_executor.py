@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+
+from app.core.executor import (
+    CalculationExecutor,
+    ExecutorTimeout,
+    ProcessExecutor,
+    ThreadExecutor,
+    create_executor,
+)
+from app.models.calculation import Calculation
+
+
+def _sleepy(calculation_type, inputs):
+    time.sleep(0.5)
+    return 0.0
+
+
+def test_create_executor_modes():
+    assert create_executor("inline").mode == "inline"
+    assert create_executor("thread", 1).mode == "thread"
+    assert create_executor("process", 1).mode == "process"
+    with pytest.raises(ValueError):
+        create_executor("gpu")
+
+
+def test_inline_runs_in_caller():
+    names = []
+
+    def evaluate(calculation_type, inputs):
+        names.append(threading.current_thread().name)
+        return sum(inputs)
+
+    assert CalculationExecutor().run(evaluate, "addition", [1.0, 2.0]) == 3.0
+    assert names == [threading.current_thread().name]
+
+
+def test_thread_executor_times_out():
+    executor = ThreadExecutor(max_workers=1)
+    try:
+        with pytest.raises(ExecutorTimeout):
+            executor.run(_sleepy, "addition", [1.0], timeout=0.05)
+    finally:
+        executor.shutdown()
+
+
+def test_process_executor_passes_inputs_through_shared_memory():
+    executor = ProcessExecutor(max_workers=1)
+    try:
+        inputs = [float(i) for i in range(1, 100_001)]
+        assert executor.run(Calculation.evaluate, "addition", inputs) == sum(inputs)
+        with pytest.raises(ValueError, match="divide by zero"):
+            executor.run(Calculation.evaluate, "division", [1.0, 0.0])
+    finally:
+        executor.shutdown()
@@ -0,0 +1,95 @@
+import math
+import time
+
+import pytest
+
+from app.core import expression
+from app.core.expression import compile_expression
+from app.models.calculation import Calculation
+
+
+@pytest.mark.parametrize("text, inputs, expected", [
+    ("(a + b) * sin(c)", [1, 2, 90], 3.0),
+    ("a - b - c", [10, 3, 2], 5.0),
+    ("-a ** 2", [3], -9.0),
+    ("a % b", [7, 3], 1.0),
+    ("max(a, b, 2) + min(a, b)", [1, 5], 6.0),
+    ("sqrt(x) + log(e) + cos(y)", [16, 0], 6.0),
+    ("2 * pi * r", [0.5], math.pi),
+])
+def test_evaluates_like_python(text, inputs, expected):
+    assert compile_expression(text)(inputs) == pytest.approx(expected)
+
+
+def test_variables_bind_alphabetically():
+    plan = compile_expression("y - x")
+    assert plan.variables == ("x", "y")
+    assert plan([1, 10]) == 9.0
+
+
+def test_trigonometry_uses_degrees_like_the_sin_type():
+    assert Calculation.evaluate("expression", [30], "sin(a)") == pytest.approx(
+        Calculation.evaluate("sin", [30])
+    )
+
+
+@pytest.mark.parametrize("text", [
+    "__import__('os').system('true')",
+    "a.__class__",
+    "a[0]",
+    "(lambda: 1)()",
+    "[a for a in b]",
+    "open('x')",
+    "eval('1')",
+    "a if b else c",
+    "a < b",
+    "'text'",
+    "True + a",
+    "sin",
+    "sin(a, b)",
+    "min(a)",
+    "sin(x=a)",
+    "max(*a)",
+    "_a + 1",
+    "a; b",
+    "a = 1",
+    "-" * 300 + "a",
+    "a + " * 200 + "a",
+    "a + " + "9" * 400,
+])
+def test_rejects_unsafe_or_invalid_syntax(text):
+    with pytest.raises(ValueError):
+        compile_expression(text)
+
+
+@pytest.mark.parametrize("text, inputs, message", [
+    ("a / b", [1, 0], "divide by zero"),
+    ("a ** b", [10, 400], "too large"),
+    ("a ** 1000000000", [7], "too large"),
+    ("a ** 0.5", [-8], "not a real number"),
+    ("sqrt(a)", [-1], "cannot be evaluated"),
+    ("tan(a)", [90], "undefined"),
+    ("a + b", [1], "needs 2 inputs"),
+])
+def test_evaluation_errors_are_value_errors(text, inputs, message):
+    with pytest.raises(ValueError, match=message):
+        compile_expression(text)(inputs)
+
+
+def test_plans_are_cached_by_text():
+    text = "a * 3 + b"
+    first = compile_expression(text)
+    hits = expression.cache_info().hits
+    assert compile_expression(text) is first
+    assert expression.cache_info().hits == hits + 1
+
+
+def test_cached_evaluation_takes_microseconds():
+    plan = compile_expression("(a + b) * sin(c)")
+    runs = 20_000
+    started = time.perf_counter()
+    for value in range(runs):
+        Calculation.evaluate("expression", [value, 1.0, 30.0], "(a + b) * sin(c)")
+    per_call = (time.perf_counter() - started) / runs
+    assert per_call < 50e-6
+    assert plan([1, 2, 30]) == pytest.approx(1.5)
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from app.core.group_commit import GroupCommitWriter
+
+
+class _FakeSession:
+    """Records what each transaction contained."""
+
+    def __init__(self, log, fail_on=None):
+        self.log = log
+        self.fail_on = fail_on
+        self.rows = []
+
+    def commit(self):
+        if self.fail_on is not None and self.fail_on in self.rows:
+            raise RuntimeError("constraint violated")
+        self.log.append(list(self.rows))
+
+    def rollback(self):
+        self.rows = []
+
+    def expunge(self, obj):
+        pass
+
+    def close(self):
+        pass
+
+
+def _writer(log, fail_on=None, **kwargs):
+    return GroupCommitWriter(
+        lambda: _FakeSession(log, fail_on),
+        lambda db, obj: db.rows.append(obj),
+        **kwargs
+    )
+
+
+def _submit_concurrently(writer, values):
+    results, errors = {}, {}
+    barrier = threading.Barrier(len(values))
+
+    def submit(value):
+        barrier.wait()
+        try:
+            results[value] = writer.submit(value)
+        except Exception as e:
+            errors[value] = e
+
+    threads = [threading.Thread(target=submit, args=(value,)) for value in values]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_submits_share_commits():
+    commits = []
+    writer = _writer(commits, window_seconds=0.05)
+    results, errors = _submit_concurrently(writer, list(range(50)))
+    writer.close()
+
+    assert errors == {}
+    assert results == {value: value for value in range(50)}
+    assert sorted(row for batch in commits for row in batch) == list(range(50))
+    assert len(commits) < 50
+
+
+def test_max_batch_caps_transaction_size():
+    commits = []
+    writer = _writer(commits, window_seconds=0.05, max_batch=8)
+    _submit_concurrently(writer, list(range(30)))
+    writer.close()
+    assert max(len(batch) for batch in commits) <= 8
+
+
+def test_bad_row_only_fails_its_own_request():
+    commits = []
+    writer = _writer(commits, fail_on=3, window_seconds=0.05)
+    results, errors = _submit_concurrently(writer, list(range(6)))
+    writer.close()
+
+    assert set(errors) == {3}
+    assert sorted(results) == [0, 1, 2, 4, 5]
+
+
+def test_after_commit_runs_once_durable():
+    commits, seen = [], []
+    writer = _writer(commits, window_seconds=0.001)
+    writer.submit("row", after_commit=lambda obj: seen.append((obj, len(commits))))
+    writer.close()
+    assert seen == [("row", 1)]
@@ -0,0 +1,88 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+from app.core.idempotency import (
+    IdempotencyConflict,
+    IdempotencyStore,
+    StoredResponse,
+    fingerprint,
+)
+
+
+def test_concurrent_duplicate_waits_for_first():
+    store = IdempotencyStore()
+    user_id = uuid.uuid4()
+    calls, results = [], []
+    barrier = threading.Barrier(5)
+
+    def handler():
+        calls.append(1)
+        time.sleep(0.1)
+        return StoredResponse(201, b'{"id": 1}')
+
+    def request():
+        barrier.wait()
+        results.append(store.run(user_id, "k", "fp", handler))
+
+    threads = [threading.Thread(target=request) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(replayed for _, replayed in results) == [False, True, True, True, True]
+    assert {response.body for response, _ in results} == {b'{"id": 1}'}
+
+
+def test_failed_first_request_releases_key():
+    store = IdempotencyStore()
+    user_id = uuid.uuid4()
+
+    def failing():
+        raise RuntimeError("database down")
+
+    with pytest.raises(RuntimeError):
+        store.run(user_id, "k", "fp", failing)
+    response, replayed = store.run(user_id, "k", "fp", lambda: StoredResponse(201, b"{}"))
+    assert replayed is False
+
+
+def test_keys_are_scoped_per_user_and_expire():
+    store = IdempotencyStore(ttl_seconds=0)
+    user_id = uuid.uuid4()
+    store.run(user_id, "k", "fp", lambda: StoredResponse(201, b"1"))
+    _, replayed = store.run(user_id, "k", "other", lambda: StoredResponse(201, b"2"))
+    assert replayed is False
+
+    store = IdempotencyStore()
+    store.run(user_id, "k", "fp", lambda: StoredResponse(201, b"1"))
+    _, replayed = store.run(uuid.uuid4(), "k", "other", lambda: StoredResponse(201, b"2"))
+    assert replayed is False
+    with pytest.raises(IdempotencyConflict):
+        store.run(user_id, "k", "other", lambda: StoredResponse(201, b"2"))
+
+
+def test_fingerprint_depends_on_payload():
+    assert fingerprint("POST", "/calculations", "a") != fingerprint("POST", "/calculations", "b")
+
+
+def test_expired_records_are_dropped_by_later_keys():
+    store = IdempotencyStore(ttl_seconds=0)
+    user_id = uuid.uuid4()
+    for key in range(100):
+        store.run(user_id, str(key), "fp", lambda: StoredResponse(201, b"{}"))
+    assert len(store._records) == 1
+
+
+def test_records_are_bounded():
+    store = IdempotencyStore(max_entries=10)
+    user_id = uuid.uuid4()
+    for key in range(100):
+        store.run(user_id, str(key), "fp", lambda: StoredResponse(201, b"{}"))
+    assert len(store._records) == 10
+    # The newest keys are still honoured
+    assert store.run(user_id, "99", "fp", lambda: StoredResponse(500, b""))[1] is True
@@ -0,0 +1,38 @@
+import pytest
+
+from app.core import importer
+from app.core.importer import LineBuffer, RecordParser
+
+
+@pytest.fixture(autouse=True)
+def short_lines(monkeypatch):
+    monkeypatch.setattr(importer, "MAX_LINE_BYTES", 8)
+
+
+def test_line_buffer_numbers_lines_across_chunks():
+    lines = LineBuffer()
+    assert lines.feed(b"ab\ncd") == [(1, "ab")]
+    assert lines.feed(b"e\r\nf") == [(2, "cde")]
+    assert lines.close() == [(3, "f")]
+
+
+def test_line_buffer_drops_a_long_line_that_never_fits():
+    lines = LineBuffer()
+    assert lines.feed(b"ok\n" + b"x" * 20) == [(1, "ok")]
+    assert lines.feed(b"y" * 20) == []
+    assert lines.feed(b"z\nnext\n") == [(2, None), (3, "next")]
+    assert lines.feed(b"x" * 20) == []
+    assert lines.close() == [(4, None)]
+
+
+def test_line_buffer_flags_a_long_line_inside_one_chunk():
+    assert LineBuffer().feed(b"x" * 20 + b"\nok\n") == [(1, None), (2, "ok")]
+
+
+def test_long_lines_are_record_errors():
+    parser = RecordParser("ndjson")
+    assert parser.parse(1, None) == "Line is longer than 8 bytes."
+    assert parser.parse(2, "x" * 20) == "Line is longer than 8 bytes."
+    assert RecordParser("ndjson", start_line=5).parse(1, None) is None
+    with pytest.raises(ValueError, match="header"):
+        RecordParser("csv").parse(1, None)
@@ -0,0 +1,52 @@
+from array import array
+
+import pytest
+
+import operations
+from operations import vectorized
+
+
+@pytest.mark.parametrize("name", ["add", "subtract", "multiply", "divide"])
+def test_matches_scalar_functions(name):
+    left, right = [1, 2.5, -3, 7], [2, 4, 0.5, -8]
+    expected = [getattr(operations, name)(a, b) for a, b in zip(left, right)]
+    assert getattr(vectorized, name)(left, right) == expected
+    assert getattr(vectorized, name)(3, 4) == getattr(operations, name)(3, 4)
+
+
+def test_broadcasting():
+    assert vectorized.add([1, 2, 3], 10) == [11, 12, 13]
+    assert vectorized.subtract(10, [1, 2]) == [9, 8]
+    assert vectorized.multiply([2], [1, 2, 3]) == [2, 4, 6]
+    with pytest.raises(ValueError, match="broadcast"):
+        vectorized.add([1, 2], [1, 2, 3])
+
+
+def test_zero_divisor_raises_before_writing():
+    out = [0.0, 0.0, 0.0]
+    with pytest.raises(ValueError, match="Cannot divide by zero!"):
+        vectorized.divide([1, 2, 3], [1, 0, 1], out=out)
+    assert out == [0.0, 0.0, 0.0]
+    with pytest.raises(ValueError, match="Cannot divide by zero!"):
+        vectorized.divide([1, 2], 0)
+
+
+def test_out_buffers_are_filled_and_returned():
+    out = array("d", bytes(8 * 3))
+    assert vectorized.divide([1, 2, 3], 2, out=out) is out
+    assert list(out) == [0.5, 1.0, 1.5]
+    values = [0, 0]
+    assert vectorized.add([1, 2], [3, 4], out=values) is values
+    assert values == [4, 6]
+    with pytest.raises(ValueError, match="length"):
+        vectorized.add([1, 2], [3, 4], out=[0])
+
+
+def test_numpy_arrays_use_ufuncs():
+    np = pytest.importorskip("numpy")
+    left = np.arange(6, dtype=float).reshape(2, 3)
+    out = np.empty_like(left)
+    assert vectorized.add(left, np.array([1.0, 2.0, 3.0]), out=out) is out
+    assert out.tolist() == [[1, 3, 5], [4, 6, 8]]
+    with pytest.raises(ValueError, match="Cannot divide by zero!"):
+        vectorized.divide(left, left)
@@ -0,0 +1,77 @@
+import math
+import random
+
+import pytest
+
+from app.core import reduction
+from app.core.executor import ProcessExecutor
+
+
+def _sequential(calculation_type, inputs):
+    result = inputs[0]
+    for value in inputs[1:]:
+        if calculation_type == "addition":
+            result += value
+        elif calculation_type == "subtraction":
+            result -= value
+        elif calculation_type == "multiplication":
+            result *= value
+        else:
+            result /= value
+    return result
+
+
+@pytest.mark.parametrize("calculation_type", sorted(reduction.REDUCIBLE))
+@pytest.mark.parametrize("chunks", [1, 2, 7, 64])
+def test_chunked_matches_sequential(calculation_type, chunks):
+    rng = random.Random(7)
+    inputs = [rng.uniform(0.5, 1.5) for _ in range(1000)]
+    expected = _sequential(calculation_type, inputs)
+    assert reduction.evaluate(calculation_type, inputs, chunks) == pytest.approx(expected, rel=1e-12)
+
+
+def test_result_does_not_depend_on_chunking():
+    rng = random.Random(3)
+    inputs = [rng.uniform(-1e6, 1e6) for _ in range(10_000)]
+    results = {reduction.evaluate("addition", inputs, chunks) for chunks in (1, 3, 16, 100)}
+    assert max(results) - min(results) <= 4 * math.ulp(max(results, key=abs))
+
+
+def test_sum_is_compensated():
+    inputs = [1e16, 1.0, -1e16] * 1000
+    assert sum(inputs) != 1000.0
+    assert reduction.evaluate("addition", inputs, 5) == 1000.0
+
+
+def test_products_survive_intermediate_overflow():
+    assert reduction.evaluate("multiplication", [1e200, 1e200, 1e-200], 3) == pytest.approx(1e200)
+    assert reduction.evaluate("division", [1e300, 1e200, 1e200], 2) == pytest.approx(1e-100)
+    with pytest.raises(ValueError, match="too large"):
+        reduction.evaluate("multiplication", [1e200, 1e200])
+
+
+def test_division_by_zero_anywhere():
+    with pytest.raises(ValueError, match="divide by zero"):
+        reduction.evaluate("division", [1.0] * 50 + [0.0] + [2.0] * 50, 4)
+    assert reduction.evaluate("division", [0.0, 5.0]) == 0.0
+
+
+def test_chunk_bounds_cover_input():
+    assert reduction.chunk_bounds(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert reduction.chunk_bounds(2, 8) == [(0, 1), (1, 2)]
+    assert reduction.chunk_bounds(0, 4) == [(0, 0)]
+
+
+def test_modulus_is_not_reducible():
+    with pytest.raises(ValueError):
+        reduction.split("modulus", [5.0, 3.0])
+
+
+def test_process_executor_reduces_in_parallel():
+    executor = ProcessExecutor(max_workers=2)
+    try:
+        inputs = [float(i % 100) for i in range(200_001)]
+        assert executor.reduce("addition", inputs) == math.fsum(inputs)
+        assert executor.reduce("subtraction", inputs) == inputs[0] - math.fsum(inputs[1:])
+    finally:
+        executor.shutdown()
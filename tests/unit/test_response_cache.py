@@ -0,0 +1,75 @@
+import threading
+import uuid
+
+from app.core import cache as cache_module
+from app.core.cache import CachedResponse, ResponseCache
+
+
+def test_lru_bound_evicts_oldest():
+    cache = ResponseCache(max_entries=2)
+    user_id = uuid.uuid4()
+    for key in ("a", "b", "c"):
+        cache.set(user_id, 0, key, CachedResponse(etag=key, body=b"{}"))
+    assert cache.get(user_id, 0, "a") is None
+    assert cache.get(user_id, 0, "c").etag == "c"
+
+
+def test_new_version_misses_older_entries():
+    cache = ResponseCache()
+    mine, other = uuid.uuid4(), uuid.uuid4()
+    cache.set(mine, 1, "k", CachedResponse(etag="v1", body=b"[]"))
+    assert cache.get(mine, 2, "k") is None
+    assert cache.get(other, 1, "k") is None
+    assert cache.get(mine, 1, "k").etag == "v1"
+
+
+def test_get_or_build_skips_entries_without_body():
+    cache = ResponseCache()
+    user_id = uuid.uuid4()
+    calls = []
+
+    def build():
+        calls.append(1)
+        return CachedResponse(etag="x")
+
+    cache.get_or_build(user_id, 0, "k", build)
+    cache.get_or_build(user_id, 0, "k", build)
+    assert len(calls) == 2
+
+
+def test_expired_entries_are_not_served():
+    cache = ResponseCache(ttl_seconds=-1)
+    user_id = uuid.uuid4()
+    cache.set(user_id, 0, "k", CachedResponse(etag="x", body=b"[]"))
+    assert cache.get(user_id, 0, "k") is None
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+
+def test_redis_tier_works_from_plain_threads(monkeypatch):
+    monkeypatch.setattr(cache_module, "REDIS_AVAILABLE", True)
+    cache = ResponseCache(redis_url="redis://fake")
+    fake = _FakeRedis()
+
+    async def client():
+        return fake
+
+    monkeypatch.setattr(cache, "_client", client)
+    user_id = uuid.uuid4()
+    entry = CachedResponse(etag="x", body=b"[]")
+    # Like a job-runner pool: not an AnyIO worker thread.
+    writer = threading.Thread(target=cache.set, args=(user_id, 3, "k", entry))
+    writer.start()
+    writer.join()
+    assert fake.values[f"rc:{user_id}:3:k"] == b"x\n[]"
+    cache.clear()
+    assert cache.get(user_id, 3, "k") == entry
@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from app.core.singleflight import Singleflight
+
+
+def _herd(flights, key, fn, callers):
+    barrier = threading.Barrier(callers)
+    results, errors = [], []
+
+    def call():
+        barrier.wait()
+        try:
+            results.append(flights.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return "rows"
+
+    results, errors = _herd(Singleflight(), "k", slow, 20)
+    assert results == ["rows"] * 20
+    assert errors == []
+    assert len(calls) == 1
+
+
+def test_errors_are_shared():
+    def failing():
+        time.sleep(0.1)
+        raise ValueError("boom")
+
+    results, errors = _herd(Singleflight(), "k", failing, 5)
+    assert results == []
+    assert len(errors) == 5
+
+
+def test_sequential_calls_are_not_cached():
+    flights = Singleflight()
+    calls = []
+    flights.do("k", lambda: calls.append(1))
+    flights.do("k", lambda: calls.append(1))
+    assert len(calls) == 2
+    assert flights.in_flight() == 0
+
+
+def test_disabled_runs_every_call():
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+
+    _herd(Singleflight(enabled=False), "k", slow, 5)
+    assert len(calls) == 5
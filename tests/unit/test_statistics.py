@@ -0,0 +1,121 @@
+import random
+import statistics as reference
+
+import pytest
+
+from app.core import statistics
+from app.core.statistics import Moments, StreamingStatistic, TDigest
+from app.models.calculation import Calculation
+
+
+@pytest.fixture
+def values():
+    rng = random.Random(3)
+    return [rng.gauss(10, 4) for _ in range(5001)]
+
+
+def test_moments_match_reference(values):
+    assert statistics.mean(values) == pytest.approx(reference.fmean(values), rel=1e-12)
+    assert statistics.variance(values) == pytest.approx(reference.variance(values), rel=1e-12)
+    assert statistics.stddev(values) == pytest.approx(reference.stdev(values), rel=1e-12)
+
+
+def test_welford_add_chunked_extend_and_merge_agree(values):
+    one_by_one, chunked, left, right = Moments(), Moments(), Moments(), Moments()
+    for value in values:
+        one_by_one.add(value)
+    for start in range(0, len(values), 777):
+        chunked.extend(values[start:start + 777])
+    left.extend(values[:1000])
+    right.extend(values[1000:])
+    left.merge(right)
+    for moments in (chunked, left):
+        assert moments.count == one_by_one.count
+        assert moments.result("variance") == pytest.approx(one_by_one.result("variance"), rel=1e-12)
+
+
+def test_variance_is_stable_with_a_large_offset():
+    assert statistics.variance([1e9 + 4, 1e9 + 7, 1e9 + 13, 1e9 + 16]) == 30.0
+
+
+@pytest.mark.parametrize("q", [0, 0.01, 0.25, 0.5, 0.9, 1])
+def test_exact_quantiles_by_selection(values, q):
+    ordered = sorted(values)
+    position = q * (len(values) - 1)
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    expected = ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+    assert statistics.quantile(values, q) == pytest.approx(expected, rel=1e-12)
+
+
+def test_selection_with_duplicates():
+    assert statistics.median([2.0] * 100 + [1.0] * 100) == 1.5
+    assert statistics.median([5.0] * 301) == 5.0
+    assert statistics.median([3, 1, 2]) == 2
+
+
+def test_percentile_takes_its_rank_first():
+    assert statistics.percentile([50, 1, 2, 3, 4]) == 2.5
+    assert statistics.percentile([100, 7, 1]) == 7
+    with pytest.raises(ValueError, match="between 0 and 100"):
+        statistics.percentile([101, 1, 2])
+
+
+def test_too_few_values():
+    with pytest.raises(ValueError):
+        statistics.mean([])
+    with pytest.raises(ValueError, match="two values"):
+        statistics.variance([1.0])
+
+
+def test_digest_is_exact_for_short_inputs():
+    rng = random.Random(5)
+    values = [rng.random() for _ in range(40)]
+    digest = TDigest()
+    digest.extend(values)
+    for q in (0, 0.1, 0.5, 0.75, 1):
+        assert digest.quantile(q) == pytest.approx(statistics.quantile(values, q), abs=1e-12)
+
+
+def test_digest_memory_is_bounded_and_close():
+    rng = random.Random(9)
+    values = [rng.gauss(0, 1) for _ in range(200_000)]
+    digest = TDigest()
+    for start in range(0, len(values), 4096):
+        digest.extend(values[start:start + 4096])
+    assert digest.count == len(values)
+    assert len(digest._means) <= digest.compression
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        assert digest.quantile(q) == pytest.approx(statistics.quantile(values, q), abs=0.02)
+
+
+def test_streaming_statistic(values):
+    moments = StreamingStatistic("stddev")
+    quantile = StreamingStatistic("percentile", 90)
+    for start in range(0, len(values), 1000):
+        moments.extend(values[start:start + 1000])
+        quantile.extend(values[start:start + 1000])
+    assert moments.count == quantile.count == len(values)
+    assert moments.result() == pytest.approx(statistics.stddev(values), rel=1e-12)
+    assert quantile.result() == pytest.approx(statistics.quantile(values, 0.9), abs=0.05)
+
+
+def test_streaming_statistic_needs_a_percentile_only_for_percentile():
+    with pytest.raises(ValueError):
+        StreamingStatistic("percentile")
+    with pytest.raises(ValueError):
+        StreamingStatistic("mean", 50)
+    with pytest.raises(ValueError):
+        StreamingStatistic("addition")
+
+
+@pytest.mark.parametrize("calculation_type, inputs, expected", [
+    ("mean", [1, 2, 3, 6], 3.0),
+    ("variance", [2, 4, 4, 4, 5, 5, 7, 9], 32 / 7),
+    ("stddev", [1, 3], 2 ** 0.5),
+    ("median", [5, 1, 3], 3.0),
+    ("percentile", [25, 1, 2, 3, 4, 5], 2.0),
+])
+def test_calculation_dispatch(calculation_type, inputs, expected):
+    calculation = Calculation.create(calculation_type, None, inputs)
+    assert calculation.get_result() == pytest.approx(expected)
@@ -0,0 +1,37 @@
+import pytest
+
+from app.core import sweep
+from app.core.sweep import Axis
+
+
+def test_axis_includes_stop():
+    assert list(Axis(0, 360, 90)) == [0, 90, 180, 270, 360]
+    assert list(Axis(0, 10, 3)) == [0, 3, 6, 9]
+    assert list(Axis(5, 5, 1)) == [5]
+
+
+def test_axis_tolerates_float_steps():
+    axis = Axis(0.0, 0.3, 0.1)
+    assert len(axis) == 4
+    assert axis[3] == pytest.approx(0.3)
+
+
+def test_axis_counts_down():
+    assert list(Axis(3, 0, -1)) == [3, 2, 1, 0]
+
+
+def test_grid_is_cartesian_product_first_position_slowest():
+    positions = [Axis(1, 2, 1), 10.0, Axis(0, 2, 1)]
+    assert sweep.size(positions) == 6
+    rows = [row for _, batch in sweep.batches(positions, 4) for row in batch]
+    assert rows == [
+        [1, 10.0, 0], [1, 10.0, 1], [1, 10.0, 2],
+        [2, 10.0, 0], [2, 10.0, 1], [2, 10.0, 2],
+    ]
+
+
+def test_batches_are_lazy():
+    huge = [Axis(0, 10 ** 6, 1), Axis(0, 10 ** 6, 1)]
+    offset, rows = next(sweep.batches(huge, 3))
+    assert sweep.size(huge) == (10 ** 6 + 1) ** 2
+    assert (offset, rows) == (0, [[0, 0], [0, 1], [0, 2]])
@@ -0,0 +1,71 @@
+import math
+import random
+
+import pytest
+
+from app.core.cost import CostExceeded, CostGuard
+from app.core.executor import CalculationExecutor
+from app.core.vectorized import RowResults, evaluate_flat, evaluate_rows, to_rows
+from app.models.calculation import Calculation
+from app.schemas.calculation import CalculationType
+
+
+@pytest.mark.parametrize(
+    "calculation_type",
+    [t.value for t in CalculationType if t != CalculationType.EXPRESSION]
+)
+def test_rows_match_single_evaluation(calculation_type):
+    rng = random.Random(11)
+    rows = [[rng.uniform(0.5, 3.0), rng.uniform(0.5, 3.0)] for _ in range(200)]
+    evaluated = evaluate_rows(calculation_type, rows)
+    assert evaluated.errors == {}
+    assert evaluated.results == [Calculation.evaluate(calculation_type, row) for row in rows]
+
+
+def test_expression_rows():
+    evaluated = evaluate_rows("expression", [[1, 2], [3, 4], [1, 0]], expression="a / b")
+    assert evaluated.results == [0.5, 0.75, None]
+    assert evaluated.errors == {2: "Cannot divide by zero."}
+
+
+def test_failed_rows_are_reported_by_index():
+    evaluated = evaluate_rows("division", [[6, 3], [1, 0], [9, 3]])
+    assert evaluated.results == [2.0, None, 3.0]
+    assert evaluated.errors == {1: "Cannot divide by zero."}
+
+
+def test_overflow_is_a_row_error():
+    evaluated = evaluate_rows("addition", [[1e308, 1e308], [1, 2]])
+    assert evaluated.results == [None, 3.0]
+    assert "too large" in evaluated.errors[0]
+
+    evaluated = evaluate_rows("power", [[10, 400], [0, -1], [2, 3]])
+    assert evaluated.results == [None, None, 8.0]
+    assert set(evaluated.errors) == {0, 1}
+
+
+def test_flat_matrix_splits_into_rows():
+    flat = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+    assert to_rows(flat, 3) == [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+    assert evaluate_flat(2, "addition", flat) == RowResults([3.0, 7.0, 11.0])
+
+
+class Recording(CalculationExecutor):
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, evaluate, calculation_type, inputs, timeout=None):
+        self.calls += 1
+        return evaluate(calculation_type, inputs)
+
+
+def test_guard_offloads_large_matrices():
+    executor = Recording()
+    guard = CostGuard(max_work=1000, offload_work=100, offload=executor)
+
+    assert guard.run_rows("addition", [[1, 2]] * 10).results == [3.0] * 10
+    assert executor.calls == 0
+    assert guard.run_rows("addition", [[1, 2]] * 50).results == [3.0] * 50
+    assert executor.calls == 1
+    with pytest.raises(CostExceeded):
+        guard.run_rows("addition", [[1, 2]] * 501)